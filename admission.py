@@ -0,0 +1,105 @@
+"""Admission control for media requests (thumbnails, streams, packages).
+
+Each storage root gets a fixed number of concurrent transfers and a short,
+bounded wait queue. A request that finds the queue full, or waits longer
+than ``wait`` seconds, is rejected straight away (the caller answers 503 with
+Retry-After) instead of tying up a web worker. ``max_inflight`` caps admitted
+plus waiting media requests across all roots, so however slow the NAS gets,
+media never holds more than that many worker threads and the JSON API keeps
+the rest.
+"""
+import time
+import threading
+from collections import deque
+
+
+class Overloaded(Exception):
+    def __init__(self, root, retry_after):
+        super().__init__(f"media queue full for {root or 'default root'}")
+        self.root = root
+        self.retry_after = retry_after
+
+
+class Ticket:
+    def __init__(self, gate, root):
+        self._gate = gate
+        self.root = root
+        self.started = time.monotonic()
+        self._released = False
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self._gate._release(self)
+
+
+class _Root:
+    def __init__(self):
+        self.active = 0
+        self.waiters = deque()  # FIFO of threading.Event
+        self.admitted = 0
+        self.rejected = 0
+        self.avg_hold = 1.0  # seconds, moving average of slot hold time
+
+
+class AdmissionController:
+    def __init__(self, per_root=6, queue=12, wait=5.0, max_inflight=32):
+        self.per_root = max(1, per_root)
+        self.queue = max(0, queue)
+        self.wait = wait
+        self.max_inflight = max(self.per_root, max_inflight)
+        self._lock = threading.Lock()
+        self._roots = {}
+        self._inflight = 0
+
+    def _retry_after(self, r):
+        # time for the queue ahead to drain, rounded up to whole seconds
+        backlog = (len(r.waiters) + r.active) / self.per_root
+        return max(1, int(backlog * r.avg_hold + 0.999))
+
+    def admit(self, root):
+        """A Ticket for a slot on `root` (release it when the transfer ends); raises Overloaded."""
+        with self._lock:
+            r = self._roots.setdefault(root, _Root())
+            if self._inflight >= self.max_inflight or (r.active >= self.per_root and len(r.waiters) >= self.queue):
+                r.rejected += 1
+                raise Overloaded(root, self._retry_after(r))
+            self._inflight += 1
+            if r.active < self.per_root and not r.waiters:
+                r.active += 1
+                r.admitted += 1
+                return Ticket(self, root)
+            event = threading.Event()
+            r.waiters.append(event)
+        # _release hands the slot over directly (active stays counted) and sets the event
+        if event.wait(self.wait):
+            return Ticket(self, root)
+        with self._lock:
+            if event.is_set():  # handed over just as the wait timed out
+                return Ticket(self, root)
+            r.waiters.remove(event)
+            r.rejected += 1
+            self._inflight -= 1
+            raise Overloaded(root, self._retry_after(r))
+
+    def _release(self, ticket):
+        held = time.monotonic() - ticket.started
+        with self._lock:
+            r = self._roots[ticket.root]
+            r.avg_hold = 0.8 * r.avg_hold + 0.2 * held
+            self._inflight -= 1
+            if r.waiters:
+                r.admitted += 1
+                r.waiters.popleft().set()
+            else:
+                r.active -= 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "per_root": self.per_root, "queue": self.queue, "wait": self.wait,
+                "max_inflight": self.max_inflight, "inflight": self._inflight,
+                "roots": {root or "": {"active": r.active, "waiting": len(r.waiters), "admitted": r.admitted,
+                                       "rejected": r.rejected, "avg_hold_ms": round(r.avg_hold * 1000, 1)}
+                          for root, r in self._roots.items()},
+            }
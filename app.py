@@ -1,22 +1,53 @@
 # app.py - DC Projects (complete single-file server)
 import os
+import sys
 import csv
-import shutil
+import json
 import subprocess
 import platform
 import re
+import threading
+import atexit
+import hashlib
+import time
+import uuid
+import logging
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from io import StringIO
 from pathlib import Path
 
 from flask import (
     Flask, render_template, request, jsonify, session, redirect,
-    url_for, send_file, abort, make_response
+    url_for, send_file, abort, make_response, has_request_context, Response
 )
+from flask.logging import default_handler
 from flask_sqlalchemy import SQLAlchemy
+from werkzeug.http import HTTP_STATUS_CODES
+from werkzeug.wsgi import ClosingIterator
 from werkzeug.security import generate_password_hash, check_password_hash
-from urllib.parse import quote_plus
-from sqlalchemy import func
+from urllib.parse import quote_plus, quote
+from sqlalchemy import func, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from shot_codes import derive_fields
+from thumbnails import ThumbnailCache
+from statcache import StatCache
+from media_index import MediaScanner, DirState
+from sequences import SequenceCache
+from copyengine import CopyEngine, tree_pairs
+from folderplan import FolderPlan
+from templatelib import TemplateLibrary, version_key
+from proxies import ProxyCache, READY, PENDING, BUSY, UNAVAILABLE
+from archives import Archive, members_for
+from admission import AdmissionController, Overloaded
+from diskusage import UsageScanner, DirUsage, rollups
+from pathcheck import check_paths
+from metrics import Metrics, server_timing
+from sqlprofile import SqlProfiler
+from logsetup import QueuedLogging, JsonFormatter, parse_sample_rates
 try:
     # Load .env file if present so environment variables in .env are available
     from dotenv import load_dotenv
@@ -72,10 +103,213 @@ DB_NAME = os.environ.get("DB_NAME", "dc_projects")
 db_user_esc = quote_plus(DB_USER)
 db_pass_esc = quote_plus(DB_PASSWORD)
 app.config["SQLALCHEMY_DATABASE_URI"] = f"mysql+pymysql://{db_user_esc}:{db_pass_esc}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+# Full SQLAlchemy URL override, e.g. a throwaway SQLite or MySQL database for the benchmark suite (bench/)
+if os.environ.get("DC_DATABASE_URL"):
+    app.config["SQLALCHEMY_DATABASE_URI"] = os.environ["DC_DATABASE_URL"]
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 
 db = SQLAlchemy(app)
 
+# Cached exists/isfile/isdir for NAS media paths (see statcache.py)
+fs_stats = StatCache(
+    ttl=float(os.environ.get("DC_STAT_TTL", 10)),
+    negative_ttl=float(os.environ.get("DC_STAT_NEGATIVE_TTL", 3)),
+    inotify_roots=[r for r in os.environ.get("DC_STAT_INOTIFY_ROOTS", "").split(os.pathsep) if r],
+)
+
+# Frame sequences per directory, re-listed only when the directory mtime changes (see sequences.py)
+seq_cache = SequenceCache(max_dirs=int(os.environ.get("DC_SEQUENCE_CACHE_DIRS", 2048)), stat=fs_stats.stat)
+
+# Nuke templates per project, indexed once and reloaded when the folder changes (see templatelib.py)
+nuke_templates = TemplateLibrary(max_inline=int(os.environ.get("DC_TEMPLATE_INLINE_KB", 4096)) * 1024, stat=fs_stats.stat)
+
+# Thumbnails: small poster frames cached on local disk (see thumbnails.py)
+THUMB_CACHE_DIR = os.environ.get("DC_THUMB_CACHE_DIR") or str(BASE_DIR / "data" / "thumbs")
+THUMB_MAX_AGE = int(os.environ.get("DC_THUMB_MAX_AGE", 7 * 24 * 3600))
+thumbs = ThumbnailCache(
+    THUMB_CACHE_DIR,
+    max_bytes=int(os.environ.get("DC_THUMB_CACHE_MB", 512)) * 1024 * 1024,
+    width=int(os.environ.get("DC_THUMB_WIDTH", 320)),
+    fmt=os.environ.get("DC_THUMB_FORMAT", "jpg"),
+    fs=fs_stats,
+    sequences=seq_cache,
+)
+
+# Review proxies: H.264/WebM for movies, JPEG frames for EXR, transcoded in the background (see proxies.py)
+proxies = ProxyCache(
+    os.environ.get("DC_PROXY_CACHE_DIR") or str(BASE_DIR / "data" / "proxies"),
+    max_bytes=int(os.environ.get("DC_PROXY_CACHE_GB", 20)) * 1024 ** 3,
+    fmt=os.environ.get("DC_PROXY_FORMAT", "mp4"),
+    height=int(os.environ.get("DC_PROXY_HEIGHT", 540)),
+    video_bitrate=os.environ.get("DC_PROXY_BITRATE", "2M"),
+    workers=int(os.environ.get("DC_PROXY_WORKERS", 1)),
+    fs=fs_stats,
+)
+
+# Media admission: per-storage-root transfer slots with a short bounded queue, so a slow
+# NAS sheds media requests (503 + Retry-After) instead of starving the API (see admission.py)
+media_gate = AdmissionController(
+    per_root=int(os.environ.get("DC_MEDIA_PER_ROOT", 6)),
+    queue=int(os.environ.get("DC_MEDIA_QUEUE", 12)),
+    wait=float(os.environ.get("DC_MEDIA_QUEUE_WAIT", 5)),
+    max_inflight=int(os.environ.get("DC_MEDIA_MAX_INFLIGHT", 32)),
+)
+
+# -------------------------
+# LOGGING
+# -------------------------
+# All records go through a queue to a listener thread that owns the real handlers (see
+# logsetup.py), so a slow log disk never blocks a request. Each line carries the request
+# id (the caller's X-Request-ID, else a new one; echoed on the response) and the route.
+# DC_LOG_SAMPLE keeps INFO lines for only a fraction of requests on busy media routes.
+LOG_LEVEL = os.environ.get("DC_LOG_LEVEL", "INFO").upper()
+LOG_FILE = os.environ.get("DC_LOG_FILE") or None
+LOG_FORMAT = os.environ.get("DC_LOG_FORMAT", "json").lower()  # json or text
+LOG_SAMPLE = parse_sample_rates(os.environ.get("DC_LOG_SAMPLE", "/api/shot_media=0.1,/api/stream_file=0.1"))
+_REQUEST_ID_RE = re.compile(r"^[A-Za-z0-9._:-]{1,64}$")
+_log_local = threading.local()  # request_id for log lines outside a request (e.g. "job-12")
+
+
+def request_id():
+    """Id of the current request: a sane incoming X-Request-ID, else a new random one."""
+    rid = request.environ.get("dc.request_id")
+    if rid is None:
+        rid = request.headers.get("X-Request-ID", "")
+        if not _REQUEST_ID_RE.match(rid):
+            rid = uuid.uuid4().hex[:16]
+        request.environ["dc.request_id"] = rid
+    return rid
+
+
+def _log_context():
+    if has_request_context():
+        return request_id(), _metrics_route()
+    return getattr(_log_local, "request_id", None), None
+
+
+def _log_handlers():
+    if LOG_FORMAT == "text":
+        formatter = logging.Formatter("%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s")
+    else:
+        formatter = JsonFormatter()
+    handlers = [logging.StreamHandler(sys.stderr)]
+    if LOG_FILE:
+        from logging.handlers import WatchedFileHandler  # reopens the file after logrotate moves it
+        handlers.append(WatchedFileHandler(LOG_FILE))
+    for h in handlers:
+        h.setFormatter(formatter)
+    return handlers
+
+
+log_queue = QueuedLogging(_log_handlers(), context=_log_context, sample_rates=LOG_SAMPLE,
+                          queue_size=int(os.environ.get("DC_LOG_QUEUE", 10000)))
+app.logger.removeHandler(default_handler)
+log_queue.install(logging.getLogger(), LOG_LEVEL)
+atexit.register(log_queue.stop)
+
+
+@app.after_request
+def _request_id_header(resp):
+    resp.headers.setdefault("X-Request-ID", request_id())
+    return resp
+
+
+# -------------------------
+# REQUEST METRICS
+# -------------------------
+# Per-route latency histograms, status counts, response bytes and SQL count/time,
+# exposed on /_metrics (Prometheus) and as a Server-Timing header (see metrics.py).
+METRICS_ENABLED = os.environ.get("DC_METRICS", "1").lower() not in ("0", "false", "no")
+METRICS_TOKEN = os.environ.get("DC_METRICS_TOKEN") or None  # require "Authorization: Bearer <token>" on /_metrics
+SERVER_TIMING = os.environ.get("DC_SERVER_TIMING", "1").lower() not in ("0", "false", "no")
+metrics = Metrics()
+
+# SQL profiler (see sqlprofile.py): with DC_SQL_PROFILE=1 every request logs statements slower
+# than DC_SLOW_QUERY_MS and statement shapes repeated more than DC_N_PLUS_ONE times. Admins
+# can add ?_profile=1 to any JSON route to get the full per-request query report back.
+sql_profiler = SqlProfiler(
+    enabled=os.environ.get("DC_SQL_PROFILE", "0").lower() in ("1", "true", "yes"),
+    slow_ms=float(os.environ.get("DC_SLOW_QUERY_MS", 200)),
+    n_plus_one=int(os.environ.get("DC_N_PLUS_ONE", 10)),
+)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _sql_started(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _sql_finished(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get("query_started")
+    if started:
+        elapsed = time.perf_counter() - started.pop()
+        metrics.add_query(elapsed)
+        sql_profiler.record(statement, parameters, elapsed)
+
+
+def _metrics_route():
+    return request.url_rule.rule if request.url_rule is not None else "(unmatched)"
+
+
+@app.before_request
+def _metrics_begin():
+    # batch sub-requests are counted as part of their /api/batch request
+    if METRICS_ENABLED and not request.environ.get("dc.batch"):
+        request.environ["dc.metrics"] = metrics.begin()
+
+
+@app.before_request
+def _profile_begin():
+    if request.environ.get("dc.batch"):
+        return
+    detailed = False
+    if request.args.get("_profile") == "1":
+        uid = session.get("user_id")
+        user = db.session.get(User, uid) if uid else None
+        detailed = bool(user and user.role == "admin")
+    profile = sql_profiler.begin(_metrics_route(), detailed=detailed)
+    if profile is not None:
+        request.environ["dc.sql_profile"] = profile
+
+
+@app.after_request
+def _profile_end(resp):
+    profile = request.environ.get("dc.sql_profile")
+    if profile is None or sql_profiler.current() is not profile:
+        return resp
+    sql_profiler.end()
+    if profile.detailed:
+        report = sql_profiler.report(profile)
+        if resp.is_json and not resp.direct_passthrough:
+            resp.set_data(json.dumps({"response": resp.get_json(), "_profile": report}))
+        else:
+            app.logger.info("SQL profile for %s", request.path, extra={"sql_profile": report})
+    return resp
+
+
+@app.after_request
+def _metrics_end(resp):
+    stats = request.environ.get("dc.metrics")
+    if stats is None or metrics.current() is not stats:
+        return resp
+    if SERVER_TIMING:
+        resp.headers["Server-Timing"] = server_timing(stats)
+    metrics.end(_metrics_route(), request.method, resp.status_code, resp.content_length)
+    return resp
+
+
+@app.teardown_request
+def _metrics_abort(exc):
+    # after_request is skipped when a view raises: still count the request
+    # (batch sub-requests have no stats of their own and are ignored)
+    stats = request.environ.get("dc.metrics")
+    if stats is not None and metrics.current() is stats:
+        metrics.end(_metrics_route(), request.method, 500, 0)
+    profile = request.environ.get("dc.sql_profile")
+    if profile is not None and sql_profiler.current() is profile:
+        sql_profiler.end()
+
 # -------------------------
 # MODELS
 # -------------------------
@@ -110,7 +344,12 @@ class Shot(db.Model):
     project_id = db.Column(db.Integer, db.ForeignKey("project.id"), nullable=False)
 
     code = db.Column(db.String(200), nullable=False)
-    __table_args__ = (db.UniqueConstraint('project_id', 'code', name='uk_shot_project_code'),)
+    __table_args__ = (
+        db.UniqueConstraint('project_id', 'code', name='uk_shot_project_code'),
+        db.Index('ix_shot_project_reel_folder', 'project_id', 'reel_folder'),
+        db.Index('ix_shot_project_sequence', 'project_id', 'sequence'),
+        db.Index('ix_shot_project_version_num', 'project_id', 'version_num'),
+    )
     reel = db.Column(db.String(100), nullable=True)
     description = db.Column(db.String(500), nullable=True)
     assigned_to = db.Column(db.String(500), nullable=True)
@@ -124,16 +363,21 @@ class Shot(db.Model):
     version = db.Column(db.String(40), nullable=True)
     nuke_path = db.Column(db.String(800), nullable=True)
 
+    # Derived from code/reel/version at write time (see shot_codes.py); never parsed on read
+    version_label = db.Column(db.String(40), nullable=True)
+    version_num = db.Column(db.Integer, nullable=True)
+    sequence = db.Column(db.String(100), nullable=True)
+    reel_name = db.Column(db.String(100), nullable=True)
+    reel_folder = db.Column(db.String(100), nullable=True)
+
+    def apply_code_fields(self):
+        """Recompute the derived columns from code, reel and version."""
+        for k, v in derive_fields(self.code, self.reel, self.version).items():
+            setattr(self, k, v)
+
     def extract_version(self):
-        """Extract version from shot code like V001, v01, etc."""
-        if not self.code:
-            return self.version or ""
-        import re
-        # Match pattern like V001, v01, V1, etc.
-        match = re.search(r'[Vv](\d+)', self.code)
-        if match:
-            return f"V{match.group(1)}"
-        return self.version or ""
+        """Version like V001, taken from the code when it has one (precomputed on write)."""
+        return self.version_label or self.version or ""
 
     def to_dict(self):
         return {
@@ -149,11 +393,17 @@ class Shot(db.Model):
             "plate_path": self.plate_path or "",
             "mov_path": self.mov_path or "",
             "exr_path": self.exr_path or "",
-            "version": self.extract_version() or "",
+            "version": self.extract_version(),
             "nuke_path": self.nuke_path or "",
         }
 
 
+@event.listens_for(Shot, "before_insert")
+@event.listens_for(Shot, "before_update")
+def _shot_code_fields(mapper, connection, target):
+    target.apply_code_fields()
+
+
 class Comment(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     shot_id = db.Column(db.Integer, db.ForeignKey("shot.id"), nullable=False)
@@ -161,11 +411,234 @@ class Comment(db.Model):
     author_role = db.Column(db.String(80), nullable=True)
     text = db.Column(db.Text, nullable=False)
     created_at = db.Column(db.String(40), nullable=False)
+    # (shot_id, id) serves per-shot keyset pagination and the latest-comment aggregate
+    __table_args__ = (db.Index("ix_comment_shot_id_id", "shot_id", "id"),)
 
     def to_dict(self):
         return {"id": self.id, "shot_id": self.shot_id, "author": self.author, "author_role": self.author_role, "text": self.text, "created_at": self.created_at}
 
 
+class ShotHistory(db.Model):
+    """One change event for a shot. No FK on shot_id so history survives shot deletion."""
+    id = db.Column(db.Integer, primary_key=True)
+    shot_id = db.Column(db.Integer, nullable=False)
+    project_id = db.Column(db.Integer, nullable=False)
+    shot_code = db.Column(db.String(200), nullable=True)
+    action = db.Column(db.String(30), nullable=False)  # create, update, import, delete
+    field = db.Column(db.String(60), nullable=True)
+    old_value = db.Column(db.Text, nullable=True)
+    new_value = db.Column(db.Text, nullable=True)
+    changed_by = db.Column(db.String(120), nullable=True)
+    changed_at = db.Column(db.String(40), nullable=False)
+    __table_args__ = (
+        db.Index("ix_shot_history_shot", "shot_id", "id"),
+        db.Index("ix_shot_history_project", "project_id", "id"),
+    )
+
+    def to_dict(self):
+        return {"id": self.id, "shot_id": self.shot_id, "project_id": self.project_id, "shot_code": self.shot_code, "action": self.action, "field": self.field, "old_value": self.old_value, "new_value": self.new_value, "changed_by": self.changed_by, "changed_at": self.changed_at}
+
+
+class ShotMedia(db.Model):
+    """Media found on disk for a shot by the background indexer (media_index.py)."""
+    id = db.Column(db.Integer, primary_key=True)
+    project_id = db.Column(db.Integer, nullable=False)
+    shot_id = db.Column(db.Integer, nullable=False)
+    kind = db.Column(db.String(20), nullable=False)  # plate, render, comp
+    path = db.Column(db.String(800), nullable=False)
+    parent_dir = db.Column(db.String(800), nullable=False)
+    is_dir = db.Column(db.Boolean, default=False)
+    size = db.Column(db.BigInteger, nullable=True)
+    mtime = db.Column(db.Float, nullable=True)
+    __table_args__ = (db.Index("ix_shot_media_project_shot", "project_id", "shot_id"),)
+
+    def to_dict(self):
+        return {"id": self.id, "shot_id": self.shot_id, "kind": self.kind, "path": self.path, "is_dir": bool(self.is_dir), "size": self.size, "mtime": self.mtime}
+
+
+class ShotVersion(db.Model):
+    """Registry of published comp/render versions per shot; versions are allocated here, not by listing dirs."""
+    id = db.Column(db.Integer, primary_key=True)
+    project_id = db.Column(db.Integer, nullable=False)
+    shot_id = db.Column(db.Integer, nullable=False)
+    kind = db.Column(db.String(20), nullable=False)  # comp, render
+    version = db.Column(db.Integer, nullable=False)
+    path = db.Column(db.String(800), nullable=True)
+    source = db.Column(db.String(20), nullable=True)  # generate_comp, start_shot, reconcile
+    created_by = db.Column(db.String(120), nullable=True)
+    created_at = db.Column(db.String(40), nullable=False)
+    __table_args__ = (
+        db.UniqueConstraint("shot_id", "kind", "version", name="uq_shot_version"),
+        db.Index("ix_shot_version_project", "project_id", "kind"),
+    )
+
+    def to_dict(self):
+        return {"id": self.id, "shot_id": self.shot_id, "kind": self.kind, "version": self.version, "label": f"v{self.version:03d}", "path": self.path, "source": self.source, "created_by": self.created_by, "created_at": self.created_at}
+
+
+class Delivery(db.Model):
+    """One shot's part of a send_to_client batch: its Client/<label> folder and a manifest of every delivered file."""
+    id = db.Column(db.Integer, primary_key=True)
+    project_id = db.Column(db.Integer, nullable=False)
+    shot_id = db.Column(db.Integer, nullable=False)
+    job_id = db.Column(db.Integer, nullable=True, unique=True)  # a retried job reuses its delivery
+    label = db.Column(db.String(20), nullable=False)  # YYYYMMDD + A, B, C...
+    folder = db.Column(db.String(800), nullable=False)
+    mode = db.Column(db.String(20), nullable=False, default="link")  # link: complete folder, changed: changed files only
+    status = db.Column(db.String(20), nullable=False, default="running")  # running, done, failed
+    files = db.Column(db.Integer, nullable=True)
+    bytes_copied = db.Column(db.BigInteger, nullable=True)
+    bytes_linked = db.Column(db.BigInteger, nullable=True)
+    manifest = db.Column(db.Text, nullable=True)  # JSON {relpath: {src, path, size, mtime, hash, action}}
+    created_by = db.Column(db.String(120), nullable=True)
+    created_at = db.Column(db.String(40), nullable=False)
+    finished_at = db.Column(db.String(40), nullable=True)
+    __table_args__ = (
+        db.UniqueConstraint("project_id", "label", "shot_id", name="uq_delivery_label"),
+        db.Index("ix_delivery_shot", "shot_id", "id"),
+    )
+
+    def to_dict(self, manifest=False):
+        d = {"id": self.id, "project_id": self.project_id, "shot_id": self.shot_id, "job_id": self.job_id, "label": self.label, "folder": self.folder, "mode": self.mode, "status": self.status, "files": self.files, "bytes_copied": self.bytes_copied, "bytes_linked": self.bytes_linked, "created_by": self.created_by, "created_at": self.created_at, "finished_at": self.finished_at}
+        if manifest:
+            d["manifest"] = json.loads(self.manifest or "{}")
+        return d
+
+
+class MediaScanDir(db.Model):
+    """Directory mtimes from the last media scan, used to skip unchanged directories."""
+    id = db.Column(db.Integer, primary_key=True)
+    project_id = db.Column(db.Integer, nullable=False, index=True)
+    path = db.Column(db.String(800), nullable=False)
+    parent = db.Column(db.String(800), nullable=True)
+    mtime = db.Column(db.Float, nullable=True)
+    shot_id = db.Column(db.Integer, nullable=True)
+
+
+class MediaScan(db.Model):
+    """Per-project media scan state."""
+    project_id = db.Column(db.Integer, primary_key=True)
+    codes_hash = db.Column(db.String(40), nullable=True)
+    last_scan_at = db.Column(db.String(40), nullable=True)
+    duration_ms = db.Column(db.Integer, nullable=True)
+    dirs = db.Column(db.Integer, nullable=True)
+    rescanned = db.Column(db.Integer, nullable=True)
+    items = db.Column(db.Integer, nullable=True)
+
+    def to_dict(self):
+        return {"project_id": self.project_id, "last_scan_at": self.last_scan_at, "duration_ms": self.duration_ms, "dirs": self.dirs, "rescanned": self.rescanned, "items": self.items}
+
+
+class Job(db.Model):
+    """Queued filesystem work (deliveries, folder/comp creation) run by the job workers."""
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(40), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default="queued")  # queued, running, done, failed
+    root = db.Column(db.String(300), nullable=False, default="")  # storage root, for per-root limits
+    project_id = db.Column(db.Integer, nullable=True)
+    shot_id = db.Column(db.Integer, nullable=True)
+    params = db.Column(db.Text, nullable=True)  # JSON
+    result = db.Column(db.Text, nullable=True)  # JSON
+    error = db.Column(db.Text, nullable=True)
+    progress = db.Column(db.Float, default=0.0)
+    message = db.Column(db.String(300), nullable=True)
+    attempts = db.Column(db.Integer, default=0)
+    max_attempts = db.Column(db.Integer, default=3)
+    run_after = db.Column(db.Float, default=0.0)  # epoch seconds; retry backoff
+    heartbeat_at = db.Column(db.Float, nullable=True)
+    worker = db.Column(db.String(120), nullable=True)
+    created_by = db.Column(db.String(120), nullable=True)
+    created_at = db.Column(db.String(40), nullable=False)
+    started_at = db.Column(db.String(40), nullable=True)
+    finished_at = db.Column(db.String(40), nullable=True)
+    __table_args__ = (
+        db.Index("ix_job_status_run_after", "status", "run_after"),
+        db.Index("ix_job_shot", "shot_id", "id"),
+    )
+
+    def to_dict(self):
+        return {
+            "id": self.id, "kind": self.kind, "status": self.status, "root": self.root,
+            "project_id": self.project_id, "shot_id": self.shot_id,
+            "params": json.loads(self.params) if self.params else {},
+            "result": json.loads(self.result) if self.result else None,
+            "error": self.error, "progress": self.progress, "message": self.message,
+            "attempts": self.attempts, "max_attempts": self.max_attempts,
+            "created_by": self.created_by, "created_at": self.created_at,
+            "started_at": self.started_at, "finished_at": self.finished_at,
+        }
+
+
+class JobRootLock(db.Model):
+    """One row per storage root; claim_job locks it so the running count it checks can't change underneath."""
+    root = db.Column(db.String(300), primary_key=True)
+
+
+class PathCheck(db.Model):
+    """Result of the last validate_paths run for one stored media path of a shot."""
+    id = db.Column(db.Integer, primary_key=True)
+    project_id = db.Column(db.Integer, nullable=False)
+    shot_id = db.Column(db.Integer, nullable=False)
+    field = db.Column(db.String(20), nullable=False)  # plate_path, mov_path, exr_path
+    path = db.Column(db.String(800), nullable=False)
+    status = db.Column(db.String(20), nullable=False)  # ok, missing, timeout, error
+    is_dir = db.Column(db.Boolean, default=False)
+    size = db.Column(db.BigInteger, nullable=True)
+    mtime = db.Column(db.Float, nullable=True)
+    is_sequence = db.Column(db.Boolean, default=False)
+    frames = db.Column(db.Integer, nullable=True)
+    error = db.Column(db.String(300), nullable=True)
+    checked_at = db.Column(db.String(40), nullable=False)
+    __table_args__ = (
+        db.UniqueConstraint("shot_id", "field", name="uq_path_check_shot_field"),
+        db.Index("ix_path_check_project_status", "project_id", "status"),
+    )
+
+    def to_dict(self):
+        return {"shot_id": self.shot_id, "field": self.field, "path": self.path, "status": self.status, "is_dir": bool(self.is_dir), "size": self.size, "mtime": self.mtime, "is_sequence": bool(self.is_sequence), "frames": self.frames, "error": self.error, "checked_at": self.checked_at}
+
+
+class UsageDir(db.Model):
+    """Per-directory file counts/sizes from the last disk-usage scan (diskusage.py)."""
+    id = db.Column(db.Integer, primary_key=True)
+    project_id = db.Column(db.Integer, nullable=False, index=True)
+    path = db.Column(db.String(800), nullable=False)
+    parent = db.Column(db.String(800), nullable=True)
+    mtime = db.Column(db.Float, nullable=True)
+    shot_id = db.Column(db.Integer, nullable=True)
+    files = db.Column(db.Integer, default=0)  # directly in this directory
+    bytes = db.Column(db.BigInteger, default=0)
+    tree_files = db.Column(db.Integer, default=0)  # including subdirectories
+    tree_bytes = db.Column(db.BigInteger, default=0)
+    matched = db.Column(db.Text, nullable=True)  # JSON {shot_id: [bytes, files]} for files matched by name
+
+
+class UsageRollup(db.Model):
+    """Disk usage totals from the last scan per project, area, reel, client delivery and shot."""
+    id = db.Column(db.Integer, primary_key=True)
+    project_id = db.Column(db.Integer, nullable=False)
+    scope = db.Column(db.String(20), nullable=False)  # project, area, reel, client, shot
+    key = db.Column(db.String(300), nullable=False, default="")  # folder name, reel, date or shot id
+    files = db.Column(db.Integer, default=0)
+    bytes = db.Column(db.BigInteger, default=0)
+    __table_args__ = (db.Index("ix_usage_rollup_project_scope", "project_id", "scope"),)
+
+
+class UsageScan(db.Model):
+    """Per-project disk-usage scan state."""
+    project_id = db.Column(db.Integer, primary_key=True)
+    codes_hash = db.Column(db.String(40), nullable=True)
+    last_scan_at = db.Column(db.String(40), nullable=True)
+    duration_ms = db.Column(db.Integer, nullable=True)
+    dirs = db.Column(db.Integer, nullable=True)
+    rescanned = db.Column(db.Integer, nullable=True)
+    files = db.Column(db.Integer, nullable=True)
+    bytes = db.Column(db.BigInteger, nullable=True)
+
+    def to_dict(self):
+        return {"project_id": self.project_id, "last_scan_at": self.last_scan_at, "duration_ms": self.duration_ms, "dirs": self.dirs, "rescanned": self.rescanned, "files": self.files, "bytes": self.bytes}
+
+
 # -------------------------
 # SAFE DB INIT (call at startup)
 # -------------------------
@@ -177,6 +650,818 @@ def ensure_db():
         db.session.commit()
 
 
+# -------------------------
+# SHOT HISTORY (write-behind)
+# -------------------------
+# History events are buffered in memory and written in batches by a background
+# thread, so request handlers never pay for an extra commit. Events that cannot
+# be written are retried a few times and then dropped (and logged), and the
+# buffer is capped, so a database outage cannot grow it without bound.
+HISTORY_FLUSH_INTERVAL = float(os.environ.get("DC_HISTORY_FLUSH_INTERVAL", 2.0))
+HISTORY_FLUSH_SIZE = int(os.environ.get("DC_HISTORY_FLUSH_SIZE", 200))
+HISTORY_MAX_BUFFER = int(os.environ.get("DC_HISTORY_MAX_BUFFER", 50000))
+HISTORY_MAX_ATTEMPTS = int(os.environ.get("DC_HISTORY_MAX_ATTEMPTS", 5))
+
+_history_buffer = []
+_history_lock = threading.Lock()
+_history_wakeup = threading.Event()
+_history_thread = None
+_history_pid = None
+
+
+def history_event(shot, action, field=None, old=None, new=None, user=None):
+    """Build a ShotHistory mapping for `shot` (a Shot or a dict with id/project_id/code)."""
+    if isinstance(shot, dict):
+        shot_id, project_id, code = shot["id"], shot["project_id"], shot.get("code")
+    else:
+        shot_id, project_id, code = shot.id, shot.project_id, shot.code
+    return {
+        "shot_id": shot_id,
+        "project_id": project_id,
+        "shot_code": code,
+        "action": action,
+        "field": field,
+        "old_value": None if old is None else str(old),
+        "new_value": None if new is None else str(new),
+        "changed_by": user.username if user else None,
+        "changed_at": datetime.utcnow().isoformat(),
+    }
+
+
+def record_shot_history(events):
+    """Queue history events; they are persisted by the flusher thread."""
+    global _history_thread, _history_pid
+    if not events:
+        return
+    with _history_lock:
+        _history_buffer.extend(events)
+        _trim_history_buffer()
+        # (re)start the flusher lazily, once per worker process
+        if _history_thread is None or _history_pid != os.getpid() or not _history_thread.is_alive():
+            _history_pid = os.getpid()
+            _history_thread = threading.Thread(target=_history_flush_loop, name="shot-history-flusher", daemon=True)
+            _history_thread.start()
+        if len(_history_buffer) >= HISTORY_FLUSH_SIZE:
+            _history_wakeup.set()
+
+
+def _trim_history_buffer():
+    """Drop the oldest events beyond HISTORY_MAX_BUFFER. Call with _history_lock held."""
+    extra = len(_history_buffer) - HISTORY_MAX_BUFFER
+    if extra > 0:
+        del _history_buffer[:extra]
+        app.logger.error("Shot history buffer full, dropped the %d oldest events", extra)
+
+
+def _insert_history(batch):
+    """Insert `batch`; returns (written, failed events).
+
+    A batch the database rejects is split in halves, so one bad event
+    cannot hold back the rest. When the database itself is unreachable the
+    whole batch fails at once: splitting would not help.
+    """
+    try:
+        db.session.bulk_insert_mappings(ShotHistory, [{k: v for k, v in e.items() if k != "_attempts"} for e in batch])
+        db.session.commit()
+        return len(batch), []
+    except OperationalError as e:
+        db.session.rollback()
+        app.logger.error("Shot history flush failed for %d events: %s", len(batch), e)
+        return 0, batch
+    except Exception as e:
+        db.session.rollback()
+        if len(batch) == 1:
+            app.logger.error("Shot history event rejected (%s): %s", e, batch[0])
+            return 0, batch
+    mid = len(batch) // 2
+    written_a, failed_a = _insert_history(batch[:mid])
+    written_b, failed_b = _insert_history(batch[mid:])
+    return written_a + written_b, failed_a + failed_b
+
+
+def flush_shot_history():
+    """Write all buffered history events in one batch. Returns number written.
+
+    Events that fail are requeued until they have failed HISTORY_MAX_ATTEMPTS
+    flushes, then dropped.
+    """
+    global _history_buffer
+    with _history_lock:
+        batch, _history_buffer = _history_buffer, []
+    if not batch:
+        return 0
+    # separate app context -> separate session, independent of any request transaction
+    with app.app_context():
+        written, failed = _insert_history(batch)
+    retry = []
+    for e in failed:
+        e["_attempts"] = e.get("_attempts", 0) + 1
+        if e["_attempts"] < HISTORY_MAX_ATTEMPTS:
+            retry.append(e)
+    if len(failed) > len(retry):
+        app.logger.error("Dropped %d shot history events after %d failed flushes",
+                         len(failed) - len(retry), HISTORY_MAX_ATTEMPTS)
+    if retry:
+        with _history_lock:
+            _history_buffer[:0] = retry
+            _trim_history_buffer()
+    return written
+
+
+def _history_flush_loop():
+    while True:
+        _history_wakeup.wait(HISTORY_FLUSH_INTERVAL)
+        _history_wakeup.clear()
+        try:
+            flush_shot_history()
+        except Exception:
+            app.logger.exception("shot history flusher error")
+
+
+atexit.register(flush_shot_history)
+
+
+def _include_args():
+    """Parse ?include=a,b into a set of optional response extras."""
+    return {x.strip() for x in (request.args.get("include") or "").split(",") if x.strip()}
+
+
+def comment_summaries(project_id, shot_ids=None):
+    """Comment count and latest comment (timestamp, author) per shot in one aggregated query.
+
+    Returns {shot_id: {"comment_count": n, "last_comment_at": ..., "last_comment_author": ...}}.
+    """
+    agg = db.session.query(
+        Comment.shot_id.label("shot_id"),
+        func.count(Comment.id).label("n"),
+        func.max(Comment.id).label("last_id"),
+    ).join(Shot, Shot.id == Comment.shot_id).filter(Shot.project_id == project_id)
+    if shot_ids is not None:
+        agg = agg.filter(Comment.shot_id.in_(shot_ids))
+    agg = agg.group_by(Comment.shot_id).subquery()
+    rows = db.session.query(agg.c.shot_id, agg.c.n, Comment.created_at, Comment.author).join(Comment, Comment.id == agg.c.last_id).all()
+    return {r[0]: {"comment_count": r[1], "last_comment_at": r[2], "last_comment_author": r[3]} for r in rows}
+
+
+def media_summaries(project_id):
+    """Media availability and latest render/comp per shot from the media index (no NAS access)."""
+    out = {}
+    rows = db.session.query(ShotMedia.shot_id, ShotMedia.kind, ShotMedia.path, ShotMedia.mtime).filter(ShotMedia.project_id == project_id)
+    for shot_id, kind, path, mtime in rows:
+        m = out.setdefault(shot_id, {"plate": False, "render": False, "comp": False, "latest_render": None, "latest_render_mtime": None, "latest_comp": None, "latest_comp_mtime": None})
+        m[kind] = True
+        if kind in ("render", "comp"):
+            key = f"latest_{kind}"
+            if m[key + "_mtime"] is None or (mtime or 0) > m[key + "_mtime"]:
+                m[key], m[key + "_mtime"] = path, mtime
+    return out
+
+
+def shots_to_dicts(project_id, shots, include=()):
+    """Serialize shots, attaching optional extras requested via ?include=."""
+    out = [s.to_dict() for s in shots]
+    if "comments" in include:
+        summaries = comment_summaries(project_id)
+        empty = {"comment_count": 0, "last_comment_at": None, "last_comment_author": None}
+        for d in out:
+            d.update(summaries.get(d["id"], empty))
+    if "media" in include:
+        media = media_summaries(project_id)
+        for d in out:
+            d["media"] = media.get(d["id"])
+    if "versions" in include:
+        versions = latest_versions(project_id)
+        for d in out:
+            d["latest_versions"] = versions.get(d["id"], {})
+    if "paths" in include:
+        checks = path_statuses(project_id)
+        for d in out:
+            d["path_status"] = checks.get(d["id"], {})
+    return out
+
+
+def path_statuses(project_id):
+    """{shot_id: {field: status}} from the last validate_paths run, only for paths still stored on the shot."""
+    out = {}
+    rows = (db.session.query(PathCheck.shot_id, PathCheck.field, PathCheck.path, PathCheck.status)
+            .filter(PathCheck.project_id == project_id))
+    current = {}
+    for sid, plate, mov, exr in (db.session.query(Shot.id, Shot.plate_path, Shot.mov_path, Shot.exr_path)
+                                 .filter(Shot.project_id == project_id)):
+        current[sid] = {"plate_path": plate, "mov_path": mov, "exr_path": exr}
+    for sid, field, path, status in rows:
+        if current.get(sid, {}).get(field) == path:
+            out.setdefault(sid, {})[field] = status
+    return out
+
+
+# -------------------------
+# MEDIA INDEX
+# -------------------------
+MEDIA_SCAN_WORKERS = int(os.environ.get("DC_MEDIA_SCAN_WORKERS", 8))
+_media_scans_running = set()
+_media_scans_lock = threading.Lock()
+
+
+def run_media_scan(project_id):
+    """Incrementally scan one project's media folders into shot_media. Returns a summary dict.
+
+    Must run inside an app context. Only directories whose mtime changed are
+    re-listed; a change in the project's shot codes forces a full rescan.
+    """
+    proj = db.session.get(Project, project_id)
+    if not proj or not proj.folder_path:
+        return None
+    t0 = time.monotonic()
+    code_rows = db.session.query(Shot.id, Shot.code).filter_by(project_id=project_id).all()
+    codes = {c.lower(): i for i, c in code_rows if c}
+    codes_hash = hashlib.sha1("\n".join(f"{i}:{c}" for i, c in sorted(code_rows)).encode()).hexdigest()
+    state = db.session.get(MediaScan, project_id) or MediaScan(project_id=project_id)
+    full = state.codes_hash != codes_hash
+
+    dir_rows = MediaScanDir.query.filter_by(project_id=project_id).all()
+    known = {}
+    if not full:
+        children = defaultdict(list)
+        for r in dir_rows:
+            if r.parent:
+                children[r.parent].append(r.path)
+        known = {r.path: DirState(r.mtime, r.parent, children.get(r.path, []), r.shot_id) for r in dir_rows}
+    media_rows = ShotMedia.query.filter_by(project_id=project_id).all()
+    matched = [m.path for m in media_rows if m.is_dir and m.kind != "comp"]
+
+    result = MediaScanner(codes, known, matched, workers=MEDIA_SCAN_WORKERS).scan(proj.folder_path)
+
+    # replace media rows of re-listed or vanished dirs; refresh mtimes of matched dirs.
+    # A directory that could not be listed keeps its previous rows (and those below it).
+    failed = tuple(e["path"] for e in result.errors)
+
+    def unlisted(path):
+        return any(path == f or path.startswith(f + os.sep) for f in failed)
+
+    replace = result.rescanned | (set(r.path for r in dir_rows) - set(result.dirs))
+    stale_ids = []
+    for m in media_rows:
+        if (full or m.parent_dir in replace) and not unlisted(m.parent_dir):
+            stale_ids.append(m.id)
+        elif m.path in result.refreshed and m.mtime != result.refreshed[m.path]:
+            m.mtime = result.refreshed[m.path]
+    for chunk in _chunks(stale_ids, 1000):
+        ShotMedia.query.filter(ShotMedia.id.in_(chunk)).delete(synchronize_session=False)
+    db.session.bulk_insert_mappings(ShotMedia, [dict(project_id=project_id, **it._asdict()) for it in result.items])
+
+    existing = {r.path: r for r in dir_rows}
+    gone_ids = [r.id for p, r in existing.items() if p not in result.dirs and not unlisted(p)]
+    for chunk in _chunks(gone_ids, 1000):
+        MediaScanDir.query.filter(MediaScanDir.id.in_(chunk)).delete(synchronize_session=False)
+    new_dirs = []
+    for path, ds in result.dirs.items():
+        r = existing.get(path)
+        if r is None:
+            new_dirs.append({"project_id": project_id, "path": path, "parent": ds.parent, "mtime": ds.mtime, "shot_id": ds.shot_id})
+        elif (r.mtime, r.parent, r.shot_id) != (ds.mtime, ds.parent, ds.shot_id):
+            r.mtime, r.parent, r.shot_id = ds.mtime, ds.parent, ds.shot_id
+    db.session.bulk_insert_mappings(MediaScanDir, new_dirs)
+
+    if not (full and failed):
+        state.codes_hash = codes_hash  # else the next scan is a full one again, retrying the failed dirs
+    state.last_scan_at = datetime.utcnow().isoformat()
+    state.duration_ms = int((time.monotonic() - t0) * 1000)
+    state.dirs = len(result.dirs)
+    state.rescanned = len(result.rescanned)
+    state.items = len(media_rows) - len(stale_ids) + len(result.items)
+    db.session.add(state)
+    db.session.commit()
+    summary = state.to_dict()
+    summary.update(full=full, errors=result.errors[:50])
+    return summary
+
+
+def start_media_scan(project_id):
+    """Run run_media_scan in a background thread; False if one is already running for the project."""
+    with _media_scans_lock:
+        if project_id in _media_scans_running:
+            return False
+        _media_scans_running.add(project_id)
+
+    def _worker():
+        try:
+            with app.app_context():
+                run_media_scan(project_id)
+        except Exception:
+            app.logger.exception("media scan failed for project %s", project_id)
+        finally:
+            with _media_scans_lock:
+                _media_scans_running.discard(project_id)
+
+    threading.Thread(target=_worker, name=f"media-scan-{project_id}", daemon=True).start()
+    return True
+
+
+# -------------------------
+# BACKGROUND JOBS
+# -------------------------
+# Slow NAS work is queued in the job table and run by worker threads, either
+# inside each web process (DC_JOB_WORKERS) or in job_worker.py. Workers in any
+# process claim jobs with a conditional UPDATE, so one queue serves them all.
+JOB_WORKERS = int(os.environ.get("DC_JOB_WORKERS", 2))
+JOB_ROOT_CONCURRENCY = int(os.environ.get("DC_JOB_ROOT_CONCURRENCY", 2))
+JOB_MAX_ATTEMPTS = int(os.environ.get("DC_JOB_MAX_ATTEMPTS", 3))
+JOB_RETRY_DELAY = float(os.environ.get("DC_JOB_RETRY_DELAY", 10))
+JOB_POLL_INTERVAL = float(os.environ.get("DC_JOB_POLL_INTERVAL", 2))
+JOB_STALE_SECONDS = float(os.environ.get("DC_JOB_STALE_SECONDS", 300))
+JOB_HEARTBEAT_INTERVAL = float(os.environ.get("DC_JOB_HEARTBEAT", 30))  # keep well below DC_JOB_STALE_SECONDS
+JOB_ROOTS = [os.path.normpath(r) for r in [PROJECT_ROOT] + os.environ.get("DC_JOB_ROOTS", "").split(os.pathsep) if r]
+
+JOB_HANDLERS = {}
+JOB_FAILURE_HANDLERS = {}
+_job_wakeup = threading.Event()
+_job_threads = []
+_job_pid = None
+_job_threads_lock = threading.Lock()
+
+
+class JobError(Exception):
+    """Permanent job failure (bad input, missing template): reported without retrying."""
+
+
+def job_handler(kind, on_failure=None):
+    """Register fn(job, params, progress) -> result dict as the runner for `kind` jobs.
+
+    on_failure(job_id) runs once a job of this kind has failed for good (no
+    attempts left), to clean up state the handler had recorded.
+    """
+    def deco(fn):
+        JOB_HANDLERS[kind] = fn
+        if on_failure:
+            JOB_FAILURE_HANDLERS[kind] = on_failure
+        return fn
+    return deco
+
+
+def _job_failed(job_id, kind):
+    fn = JOB_FAILURE_HANDLERS.get(kind)
+    if fn is None:
+        return
+    try:
+        fn(job_id)
+    except Exception:
+        db.session.rollback()
+        app.logger.exception("failure handler of job %s (%s) failed", job_id, kind)
+
+
+def storage_root(path):
+    """Storage root of `path` for concurrency limits: a DC_JOB_ROOTS entry, a UNC share, or the top two dirs."""
+    if not path:
+        return ""
+    p = os.path.normpath(path)
+    for r in JOB_ROOTS:
+        if p == r or p.startswith(r.rstrip("\\/") + os.sep):
+            return r
+    parts = [x for x in re.split(r"[\\/]+", p) if x]
+    if p.startswith("\\\\") or p.startswith("//"):
+        return "//" + "/".join(parts[:2])
+    return "/" + "/".join(parts[:2])
+
+
+def enqueue_job(kind, params=None, project=None, shot=None, root=None, max_attempts=None):
+    """Queue a job and wake the local workers. Returns the committed Job."""
+    user = None
+    if has_request_context():
+        uid = session.get("user_id")
+        user = db.session.get(User, uid) if uid else None
+    if root is None:
+        root = storage_root(project.folder_path if project else None)
+    job = Job(
+        kind=kind,
+        root=root,
+        project_id=project.id if project else (shot.project_id if shot else None),
+        shot_id=shot.id if shot else None,
+        params=json.dumps(params or {}),
+        max_attempts=max_attempts or JOB_MAX_ATTEMPTS,
+        created_by=user.username if user else None,
+        created_at=datetime.utcnow().isoformat(),
+    )
+    db.session.add(job)
+    db.session.commit()
+    app.logger.info("queued job %s (%s), logs as job-%s", job.id, kind, job.id)
+    start_job_workers()
+    _job_wakeup.set()
+    return job
+
+
+def job_accepted(job):
+    """Standard 202 response for a route that queued `job`; poll /api/jobs/<id> for the result."""
+    return jsonify({"job_id": job.id, "job": job.to_dict()}), 202
+
+
+def _update_job(job_id, **values):
+    # own connection/transaction: never commits whatever the handler has pending in db.session
+    with db.engine.begin() as conn:
+        conn.execute(Job.__table__.update().where(Job.__table__.c.id == job_id).values(**values))
+
+
+def _requeue_stale_jobs():
+    """Jobs whose worker stopped heartbeating (process killed) go back to the queue.
+
+    A job that has used all its attempts is failed instead, so a job that
+    keeps killing its worker is not requeued forever.
+    """
+    cutoff = time.time() - JOB_STALE_SECONDS
+    stale = Job.query.filter(Job.status == "running", Job.heartbeat_at < cutoff)
+    lost = stale.filter(Job.attempts >= Job.max_attempts).with_entities(Job.id, Job.kind).all()
+    if lost:
+        stale.filter(Job.id.in_([job_id for job_id, _ in lost])).update(
+            {"status": "failed", "worker": None, "error": "worker lost on final attempt",
+             "finished_at": datetime.utcnow().isoformat()}, synchronize_session=False)
+    n = stale.update({"status": "queued", "worker": None, "message": "requeued after worker loss"},
+                     synchronize_session=False)
+    db.session.commit()
+    for job_id, kind in lost:
+        _job_failed(job_id, kind)
+    return n
+
+
+def _lock_job_root(root):
+    """Row-lock the root's JobRootLock (creating it on first use) until the next commit/rollback."""
+    if db.session.get(JobRootLock, root) is None:
+        try:
+            db.session.add(JobRootLock(root=root))
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+    db.session.query(JobRootLock).filter(JobRootLock.root == root).with_for_update().one()
+
+
+def claim_job(worker_id):
+    """Atomically take the oldest runnable job whose storage root has a free slot, or None."""
+    now = time.time()
+    candidates = (db.session.query(Job.id, Job.root).filter(Job.status == "queued", Job.run_after <= now)
+                  .order_by(Job.id).limit(50).all())
+    if not candidates:
+        return None
+    db.session.commit()
+    full = set()
+    for job_id, root in candidates:
+        if root in full:
+            continue
+        # count and claim under the root's row lock, so concurrent workers can't both take the last slot
+        try:
+            _lock_job_root(root)
+            running = db.session.query(func.count(Job.id)).filter(Job.status == "running", Job.root == root).scalar()
+            if running >= JOB_ROOT_CONCURRENCY:
+                db.session.rollback()
+                full.add(root)
+                continue
+            claimed = Job.query.filter(Job.id == job_id, Job.status == "queued").update({
+                "status": "running", "worker": worker_id, "attempts": Job.attempts + 1,
+                "started_at": datetime.utcnow().isoformat(), "heartbeat_at": now, "error": None,
+            }, synchronize_session=False)
+            db.session.commit()
+        except Exception:
+            # SQLite has no row locks: a concurrent claim shows up as a busy/locked error instead
+            db.session.rollback()
+            continue
+        if claimed:
+            return db.session.get(Job, job_id)
+    return None
+
+
+def _heartbeat(engine, job_id, worker_id, stop):
+    """Keep a running job's heartbeat fresh until `stop` is set, however long its current step takes."""
+    table = Job.__table__
+    while not stop.wait(JOB_HEARTBEAT_INTERVAL):
+        try:
+            with engine.begin() as conn:
+                conn.execute(table.update().where(table.c.id == job_id, table.c.worker == worker_id,
+                                                  table.c.status == "running").values(heartbeat_at=time.time()))
+        except Exception:
+            app.logger.exception("heartbeat failed for job %s", job_id)
+
+
+def run_job(job):
+    """Run a claimed job through its handler and record the outcome."""
+    handler = JOB_HANDLERS.get(job.kind)
+    last = [0.0]
+
+    def progress(fraction, message=None):
+        now = time.time()
+        if now - last[0] < 1.0 and fraction < 1.0:
+            return
+        last[0] = now
+        _update_job(job.id, progress=round(min(max(fraction, 0.0), 1.0), 4), message=(message or "")[:300] or None, heartbeat_at=now)
+
+    _log_local.request_id = f"job-{job.id}"
+    stop = threading.Event()
+    threading.Thread(target=_heartbeat, args=(db.engine, job.id, job.worker, stop),
+                     name=f"job-heartbeat-{job.id}", daemon=True).start()
+    try:
+        if handler is None:
+            raise JobError(f"no handler for job kind {job.kind}")
+        result = handler(job, json.loads(job.params or "{}"), progress)
+    except Exception as e:
+        db.session.rollback()
+        retry = not isinstance(e, JobError) and job.attempts < job.max_attempts
+        if isinstance(e, JobError):
+            app.logger.warning("job %s (%s) failed: %s", job.id, job.kind, e)
+        else:
+            app.logger.exception("job %s (%s) failed on attempt %s", job.id, job.kind, job.attempts)
+        if retry:
+            _update_job(job.id, status="queued", error=str(e), worker=None,
+                        run_after=time.time() + JOB_RETRY_DELAY * 2 ** (job.attempts - 1))
+        else:
+            _update_job(job.id, status="failed", error=str(e), finished_at=datetime.utcnow().isoformat())
+            _job_failed(job.id, job.kind)
+        return False
+    finally:
+        stop.set()
+        _log_local.request_id = None
+    _update_job(job.id, status="done", progress=1.0, result=json.dumps(result or {}), error=None,
+                finished_at=datetime.utcnow().isoformat())
+    return True
+
+
+def run_next_job(worker_id):
+    """Claim and run one job. Must run inside an app context; False when nothing was runnable."""
+    _requeue_stale_jobs()
+    job = claim_job(worker_id)
+    if job is None:
+        return False
+    run_job(job)
+    return True
+
+
+def _job_worker_loop(worker_id):
+    while True:
+        ran = False
+        try:
+            with app.app_context():
+                ran = run_next_job(worker_id)
+        except Exception:
+            app.logger.exception("job worker error")
+        if not ran:
+            _job_wakeup.wait(JOB_POLL_INTERVAL)
+            _job_wakeup.clear()
+
+
+def start_job_workers(count=None, daemon=True):
+    """Start `count` (default DC_JOB_WORKERS) worker threads once per process. Returns the threads."""
+    global _job_pid, _job_threads
+    count = JOB_WORKERS if count is None else count
+    with _job_threads_lock:
+        if _job_pid != os.getpid():
+            _job_pid, _job_threads = os.getpid(), []
+        _job_threads = [t for t in _job_threads if t.is_alive()]
+        while len(_job_threads) < count:
+            worker_id = f"{platform.node()}:{os.getpid()}:{len(_job_threads)}"
+            t = threading.Thread(target=_job_worker_loop, args=(worker_id,), name=f"job-worker-{len(_job_threads)}", daemon=daemon)
+            t.start()
+            _job_threads.append(t)
+        return list(_job_threads)
+
+
+# -------------------------
+# DISK USAGE
+# -------------------------
+USAGE_SCAN_WORKERS = int(os.environ.get("DC_USAGE_SCAN_WORKERS", 16))
+
+
+def run_usage_scan(project_id, full=False):
+    """Incrementally size one project folder into usage_dir / usage_rollup. Returns a summary dict.
+
+    Must run inside an app context. Only directories whose mtime changed are
+    re-listed; `full` (or a change in the project's shot codes) lists everything.
+    """
+    proj = db.session.get(Project, project_id)
+    if not proj or not proj.folder_path:
+        return None
+    t0 = time.monotonic()
+    shot_rows = db.session.query(Shot.id, Shot.code, Shot.reel).filter_by(project_id=project_id).all()
+    codes = {c.lower(): i for i, c, _ in shot_rows if c}
+    codes_hash = hashlib.sha1("\n".join(f"{i}:{c}" for i, c, _ in sorted(shot_rows)).encode()).hexdigest()
+    state = db.session.get(UsageScan, project_id) or UsageScan(project_id=project_id)
+    full = full or state.codes_hash != codes_hash
+
+    dir_rows = UsageDir.query.filter_by(project_id=project_id).all()
+    children = defaultdict(list)
+    for r in dir_rows:
+        if r.parent:
+            children[r.parent].append(r.path)
+    previous = {r.path: DirUsage(r.mtime, r.parent, children.get(r.path, []), r.shot_id, r.files or 0, r.bytes or 0,
+                                 {int(k): v for k, v in json.loads(r.matched or "{}").items()})
+                for r in dir_rows}
+    # a full pass lists everything, but a directory it cannot list keeps its previous totals
+    result = UsageScanner(codes, {} if full else previous, workers=USAGE_SCAN_WORKERS,
+                          fallback=previous).scan(proj.folder_path)
+    tree, groups = rollups(proj.folder_path, result.dirs)
+    reels = {i: reel for i, _, reel in shot_rows}
+    for (scope, sid), (b, f) in list(groups.items()):
+        if scope == "shot" and reels.get(sid):
+            g = groups.setdefault(("reel", reels[sid]), [0, 0])
+            g[0] += b
+            g[1] += f
+
+    failed = tuple(e["path"] for e in result.errors)
+
+    def unlisted(path):
+        return any(path == f or path.startswith(f + os.sep) for f in failed)
+
+    existing = {r.path: r for r in dir_rows}
+    gone_ids = [r.id for p, r in existing.items() if p not in result.dirs and not unlisted(p)]
+    for chunk in _chunks(gone_ids, 1000):
+        UsageDir.query.filter(UsageDir.id.in_(chunk)).delete(synchronize_session=False)
+    new_dirs = []
+    for path, du in result.dirs.items():
+        values = dict(parent=du.parent, mtime=du.mtime, shot_id=du.shot_id, files=du.files, bytes=du.bytes,
+                      tree_bytes=tree[path][0], tree_files=tree[path][1],
+                      matched=json.dumps(du.matched) if du.matched else None)
+        r = existing.get(path)
+        if r is None:
+            new_dirs.append(dict(project_id=project_id, path=path, **values))
+            continue
+        # unchanged directories keep their row; ancestors of changed ones get new tree totals
+        for k, v in values.items():
+            if getattr(r, k) != v:
+                setattr(r, k, v)
+    db.session.bulk_insert_mappings(UsageDir, new_dirs)
+    UsageRollup.query.filter_by(project_id=project_id).delete(synchronize_session=False)
+    db.session.bulk_insert_mappings(UsageRollup, [
+        {"project_id": project_id, "scope": scope, "key": str(key), "bytes": b, "files": f}
+        for (scope, key), (b, f) in groups.items()
+    ])
+
+    total = groups.get(("project", ""), [0, 0])
+    if not (full and failed):
+        state.codes_hash = codes_hash  # else the next pass is a full one again, retrying the failed dirs
+    state.last_scan_at = datetime.utcnow().isoformat()
+    state.duration_ms = int((time.monotonic() - t0) * 1000)
+    state.dirs = len(result.dirs)
+    state.rescanned = len(result.rescanned)
+    state.bytes, state.files = total[0], total[1]
+    db.session.add(state)
+    db.session.commit()
+    summary = state.to_dict()
+    summary.update(full=full, errors=result.errors[:50])
+    return summary
+
+
+@job_handler("disk_usage")
+def _job_disk_usage(job, params, progress):
+    progress(0.0, "sizing project folder")
+    summary = run_usage_scan(job.project_id, full=bool(params.get("full")))
+    if summary is None:
+        raise JobError("project folder_path not configured")
+    return summary
+
+
+# -------------------------
+# PATH VALIDATION
+# -------------------------
+PATH_FIELDS = ("plate_path", "mov_path", "exr_path")
+PATH_CHECK_WORKERS = int(os.environ.get("DC_PATH_CHECK_WORKERS", 16))
+PATH_CHECK_TIMEOUT = float(os.environ.get("DC_PATH_CHECK_TIMEOUT", 10))
+PATH_CHECK_BUDGET = float(os.environ.get("DC_PATH_CHECK_BUDGET", 900))
+SEQUENCE_EXTS = (".exr", ".dpx", ".tif", ".tiff", ".png", ".jpg")
+
+
+@job_handler("validate_paths")
+def _job_validate_paths(job, params, progress):
+    rows = (db.session.query(Shot.id, Shot.plate_path, Shot.mov_path, Shot.exr_path)
+            .filter(Shot.project_id == job.project_id).all())
+    targets = [(sid, field, path) for sid, *paths in rows for field, path in zip(PATH_FIELDS, paths) if path]
+    results = check_paths([t[2] for t in targets], workers=PATH_CHECK_WORKERS, timeout=PATH_CHECK_TIMEOUT,
+                          budget=PATH_CHECK_BUDGET, seq_exts=SEQUENCE_EXTS,
+                          progress=lambda done, total: progress(done / total, f"{done}/{total} folders listed"))
+    now = datetime.utcnow().isoformat()
+    PathCheck.query.filter_by(project_id=job.project_id).delete(synchronize_session=False)
+    mappings = []
+    for sid, field, path in targets:
+        r = dict(results[path])
+        r["error"] = r["error"][:300] if r["error"] else None
+        mappings.append(dict(r, project_id=job.project_id, shot_id=sid, field=field, path=path, checked_at=now))
+    db.session.bulk_insert_mappings(PathCheck, mappings)
+    db.session.commit()
+    counts = defaultdict(int)
+    for r in results.values():
+        counts[r["status"]] += 1
+    return {"paths": len(targets), "distinct": len(results), "statuses": dict(counts),
+            "folders": len({os.path.dirname(os.path.normpath(p)) for p in results})}
+
+
+# -------------------------
+# VERSION REGISTRY
+# -------------------------
+VERSION_KINDS = ("comp", "render")
+_COMP_VERSION_RE = re.compile(r"_comp_v(\d+)\.nk$", re.IGNORECASE)
+_VERSION_RE = re.compile(r"_v(\d+)", re.IGNORECASE)
+
+
+def latest_version(shot_id, kind="comp"):
+    """Newest registered ShotVersion of `kind` for a shot, or None (one indexed lookup)."""
+    return (ShotVersion.query.filter_by(shot_id=shot_id, kind=kind)
+            .order_by(ShotVersion.version.desc()).first())
+
+
+def latest_versions(project_id):
+    """{shot_id: {kind: highest version}} for a project in one grouped query."""
+    out = {}
+    rows = (db.session.query(ShotVersion.shot_id, ShotVersion.kind, func.max(ShotVersion.version))
+            .filter(ShotVersion.project_id == project_id).group_by(ShotVersion.shot_id, ShotVersion.kind))
+    for shot_id, kind, v in rows:
+        out.setdefault(shot_id, {})[kind] = v
+    return out
+
+
+def register_version(shot, kind, version, path=None, source=None, user=None):
+    """Record an existing version (e.g. found on disk); returns False if it is already registered."""
+    row = ShotVersion(project_id=shot.project_id, shot_id=shot.id, kind=kind, version=version, path=path,
+                      source=source, created_by=user, created_at=datetime.utcnow().isoformat())
+    try:
+        with db.session.begin_nested():
+            db.session.add(row)
+    except IntegrityError:
+        return False
+    return True
+
+
+def allocate_version(shot, kind, path_for, source=None, user=None, attempts=5):
+    """Reserve the next version number of `kind` for a shot and commit it.
+
+    path_for(version) gives the file path stored with it. Concurrent callers
+    race on the (shot_id, kind, version) unique key; the loser retries with
+    the next number, so two clicks never get the same version.
+    """
+    for _ in range(attempts):
+        current = (db.session.query(func.max(ShotVersion.version))
+                   .filter_by(shot_id=shot.id, kind=kind).scalar()) or 0
+        v = current + 1
+        row = ShotVersion(project_id=shot.project_id, shot_id=shot.id, kind=kind, version=v, path=path_for(v),
+                          source=source, created_by=user, created_at=datetime.utcnow().isoformat())
+        db.session.add(row)
+        try:
+            db.session.commit()
+            return row
+        except IntegrityError:
+            db.session.rollback()
+    raise RuntimeError(f"could not allocate a {kind} version for shot {shot.id}")
+
+
+def shot_reel(s):
+    """(reel_name, reel_folder) of a Shot or a query row with code/reel/reel_name/reel_folder.
+
+    The stored columns are filled on write and by backfill_shot_codes.py; rows
+    that were never backfilled have NULLs there, so derive from code and reel instead.
+    """
+    if s.reel_folder:
+        return s.reel_name, s.reel_folder
+    derived = derive_fields(s.code, s.reel)
+    return derived["reel_name"], derived["reel_folder"]
+
+
+def comp_dirs(proj, s):
+    """Directories comp scripts are written to: generate_comp's Comp/<reel>/<code> and start_shot's Comps/<Reel_xx>/<code>/Comp."""
+    shot_folder = s.code or f"shot_{s.id}"
+    reel_name, reel_folder = shot_reel(s)
+    return [
+        os.path.join(proj.folder_path, "Comp", reel_name or "REEL", shot_folder),
+        os.path.join(proj.folder_path, "Comps", reel_folder, shot_folder, "Comp"),
+    ]
+
+
+def scan_comp_versions(proj, s):
+    """{version: path} of <code>_comp_vNNN.nk scripts on disk for a shot."""
+    found = {}
+    prefix = (s.code or "").lower() + "_comp_v"
+    for d in comp_dirs(proj, s):
+        try:
+            names = os.listdir(d)
+        except OSError:
+            continue
+        for fn in names:
+            m = _COMP_VERSION_RE.search(fn)
+            if m and fn.lower().startswith(prefix):
+                found.setdefault(int(m.group(1)), os.path.join(d, fn))
+    return found
+
+
+def reconcile_shot_versions(proj, s, comp_found=None):
+    """Import on-disk comp versions and indexed renders (shot_media) into the registry. Returns count added.
+
+    The caller commits.
+    """
+    added = 0
+    if comp_found is None:
+        comp_found = scan_comp_versions(proj, s)
+    for v, path in sorted(comp_found.items()):
+        added += register_version(s, "comp", v, path, source="reconcile")
+    renders = db.session.query(ShotMedia.path).filter_by(shot_id=s.id, kind="render").all()
+    for (path,) in renders:
+        m = list(_VERSION_RE.finditer(os.path.basename(path)))
+        if m:
+            added += register_version(s, "render", int(m[-1].group(1)), path, source="reconcile")
+    return added
+
+
 # -------------------------
 # UI routes
 # -------------------------
@@ -197,7 +1482,7 @@ def login():
         with app.app_context():
             ensure_db()
     except Exception as e:
-        app.logger.error(f"Database initialization failed: {e}")
+        app.logger.error("Database initialization failed: %s", e)
     
     username = (request.form.get("username") or "").strip()
     password = request.form.get("password") or ""
@@ -212,7 +1497,7 @@ def login():
         session["role"] = user.role
         return redirect(url_for("index"))
     except Exception as e:
-        app.logger.error(f"Login error: {e}")
+        app.logger.error("Login error: %s", e)
         return f"Login failed: {str(e)}", 500
 
 
@@ -325,39 +1610,68 @@ def api_projects():
     p = Project(name=name, short=short, start_date=start_date, folder_path=folder_path, details_text=details_text)
     db.session.add(p)
     db.session.commit()
-    # If folder_path not supplied, build one using PROJECT_ROOT and project short/code
-    try:
-        if not folder_path:
-            safe_short = (short or name or f"project_{p.id}").replace(' ', '_')
-            project_dir = os.path.join(PROJECT_ROOT, safe_short)
-            os.makedirs(project_dir, exist_ok=True)
-            # create standard subfolders
-            subfolders = [
-                "Annotation",
-                "Assets",
-                "Comps",
-                "From Client",
-                "Plates",
-                "Render",
-                "Send to client",
-                "template",
-            ]
-            for sf in subfolders:
-                try:
-                    os.makedirs(os.path.join(project_dir, sf), exist_ok=True)
-                except Exception:
-                    pass
-            p.folder_path = project_dir
-            db.session.commit()
-        else:
-            # ensure provided path exists
-            try:
-                os.makedirs(folder_path, exist_ok=True)
-            except Exception:
-                pass
-    except Exception as e:
-        app.logger.exception(f"Failed to create project folders: {e}")
-    return jsonify(p.to_dict()), 201
+    # If folder_path not supplied, build one using PROJECT_ROOT and project short/code;
+    # the folders themselves are created by a background job
+    subfolders = []
+    if not folder_path:
+        safe_short = (short or name or f"project_{p.id}").replace(' ', '_')
+        p.folder_path = os.path.join(PROJECT_ROOT, safe_short)
+        db.session.commit()
+        subfolders = PROJECT_SUBFOLDERS
+    job = enqueue_job("create_project_folders", {"subfolders": subfolders}, project=p)
+    out = p.to_dict()
+    out["job_id"] = job.id
+    return jsonify(out), 201
+
+
+# standard subfolders of a project created under PROJECT_ROOT
+PROJECT_SUBFOLDERS = [
+    "Annotation",
+    "Assets",
+    "Comps",
+    "From Client",
+    "Plates",
+    "Render",
+    "Send to client",
+    "template",
+]
+
+
+@job_handler("create_project_folders")
+def _job_create_project_folders(job, params, progress):
+    proj = db.session.get(Project, job.project_id)
+    if not proj or not proj.folder_path:
+        raise JobError("project folder_path not configured")
+    os.makedirs(proj.folder_path, exist_ok=True)
+    created, errors = [proj.folder_path], []
+    for sf in params.get("subfolders") or []:
+        try:
+            os.makedirs(os.path.join(proj.folder_path, sf), exist_ok=True)
+            created.append(os.path.join(proj.folder_path, sf))
+        except Exception as e:
+            errors.append({"name": sf, "error": str(e)})
+    fs_stats.invalidate_dir(proj.folder_path)
+    return {"created": created, "errors": errors}
+
+
+def delete_shot_rows(shot_ids):
+    """Delete the comments, media index, versions, path checks and deliveries of shots being deleted.
+
+    Runs in the caller's transaction, before the shots themselves. Shot
+    history is kept on purpose. Media and usage scan state is left alone:
+    the changed shot codes make the next scan a full one.
+    """
+    for chunk in _chunks(list(shot_ids), 1000):
+        for model in (Comment, ShotMedia, ShotVersion, PathCheck, Delivery):
+            model.query.filter(model.shot_id.in_(chunk)).delete(synchronize_session=False)
+        UsageRollup.query.filter(UsageRollup.scope == "shot",
+                                 UsageRollup.key.in_([str(i) for i in chunk])).delete(synchronize_session=False)
+
+
+def delete_project_rows(project_id):
+    """Delete everything stored per project besides shots and history (caller commits)."""
+    for model in (ShotMedia, ShotVersion, PathCheck, Delivery, MediaScanDir, MediaScan, UsageDir, UsageRollup, UsageScan):
+        model.query.filter(model.project_id == project_id).delete(synchronize_session=False)
 
 
 @app.route("/api/projects/<int:project_id>", methods=["GET", "PUT", "DELETE"])
@@ -370,15 +1684,15 @@ def api_project_edit(project_id):
     if not current or current.role not in ("admin", "producer"):
         return jsonify({"error": "forbidden"}), 403
     if request.method == "DELETE":
-        # Delete all shots in this project first (due to foreign key constraints)
+        rows = db.session.query(Shot.id, Shot.project_id, Shot.code).filter_by(project_id=project_id).all()
+        events = [history_event({"id": r.id, "project_id": r.project_id, "code": r.code}, "delete", user=current) for r in rows]
+        # comments and per-shot rows first (foreign keys), then the shots, then the project
+        delete_shot_rows([r.id for r in rows])
+        delete_project_rows(project_id)
         Shot.query.filter_by(project_id=project_id).delete()
-        # Delete all comments related to shots in this project
-        comments = Comment.query.filter(Comment.shot_id.in_(
-            db.session.query(Shot.id).filter_by(project_id=project_id)
-        )).delete(synchronize_session=False)
-        # Now delete the project
         db.session.delete(p)
         db.session.commit()
+        record_shot_history(events)
         return jsonify({"ok": True})
     data = request.get_json() or {}
     if "name" in data:
@@ -436,14 +1750,13 @@ def project_shots(project_id):
         
         # Auto-extract version from code if not provided
         if not version:
-            import re
-            match = re.search(r'[Vv](\d+)', code)
-            if match:
-                version = f"V{match.group(1)}"
+            version = derive_fields(code)["version_label"] or ""
         
         s = Shot(project_id=project_id, code=code, description=description, assigned_to=assigned_to, start_date=start_date, due_date=due_date, status=status, plate_path=plate_path, mov_path=mov_path, exr_path=exr_path, version=version)
         db.session.add(s)
         db.session.commit()
+        record_shot_history([history_event(s, "create", user=current)])
+        prefetch_thumbnails([{"plate_path": plate_path, "mov_path": mov_path, "exr_path": exr_path}])
         return jsonify({"ok": True, "id": s.id}), 201
 
     # new: filter by reel param
@@ -482,7 +1795,100 @@ def project_shots(project_id):
 
     # pagination / sorting / return list as before
     shots = q.order_by(Shot.id).all()
-    return jsonify([s.to_dict() for s in shots])
+    return jsonify(shots_to_dicts(project_id, shots, _include_args()))
+
+
+BULK_CREATE_CHUNK = int(os.environ.get("DC_BULK_CREATE_CHUNK", 500))
+BULK_CREATE_FIELDS = ["code", "reel", "description", "assigned_to", "start_date", "due_date", "status", "plate_path", "mov_path", "exr_path", "version"]
+
+
+def _chunks(seq, size):
+    for i in range(0, len(seq), size):
+        yield seq[i:i + size]
+
+
+@app.route("/api/projects/<int:project_id>/shots/bulk", methods=["POST"])
+def project_shots_bulk(project_id):
+    """Create many shots in one call.
+
+    Expects JSON {"shots": [{"code": "...", ...}, ...]} and returns per-item
+    {"index", "code", "id"} or {"index", "code", "error"} in input order.
+    Duplicates (against the project or earlier items) are checked with one
+    query per chunk of codes instead of one SELECT per shot, ignoring case
+    like the database's unique key does.
+    """
+    Project.query.get_or_404(project_id)
+    uid = session.get("user_id")
+    current = db.session.get(User, uid) if uid else None
+    if not current or current.role not in ("admin", "producer", "supervisor"):
+        return jsonify({"error": "forbidden"}), 403
+    data = request.get_json(silent=True) or {}
+    items = data.get("shots")
+    if not isinstance(items, list):
+        return jsonify({"error": "shots (list) required"}), 400
+
+    results = [None] * len(items)
+    pending = []  # (index, mapping)
+    seen = set()
+    # validate + normalise in one pass
+    for i, item in enumerate(items):
+        if not isinstance(item, dict):
+            results[i] = {"index": i, "error": "shot must be an object"}
+            continue
+        wrong = [k for k in BULK_CREATE_FIELDS if item.get(k) is not None and not isinstance(item[k], str)]
+        if wrong:
+            results[i] = {"index": i, "error": f"{', '.join(wrong)} must be a string"}
+            continue
+        code = (item.get("code") or "").strip()
+        if not code:
+            results[i] = {"index": i, "error": "code required"}
+            continue
+        if code.lower() in seen:
+            results[i] = {"index": i, "code": code, "error": "duplicate code in request"}
+            continue
+        seen.add(code.lower())
+        mapping = {k: item.get(k) for k in BULK_CREATE_FIELDS}
+        mapping.update(project_id=project_id, code=code, status=item.get("status") or "Not Started")
+        for k in ("reel", "plate_path", "mov_path", "exr_path", "version"):
+            mapping[k] = mapping[k] or ""
+        derived = derive_fields(code, mapping["reel"], mapping["version"])
+        if not mapping["version"]:
+            mapping["version"] = derived["version_label"] or ""
+        mapping.update(derived)
+        pending.append((i, mapping))
+
+    # one duplicate check per chunk of codes (keeps IN lists bounded)
+    existing = set()
+    for chunk in _chunks([m["code"].lower() for _, m in pending], BULK_CREATE_CHUNK):
+        existing.update(c.lower() for (c,) in db.session.query(Shot.code).filter(Shot.project_id == project_id, func.lower(Shot.code).in_(chunk)))
+    to_insert = []
+    for i, m in pending:
+        if m["code"].lower() in existing:
+            results[i] = {"index": i, "code": m["code"], "error": f"Shot code '{m['code']}' already exists in this project"}
+        else:
+            to_insert.append((i, m))
+
+    created = 0
+    events = []
+    for chunk in _chunks(to_insert, BULK_CREATE_CHUNK):
+        mappings = [m for _, m in chunk]
+        try:
+            db.session.bulk_insert_mappings(Shot, mappings)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            for i, m in chunk:
+                results[i] = {"index": i, "code": m["code"], "error": "insert failed", "detail": str(e)}
+            continue
+        ids = dict(db.session.query(Shot.code, Shot.id).filter(Shot.project_id == project_id, Shot.code.in_([m["code"] for m in mappings])))
+        for i, m in chunk:
+            results[i] = {"index": i, "code": m["code"], "id": ids.get(m["code"])}
+            events.append(history_event({"id": ids.get(m["code"]), "project_id": project_id, "code": m["code"]}, "create", user=current))
+        created += len(chunk)
+        prefetch_thumbnails(mappings)
+    record_shot_history(events)
+
+    return jsonify({"created": created, "errors": sum(1 for r in results if "error" in r), "results": results}), (201 if created else 400)
 
 
 @app.route("/api/shots/<int:shot_id>", methods=["GET", "PUT", "DELETE"])
@@ -495,8 +1901,11 @@ def api_shot(shot_id):
     if request.method == "DELETE":
         if not current or current.role not in ("admin", "producer", "supervisor"):
             return jsonify({"error": "forbidden"}), 403
+        hist = history_event(s, "delete", user=current)
+        delete_shot_rows([s.id])
         db.session.delete(s)
         db.session.commit()
+        record_shot_history([hist])
         return jsonify({"ok": True})
     if not current or current.role not in ("admin", "producer", "supervisor"):
         return jsonify({"error": "forbidden"}), 403
@@ -504,13 +1913,16 @@ def api_shot(shot_id):
     allowed = ["assigned_to", "status", "description", "due_date", "plate_path", "mov_path", "exr_path", "nuke_path", "code", "reel"]
     # allow updating version as well
     allowed.append("version")
-    changed = False
+    events = []
     for k in allowed:
         if k in data:
+            old = getattr(s, k)
+            if old != data[k]:
+                events.append(history_event(s, "update", field=k, old=old, new=data[k], user=current))
             setattr(s, k, data[k])
-            changed = True
-    if changed:
+    if events:
         db.session.commit()
+        record_shot_history(events)
     return jsonify(s.to_dict())
 
 
@@ -528,8 +1940,12 @@ def api_shots_bulk_delete():
         return jsonify({"error": "ids (list) required"}), 400
 
     try:
+        rows = db.session.query(Shot.id, Shot.project_id, Shot.code).filter(Shot.id.in_(ids)).all()
+        events = [history_event({"id": r.id, "project_id": r.project_id, "code": r.code}, "delete", user=current) for r in rows]
+        delete_shot_rows([r.id for r in rows])
         deleted = Shot.query.filter(Shot.id.in_(ids)).delete(synchronize_session=False)
         db.session.commit()
+        record_shot_history(events)
         return jsonify({"deleted": deleted})
     except Exception as e:
         db.session.rollback()
@@ -540,8 +1956,26 @@ def api_shots_bulk_delete():
 def api_shot_comments(shot_id):
     shot = Shot.query.get_or_404(shot_id)
     if request.method == "GET":
-        comments = Comment.query.filter_by(shot_id=shot_id).order_by(Comment.id).all()
-        return jsonify([c.to_dict() for c in comments])
+        limit = request.args.get("limit", type=int)
+        if not limit:
+            comments = Comment.query.filter_by(shot_id=shot_id).order_by(Comment.id).all()
+            return jsonify([c.to_dict() for c in comments])
+        # keyset pagination: ?limit=N&after_id=X (older -> newer) or ?limit=N&before_id=X (page of older notes)
+        limit = min(limit, 500)
+        q = Comment.query.filter_by(shot_id=shot_id)
+        before_id = request.args.get("before_id", type=int)
+        after_id = request.args.get("after_id", type=int)
+        if before_id or request.args.get("latest"):
+            if before_id:
+                q = q.filter(Comment.id < before_id)
+            comments = q.order_by(Comment.id.desc()).limit(limit).all()[::-1]
+            more = len(comments) == limit
+            return jsonify({"comments": [c.to_dict() for c in comments], "next_before_id": comments[0].id if more else None})
+        if after_id:
+            q = q.filter(Comment.id > after_id)
+        comments = q.order_by(Comment.id).limit(limit).all()
+        more = len(comments) == limit
+        return jsonify({"comments": [c.to_dict() for c in comments], "next_after_id": comments[-1].id if more else None})
     uid = session.get("user_id")
     current = db.session.get(User, uid) if uid else None
     if not current:
@@ -556,6 +1990,45 @@ def api_shot_comments(shot_id):
     return jsonify(c.to_dict()), 201
 
 
+def _history_page(q):
+    """Apply ?before_id=&limit= keyset pagination (newest first) to a ShotHistory query."""
+    before_id = request.args.get("before_id", type=int)
+    limit = min(request.args.get("limit", 100, type=int) or 100, 1000)
+    if before_id:
+        q = q.filter(ShotHistory.id < before_id)
+    field = request.args.get("field")
+    if field:
+        q = q.filter(ShotHistory.field == field)
+    rows = q.order_by(ShotHistory.id.desc()).limit(limit).all()
+    next_before = rows[-1].id if len(rows) == limit else None
+    return jsonify({"history": [h.to_dict() for h in rows], "next_before_id": next_before})
+
+
+@app.route("/api/shots/<int:shot_id>/history")
+def api_shot_history(shot_id):
+    """Change history for one shot (works for deleted shots too)."""
+    flush_shot_history()
+    return _history_page(ShotHistory.query.filter(ShotHistory.shot_id == shot_id))
+
+
+@app.route("/api/projects/<int:project_id>/history")
+def api_project_history(project_id):
+    """Project-wide change history. Optional filters: field, user, action, since (ISO timestamp)."""
+    Project.query.get_or_404(project_id)
+    flush_shot_history()
+    q = ShotHistory.query.filter(ShotHistory.project_id == project_id)
+    user = request.args.get("user")
+    if user:
+        q = q.filter(ShotHistory.changed_by == user)
+    action = request.args.get("action")
+    if action:
+        q = q.filter(ShotHistory.action == action)
+    since = request.args.get("since")
+    if since:
+        q = q.filter(ShotHistory.changed_at >= since)
+    return _history_page(q)
+
+
 @app.route("/api/comments/<int:comment_id>", methods=["PUT", "DELETE"])
 def api_comment_edit(comment_id):
     c = Comment.query.get_or_404(comment_id)
@@ -578,25 +2051,204 @@ def api_comment_edit(comment_id):
     return jsonify(c.to_dict())
 
 
+def prefetch_thumbnails(mappings):
+    """Queue background thumbnail generation for newly created/imported shots."""
+    thumbs.prefetch([m.get("plate_path") or m.get("mov_path") or m.get("exr_path") for m in mappings])
+
+
+def admitted(paths, build):
+    """Run build() under a media slot on the storage root of each of `paths` (one path or a list),
+    held until the response body is closed.
+
+    Each distinct root is admitted once, in sorted order. When any root's queue is full, the
+    slots already taken are given back and the answer is 503 with Retry-After.
+    """
+    roots = sorted({storage_root(p) for p in ([paths] if isinstance(paths, str) else paths)})
+    tickets = []
+    try:
+        for root in roots:
+            tickets.append(media_gate.admit(root))
+    except Overloaded as e:
+        for t in tickets:
+            t.release()
+        app.logger.warning("Media request shed: %s", e)
+        resp = jsonify({"error": "media storage busy", "root": e.root})
+        resp.status_code = 503
+        resp.headers["Retry-After"] = str(e.retry_after)
+        return resp
+
+    def release():
+        for t in tickets:
+            t.release()
+    try:
+        resp = make_response(build())
+    except BaseException:
+        release()
+        raise
+    if resp.direct_passthrough:
+        # files and streams skip Response.close(), so hook the body the server closes
+        resp.response = _release_on_close(resp.response, release)
+    else:
+        resp.call_on_close(release)
+    return resp
+
+
+def _release_on_close(body, release):
+    """Call release() when the server closes `body`; file wrappers stay intact so sendfile still applies."""
+    close = getattr(body, "close", None)
+
+    def _close():
+        try:
+            if close:
+                close()
+        finally:
+            release()
+    try:
+        body.close = _close
+        return body
+    except AttributeError:
+        return ClosingIterator(body, [release])
+
+
 @app.route("/api/shot_thumb/<int:shot_id>")
 def api_shot_thumb(shot_id):
     s = Shot.query.get_or_404(shot_id)
+    source = next((p for p in (s.plate_path, s.mov_path, s.exr_path) if p), None)
+    if not source:
+        return abort(404)
+    return admitted(source, lambda: shot_thumb_response(s))
+
+
+def shot_thumb_response(s):
     for p in (s.plate_path, s.mov_path, s.exr_path):
         if not p:
             continue
-        candidate = os.path.normpath(p)
-        if os.path.exists(candidate) and os.path.isfile(candidate):
-            try:
-                return send_file(candidate, conditional=True)
-            except Exception:
-                continue
+        try:
+            thumb, etag = thumbs.get(p)
+        except OSError:
+            continue
+        if thumb:
+            mimetype = "image/webp" if thumb.endswith(".webp") else "image/jpeg"
+            return send_file(thumb, mimetype=mimetype, conditional=True, etag=etag, max_age=THUMB_MAX_AGE)
+    # No generator for these sources (no ffmpeg/Pillow): only send small web images as-is,
+    # never whole movies or EXR frames
+    for p in (s.plate_path, s.mov_path, s.exr_path):
+        if p and os.path.splitext(p)[1].lower() in (".jpg", ".jpeg", ".png", ".webp", ".gif"):
+            candidate = os.path.normpath(p)
+            if fs_stats.isfile(candidate):
+                return send_file(candidate, conditional=True, max_age=THUMB_MAX_AGE)
     return abort(404)
 
+# Media offload: let the front proxy stream the bytes (ranges, sendfile) after Flask has
+# done the lookup. DC_MEDIA_OFFLOAD=nginx answers with X-Accel-Redirect to an internal
+# location, DC_MEDIA_OFFLOAD=sendfile with X-Sendfile (Apache mod_xsendfile, lighttpd).
+# DC_MEDIA_ACCEL_MAP maps storage roots to nginx internal locations, e.g.
+# "/mnt/nas=/_media/nas;/mnt/render=/_media/render". Unmapped paths use send_file.
+# Only files under a storage root are served at all: the project root, DC_JOB_ROOTS, the
+# DC_MEDIA_ACCEL_MAP roots, the proxy cache and DC_MEDIA_ROOTS (os.pathsep-separated); anything else is 403.
+MEDIA_OFFLOAD = (os.environ.get("DC_MEDIA_OFFLOAD") or "").lower()
+MEDIA_ACCEL_MAP = sorted(
+    ((os.path.normpath(root), prefix.rstrip("/"))
+     for root, _, prefix in (item.partition("=") for item in os.environ.get("DC_MEDIA_ACCEL_MAP", "").split(";"))
+     if root and prefix),
+    key=lambda rp: len(rp[0]), reverse=True,
+)
+MEDIA_ROOTS = sorted(
+    set(JOB_ROOTS + [root for root, _ in MEDIA_ACCEL_MAP] + [os.path.normpath(proxies.cache_dir)]
+        + [os.path.normpath(r) for r in os.environ.get("DC_MEDIA_ROOTS", "").split(os.pathsep) if r]),
+    key=len, reverse=True,
+)
+
+
+def under_media_root(path):
+    """True if the normalised `path` lies inside one of MEDIA_ROOTS."""
+    p = os.path.normpath(path)
+    return any(p == r or p.startswith(r.rstrip("\\/") + os.sep) for r in MEDIA_ROOTS)
+
+
+def accel_uri(path):
+    """Internal nginx URI for `path` under a mapped storage root, or None."""
+    for root, prefix in MEDIA_ACCEL_MAP:
+        if path == root or path.startswith(root.rstrip(os.sep) + os.sep):
+            rel = os.path.relpath(path, root).replace(os.sep, "/")
+            return f"{prefix}/{quote(rel)}"
+    return None
+
+
+def media_response(path, mimetype):
+    """Response for a checked media file: proxy offload headers when enabled, else send_file.
+
+    Paths outside the storage roots are refused (403) rather than handed to the proxy or send_file.
+    """
+    if not under_media_root(path):
+        app.logger.warning("Refusing media outside storage roots: %s", path)
+        return jsonify({"error": "path is outside the media storage roots"}), 403
+    if MEDIA_OFFLOAD == "nginx":
+        uri = accel_uri(path)
+        if uri:
+            resp = make_response("")
+            resp.headers["X-Accel-Redirect"] = uri
+            resp.headers["Content-Type"] = mimetype
+            return resp
+    elif MEDIA_OFFLOAD == "sendfile":
+        resp = make_response("")
+        resp.headers["X-Sendfile"] = path
+        resp.headers["Content-Type"] = mimetype
+        return resp
+    return send_file(path, conditional=True, mimetype=mimetype)
+
+
+PROXY_SOURCES = {"mov": "mov_path", "plate": "plate_path", "exr": "exr_path"}
+
+
+def shot_proxy_response(s, of=None):
+    """Serve the review proxy for a shot, queueing the transcode if needed.
+
+    `of` (mov, plate or exr, from ?of=) is the media the proxy is made from,
+    i.e. the one the UI is previewing; without it mov, else plate, else exr.
+    Movies answer with the MP4/WebM file. EXR sequences answer with a JSON
+    frame list, and ?frame=N returns one JPEG. While the proxy is being made
+    the answer is 202 with Retry-After.
+    """
+    if of is not None and of not in PROXY_SOURCES:
+        return jsonify({"error": "of must be mov, plate or exr"}), 400
+    paths = [getattr(s, PROXY_SOURCES[of])] if of else [s.mov_path, s.plate_path, s.exr_path]
+    source = next((p for p in paths if p and fs_stats.exists(p)), None)
+    if not source:
+        return jsonify({"error": "no media for proxy"}), 404
+    state = proxies.get(source)
+    if state.status == READY:
+        if state.kind == "movie":
+            return media_response(state.path, "video/webm" if state.path.endswith(".webm") else "video/mp4")
+        manifest = state.manifest or {"frames": [], "files": []}
+        frame = request.args.get("frame", type=int)
+        if frame is None:
+            return jsonify({"status": READY, "kind": "sequence", "pattern": manifest.get("pattern"),
+                            "frames": manifest["frames"],
+                            "url": f"/api/shot_media/{s.id}?type=proxy{'&of=' + of if of else ''}&frame="})
+        try:
+            fname = manifest["files"][manifest["frames"].index(frame)]
+        except ValueError:
+            return abort(404)
+        return send_file(os.path.join(state.path, fname), mimetype="image/jpeg", conditional=True, max_age=THUMB_MAX_AGE)
+    if state.status in (PENDING, BUSY):
+        resp = jsonify({"status": state.status, "kind": state.kind, "error": state.error})
+        resp.status_code = 202 if state.status == PENDING else 503
+        resp.headers["Retry-After"] = "5" if state.status == PENDING else "30"
+        return resp
+    code = 503 if state.status == UNAVAILABLE else 500
+    return jsonify({"status": state.status, "error": state.error or "proxy failed"}), code
+
+
 @app.route("/api/shot_media/<int:shot_id>")
 def api_shot_media(shot_id):
     """Stream video/media files from disk"""
-    media_type = request.args.get("type", "plate")  # plate, mov, exr
+    if not session.get("user_id"):
+        return jsonify({"error": "login required"}), 401
+    media_type = request.args.get("type", "plate")  # plate, mov, exr, proxy
     s = Shot.query.get_or_404(shot_id)
+    if media_type == "proxy":
+        return shot_proxy_response(s, request.args.get("of"))
     
     # Get the appropriate path based on media_type
     path = None
@@ -608,19 +2260,19 @@ def api_shot_media(shot_id):
         path = s.exr_path
     
     if not path:
-        app.logger.warning(f"No {media_type} path for shot {shot_id}")
+        app.logger.warning("No %s path for shot %s", media_type, shot_id)
         return abort(404)
     
     # Normalize the path (handles both Windows UNC paths and regular paths)
     candidate = os.path.normpath(path)
     
-    # Check if file exists
-    if not os.path.exists(candidate):
-        app.logger.warning(f"File not found: {candidate}")
+    # Check if file exists (cached stat: each check is a round trip on SMB)
+    if not fs_stats.exists(candidate):
+        app.logger.warning("File not found: %s", candidate)
         return abort(404)
     
-    if not os.path.isfile(candidate):
-        app.logger.warning(f"Not a file: {candidate}")
+    if not fs_stats.isfile(candidate):
+        app.logger.warning("Not a file: %s", candidate)
         return abort(404)
     
     try:
@@ -641,17 +2293,19 @@ def api_shot_media(shot_id):
         elif file_ext == '.png':
             mime_type = 'image/png'
         
-        app.logger.info(f"Streaming: {candidate} as {mime_type}")
+        app.logger.info("Streaming: %s as %s", candidate, mime_type)
         
         # Send file with conditional headers for range requests (video scrubbing)
-        return send_file(candidate, conditional=True, mimetype=mime_type)
+        return admitted(candidate, lambda: media_response(candidate, mime_type))
     except Exception as e:
-        app.logger.exception(f"shot_media failed for {candidate}: {str(e)}")
+        app.logger.exception("shot_media failed for %s: %s", candidate, e)
         return jsonify({"error": "Failed to stream file", "detail": str(e)}), 500
 
 @app.route("/api/stream_file")
 def api_stream_file():
-    """Stream any file by full path (for local playback)"""
+    """Stream a file under a storage root by full path (for local playback)"""
+    if not session.get("user_id"):
+        return jsonify({"error": "login required"}), 401
     file_path = request.args.get("path", "")
     
     if not file_path:
@@ -661,12 +2315,12 @@ def api_stream_file():
     candidate = os.path.normpath(file_path)
     
     # Verify file exists
-    if not os.path.exists(candidate):
-        app.logger.warning(f"File not found: {candidate}")
+    if not fs_stats.exists(candidate):
+        app.logger.warning("File not found: %s", candidate)
         return abort(404)
     
-    if not os.path.isfile(candidate):
-        app.logger.warning(f"Not a file: {candidate}")
+    if not fs_stats.isfile(candidate):
+        app.logger.warning("Not a file: %s", candidate)
         return abort(404)
     
     try:
@@ -697,28 +2351,189 @@ def api_stream_file():
         elif file_ext == '.webp':
             mime_type = 'image/webp'
         
-        app.logger.info(f"Streaming file: {candidate} ({mime_type})")
+        app.logger.info("Streaming file: %s (%s)", candidate, mime_type)
         
         # Send file with range request support for seeking
-        return send_file(candidate, conditional=True, mimetype=mime_type)
+        return admitted(candidate, lambda: media_response(candidate, mime_type))
     except Exception as e:
-        app.logger.exception(f"stream_file failed: {str(e)}")
+        app.logger.exception("stream_file failed: %s", e)
         return jsonify({"error": "Failed to stream file", "detail": str(e)}), 500
 
+# -------------------------
+# DELIVERABLE PACKAGES
+# -------------------------
+def archive_segment(name):
+    """`name` as one archive path component: separators and ".." replaced, never empty."""
+    seg = re.sub(r'[\\/"]', "_", str(name or "")).replace("..", "_").strip()
+    return seg or "_"
+
+
+def shot_package_pairs(s, nuke=None, prefix=""):
+    """(arcname, path) pairs for a shot's MOV, EXR frames and nuke script."""
+    pairs = []
+    if s.mov_path and fs_stats.isfile(s.mov_path):
+        pairs.append((f"{prefix}MOV/{os.path.basename(s.mov_path)}", s.mov_path))
+    if s.exr_path:
+        try:
+            seqs = seq_cache.for_path(s.exr_path)
+        except OSError:
+            seqs = []
+        for seq in seqs:
+            for frame in seq.frames:
+                path = seq.frame_path(frame)
+                pairs.append((f"{prefix}EXR/{os.path.basename(path)}", path))
+    nuke = s.nuke_path or nuke
+    if nuke and fs_stats.isfile(nuke):
+        pairs.append((f"{prefix}NUKE/{os.path.basename(nuke)}", nuke))
+    return pairs
+
+
+def latest_comp_paths(shot_ids):
+    """{shot_id: path of the newest registered comp} in one query."""
+    out = {}
+    rows = (ShotVersion.query.filter(ShotVersion.shot_id.in_(shot_ids), ShotVersion.kind == "comp",
+                                     ShotVersion.path.isnot(None))
+            .order_by(ShotVersion.shot_id, ShotVersion.version))
+    for row in rows:
+        out[row.shot_id] = row.path
+    return out
+
+
+def package_response(pairs, filename):
+    """Stream a stored ZIP (or ?format=tar) of `pairs` with an exact Content-Length and Range support."""
+    fmt = request.args.get("format", "zip").lower()
+    if fmt not in ("zip", "tar"):
+        return jsonify({"error": "format must be zip or tar"}), 400
+    if not pairs:
+        return jsonify({"error": "nothing to package"}), 404
+    outside = [path for _, path in pairs if not under_media_root(path)]
+    if outside:
+        app.logger.warning("Refusing package with %d files outside storage roots, e.g. %s", len(outside), outside[0])
+        return jsonify({"error": "path is outside the media storage roots"}), 403
+    # members can live on several shares: take a slot on every root the archive reads from
+    return admitted([path for _, path in pairs], lambda: archive_response(pairs, fmt, filename))
+
+
+def archive_response(pairs, fmt, filename):
+    members = members_for(pairs)
+    if not members:
+        return jsonify({"error": "nothing to package"}), 404
+    archive = Archive(members, fmt)
+    etag = archive.etag
+    start, end, status = 0, archive.size - 1, 200
+    # a Range only applies to the same archive (If-Range carries the ETag of the first attempt)
+    if_range = request.if_range
+    if request.range and ((if_range.etag is None and if_range.date is None) or if_range.etag == etag):
+        r = request.range.range_for_length(archive.size)
+        if r is None:
+            resp = make_response("", 416)
+            resp.headers["Content-Range"] = f"bytes */{archive.size}"
+            return resp
+        start, end, status = r[0], r[1] - 1, 206
+    resp = Response(archive.iter_bytes(start, end), status=status, mimetype=archive.mimetype,
+                    direct_passthrough=True)
+    resp.headers["Content-Length"] = str(end - start + 1)
+    resp.headers["Accept-Ranges"] = "bytes"
+    resp.headers["Content-Disposition"] = f"attachment; filename=\"{filename}.{fmt}\""
+    resp.set_etag(etag)
+    if status == 206:
+        resp.headers["Content-Range"] = f"bytes {start}-{end}/{archive.size}"
+    app.logger.info("Packaging %d files for %s.%s (%d bytes, from %d)", len(archive.members), filename, fmt, archive.size, start)
+    return resp
+
+
+@app.route("/api/shots/<int:shot_id>/package")
+def api_shot_package(shot_id):
+    """Download a shot's MOV, EXR sequence and nuke script as one ZIP/TAR (?format=zip|tar)."""
+    if not session.get("user_id"):
+        return jsonify({"error": "login required"}), 401
+    s = Shot.query.get_or_404(shot_id)
+    code = archive_segment(s.code)
+    pairs = shot_package_pairs(s, latest_comp_paths([s.id]).get(s.id), prefix=f"{code}/")
+    return package_response(pairs, code)
+
+
+def in_reel(reel):
+    """Filter for shots in `reel`, given as the raw reel, its folder or its display name."""
+    return db.or_(Shot.reel == reel, Shot.reel_folder == reel, Shot.reel_name == reel)
+
+
+@app.route("/api/projects/<int:project_id>/reels/<reel>/package")
+def api_reel_package(project_id, reel):
+    """Deliverables of every shot in a reel as one ZIP/TAR, one folder per shot."""
+    if not session.get("user_id"):
+        return jsonify({"error": "login required"}), 401
+    proj = Project.query.get_or_404(project_id)
+    shots = Shot.query.filter(Shot.project_id == project_id, in_reel(reel)).order_by(Shot.code).all()
+    if not shots:
+        return jsonify({"error": "no shots in reel"}), 404
+    nukes = latest_comp_paths([s.id for s in shots])
+    folder = archive_segment(reel)
+    pairs = []
+    for s in shots:
+        pairs.extend(shot_package_pairs(s, nukes.get(s.id), prefix=f"{folder}/{archive_segment(s.code)}/"))
+    return package_response(pairs, archive_segment(f"{proj.name}_{folder}".replace(" ", "_")))
+
+
+def shot_sequences(s):
+    """Frame sequence info for a shot's EXR and plate paths ({} entries when not a sequence)."""
+    out = {}
+    for key, path in (("exr", s.exr_path), ("plate", s.plate_path)):
+        if not path:
+            continue
+        try:
+            seqs = seq_cache.for_path(path, exts=(".exr", ".dpx", ".tif", ".tiff", ".png", ".jpg"))
+        except OSError as e:
+            out[key] = {"error": str(e)}
+            continue
+        if seqs:
+            out[key] = [q.to_dict() for q in seqs]
+    return out
+
+
+@app.route("/api/shots/<int:shot_id>/sequences")
+def api_shot_sequences(shot_id):
+    """Frame range, gaps and byte totals for the shot's EXR/plate sequences."""
+    s = Shot.query.get_or_404(shot_id)
+    return jsonify({"shot_id": s.id, "code": s.code, "sequences": shot_sequences(s)})
+
+
+@app.route("/api/projects/<int:project_id>/frame_report")
+def api_project_frame_report(project_id):
+    """EXR frame counts and gaps for every shot in a project (cached per directory mtime)."""
+    Project.query.get_or_404(project_id)
+    q = Shot.query.filter_by(project_id=project_id).filter(Shot.exr_path.isnot(None), Shot.exr_path != "")
+    reel = request.args.get("reel")
+    if reel:
+        q = q.filter(Shot.reel == reel)
+    shots = q.order_by(Shot.id).all()
+
+    def _one(s):
+        try:
+            seqs = seq_cache.for_path(s.exr_path)
+        except OSError as e:
+            return {"shot_id": s.id, "code": s.code, "error": str(e)}
+        main = seqs[0].to_dict() if seqs else None
+        return {"shot_id": s.id, "code": s.code, "exr": main}
+
+    # the directory stats/listings are independent, so fan them out
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        rows = list(pool.map(_one, shots))
+    return jsonify(rows)
+
+
 @app.route("/api/shots/<int:shot_id>/nuke_path")
 def api_shot_nuke_path(shot_id):
     s = Shot.query.get_or_404(shot_id)
     if s.nuke_path:
         return jsonify({"path": s.nuke_path})
+    latest = latest_version(s.id, "comp")
+    if latest and latest.path:
+        return jsonify({"path": latest.path, "version": latest.version})
     proj = db.session.get(Project, s.project_id)
     if proj and proj.folder_path:
-        parts = (s.code or "").split("_")
-        reel = s.reel if s.reel else (parts[1] if len(parts) >= 2 else "REEL")
-        shot_folder = s.code or f"shot_{s.id}"
-        comp_dir = os.path.join(proj.folder_path, "Comp", reel, shot_folder)
-        os.makedirs(comp_dir, exist_ok=True)
-        nkname = f"{s.code}_comp_v001.nk"
-        nkpath = os.path.join(comp_dir, nkname)
+        # where generate_comp would write v001; nothing is created on a GET
+        nkpath = os.path.join(comp_dirs(proj, s)[0], f"{s.code}_comp_v001.nk")
         return jsonify({"path": nkpath})
     return jsonify({"path": ""}), 404
 
@@ -729,36 +2544,66 @@ def api_generate_comp(shot_id):
     proj = db.session.get(Project, s.project_id)
     if not proj or not proj.folder_path:
         return jsonify({"error": "project folder_path not configured"}), 400
-    parts = (s.code or "").split("_")
-    reel = s.reel if s.reel else (parts[1] if len(parts) >= 2 else "REEL")
-    shot_folder = s.code or f"shot_{s.id}"
-    comp_dir = os.path.join(proj.folder_path, "Comp", reel, shot_folder)
+    return job_accepted(enqueue_job("generate_comp", project=proj, shot=s))
+
+
+@app.route("/api/shots/<int:shot_id>/versions")
+def api_shot_versions(shot_id):
+    """Registered versions of a shot, newest first; ?kind=comp|render, ?latest=1 for just the newest."""
+    s = Shot.query.get_or_404(shot_id)
+    kind = request.args.get("kind")
+    if kind and kind not in VERSION_KINDS:
+        return jsonify({"error": f"kind must be one of {', '.join(VERSION_KINDS)}"}), 400
+    if request.args.get("latest"):
+        row = latest_version(s.id, kind or "comp")
+        return jsonify(row.to_dict() if row else None)
+    q = ShotVersion.query.filter_by(shot_id=s.id)
+    if kind:
+        q = q.filter_by(kind=kind)
+    return jsonify([r.to_dict() for r in q.order_by(ShotVersion.kind, ShotVersion.version.desc()).all()])
+
+
+def _job_shot(job):
+    """(shot, project) for a shot job; JobError when either is gone or unconfigured."""
+    s = db.session.get(Shot, job.shot_id)
+    if s is None:
+        raise JobError("shot not found")
+    proj = db.session.get(Project, s.project_id)
+    if not proj or not proj.folder_path:
+        raise JobError("project folder_path not configured")
+    return s, proj
+
+
+@job_handler("generate_comp")
+def _job_generate_comp(job, params, progress):
+    s, proj = _job_shot(job)
+    comp_dir = comp_dirs(proj, s)[0]
     os.makedirs(comp_dir, exist_ok=True)
-    base_name = f"{s.code}_comp_v"
-    existing = [f for f in os.listdir(comp_dir) if f.startswith(base_name) and f.endswith(".nk")]
-    v = 1
-    if existing:
-        nums = []
-        for fn in existing:
-            try:
-                numpart = fn.split("_v")[-1].split(".nk")[0]
-                nums.append(int(numpart))
-            except:
-                pass
-        if nums:
-            v = max(nums) + 1
-    fname = f"{s.code}_comp_v{v:03d}.nk"
-    path = os.path.join(comp_dir, fname)
-    content = f"# Nuke placeholder\n# shot: {s.code}\n# created: {datetime.utcnow().isoformat()}Z\n"
-    try:
-        with open(path, "w", encoding="utf-8") as fh:
-            fh.write(content)
-        s.nuke_path = path
+    if latest_version(s.id, "comp") is None:
+        # first comp through the registry: pick up versions made before it existed
+        reconcile_shot_versions(proj, s)
         db.session.commit()
-        return jsonify({"created": True, "path": path})
-    except Exception as e:
-        app.logger.exception("generate_comp failed")
-        return jsonify({"error": "could not create nuke file", "detail": str(e)}), 500
+    while True:
+        row = allocate_version(s, "comp", lambda v: os.path.join(comp_dir, f"{s.code}_comp_v{v:03d}.nk"),
+                               source="generate_comp", user=job.created_by)
+        content = f"# Nuke placeholder\n# shot: {s.code}\n# created: {datetime.utcnow().isoformat()}Z\n"
+        try:
+            with open(row.path, "x", encoding="utf-8") as fh:
+                fh.write(content)
+            break
+        except FileExistsError:
+            # a file the registry did not know about: keep it registered and take the next number
+            row.source = "reconcile"
+            db.session.commit()
+    s.nuke_path = row.path
+    db.session.commit()
+    return {"created": True, "path": row.path, "version": row.version}
+
+
+# default per-shot folders: Shots/<code>/<name> (create_folders) and Comps/<reel>/<code>/<name> (generate_structure)
+SHOT_FOLDERS = ["Plates", "Comp", "Render", "Assets", "Deliverables"]
+COMP_SUBFOLDERS = ["Annotations", "CG Assets", "Comp", "DeNoise", "MM", "Paint", "precomp", "Roto"]
+FOLDER_WORKERS = int(os.environ.get("DC_FOLDER_WORKERS", 8))
 
 
 @app.route("/api/shots/<int:shot_id>/create_folders", methods=["POST"])
@@ -775,8 +2620,14 @@ def api_shot_create_folders(shot_id):
     names = data.get("names") or []
     # default shot folders
     if not names:
-        names = ["Plates", "Comp", "Render", "Assets", "Deliverables"]
+        names = SHOT_FOLDERS
+    return job_accepted(enqueue_job("create_folders", {"names": names}, project=proj, shot=s))
 
+
+@job_handler("create_folders")
+def _job_create_folders(job, params, progress):
+    s, proj = _job_shot(job)
+    names = params.get("names") or []
     created = []
     errors = []
     shot_folder_name = s.code or f"shot_{s.id}"
@@ -790,7 +2641,7 @@ def api_shot_create_folders(shot_id):
         except Exception as e:
             errors.append({"name": nm, "error": str(e)})
 
-    return jsonify({"created": created, "errors": errors})
+    return {"created": created, "errors": errors}
 
 
 @app.route("/api/shots/<int:shot_id>/generate_structure", methods=["POST"])
@@ -803,19 +2654,15 @@ def api_shot_generate_structure(shot_id):
     proj = db.session.get(Project, s.project_id)
     if not proj or not proj.folder_path:
         return jsonify({"error": "project folder_path not configured"}), 400
+    return job_accepted(enqueue_job("generate_structure", project=proj, shot=s))
 
-    # Determine reel (prefer stored `reel`, fallback to shot.code second segment)
-    parts = (s.code or "").split("_")
-    raw_reel = s.reel if s.reel and str(s.reel).strip() else (parts[1] if len(parts) >= 2 and parts[1] else "01")
-    # Normalize reel folder name: prefix with 'Reel_' unless already contains 'reel'
-    if isinstance(raw_reel, str) and raw_reel.strip():
-        rr = raw_reel.strip()
-    else:
-        rr = "01"
-    if rr.lower().startswith("reel"):
-        reel_folder_name = rr
-    else:
-        reel_folder_name = f"Reel_{rr}"
+
+@job_handler("generate_structure")
+def _job_generate_structure(job, params, progress):
+    s, proj = _job_shot(job)
+
+    # Reel folder (stored `reel`, else shot.code second segment, as 'Reel_xx') is precomputed on write
+    reel_folder_name = shot_reel(s)[1]
 
     shot_folder = s.code or f"shot_{s.id}"
 
@@ -823,28 +2670,134 @@ def api_shot_generate_structure(shot_id):
     reel_dir = os.path.join(comp_base, reel_folder_name)
     shot_dir = os.path.join(reel_dir, shot_folder)
 
-    subfolders = ["Annotations", "CG Assets", "Comp", "DeNoise", "MM", "Paint", "precomp", "Roto"]
+    subfolders = COMP_SUBFOLDERS
 
     created = []
     errors = []
+    for p in [comp_base, reel_dir, shot_dir]:
+        try:
+            os.makedirs(p, exist_ok=True)
+        except Exception as e:
+            errors.append({"path": p, "error": str(e)})
+    for sf in subfolders:
+        try:
+            target = os.path.join(shot_dir, sf)
+            os.makedirs(target, exist_ok=True)
+            created.append(target)
+        except Exception as e:
+            errors.append({"name": sf, "error": str(e)})
+
+    return {"created": created, "errors": errors}
+
+
+@app.route("/api/projects/<int:project_id>/generate_structure", methods=["POST"])
+@app.route("/api/projects/<int:project_id>/reels/<reel>/generate_structure", methods=["POST"])
+def api_project_generate_structure(project_id, reel=None):
+    """Create the comp structure for every shot of a project (or one reel) in a single job.
+
+    JSON (all optional): {"shot_ids": [...], "folders": ["Plates", ...] or true for the
+    create_folders defaults, "structure": false to skip Comps/, "dry_run": true}.
+    The job result lists what was (or, in a dry run, would be) created.
+    """
+    proj = Project.query.get_or_404(project_id)
+    uid = session.get("user_id")
+    current = db.session.get(User, uid) if uid else None
+    if not current or current.role not in ("admin", "producer", "supervisor"):
+        return jsonify({"error": "forbidden"}), 403
+    if not proj.folder_path:
+        return jsonify({"error": "project folder_path not configured"}), 400
+    data = request.get_json(silent=True) or {}
+    folders = data.get("folders") or []
+    if folders is True:
+        folders = SHOT_FOLDERS
+    if not isinstance(folders, list) or not all(isinstance(nm, str) and nm for nm in folders):
+        return jsonify({"error": "folders must be a list of folder names or true"}), 400
     try:
-        for p in [comp_base, reel_dir, shot_dir]:
-            try:
-                os.makedirs(p, exist_ok=True)
-            except Exception as e:
-                errors.append({"path": p, "error": str(e)})
-        for sf in subfolders:
-            try:
-                target = os.path.join(shot_dir, sf)
-                os.makedirs(target, exist_ok=True)
-                created.append(target)
-            except Exception as e:
-                errors.append({"name": sf, "error": str(e)})
-    except Exception as e:
-        app.logger.exception("generate_structure failed")
-        return jsonify({"error": "failed", "detail": str(e)}), 500
+        shot_ids = shot_ids_arg(data.get("shot_ids"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    n = _structure_shots_query(project_id, reel, shot_ids).count()
+    if not n:
+        return jsonify({"error": "no matching shots"}), 404
+    params = {"reel": reel, "shot_ids": shot_ids, "folders": folders,
+              "structure": data.get("structure", True) is not False, "dry_run": bool(data.get("dry_run"))}
+    job = enqueue_job("generate_structure_batch", params, project=proj)
+    return jsonify({"job_id": job.id, "job": job.to_dict(), "shots": n}), 202
+
+
+def shot_ids_arg(value):
+    """A JSON shot_ids value as a list of ints (ints or digit strings), or None when absent."""
+    if value is None:
+        return None
+    if not isinstance(value, list):
+        raise ValueError("shot_ids must be a list of shot ids")
+    ids = []
+    for v in value:
+        if isinstance(v, bool) or not isinstance(v, (int, str)) or not str(v).strip().isdigit():
+            raise ValueError(f"shot_ids: {v!r} is not a shot id")
+        ids.append(int(v))
+    return ids
+
+
+def _structure_shots_query(project_id, reel=None, shot_ids=None):
+    q = db.session.query(Shot.id, Shot.code, Shot.reel, Shot.reel_name, Shot.reel_folder).filter(Shot.project_id == project_id)
+    if reel:
+        q = q.filter(in_reel(reel))
+    if shot_ids:
+        q = q.filter(Shot.id.in_(shot_ids))
+    return q
 
-    return jsonify({"created": created, "errors": errors})
+
+@job_handler("generate_structure_batch")
+def _job_generate_structure_batch(job, params, progress):
+    proj = db.session.get(Project, job.project_id)
+    if not proj or not proj.folder_path:
+        raise JobError("project folder_path not configured")
+    plan = FolderPlan(proj.folder_path)
+    shots = _structure_shots_query(proj.id, params.get("reel"), params.get("shot_ids")).order_by(Shot.id).all()
+    try:
+        for row in shots:
+            shot_folder = row.code or f"shot_{row.id}"
+            if params.get("structure", True):
+                shot_dir = os.path.join(proj.folder_path, "Comps", shot_reel(row)[1], shot_folder)
+                for sf in COMP_SUBFOLDERS:
+                    plan.add(os.path.join(shot_dir, sf))
+            for nm in params.get("folders") or []:
+                plan.add(os.path.join(proj.folder_path, "Shots", shot_folder, nm))
+    except ValueError as e:
+        # a shot code or folder name that escapes the project folder: retrying will not help
+        raise JobError(str(e))
+    summary = plan.execute(workers=FOLDER_WORKERS, dry_run=bool(params.get("dry_run")),
+                           progress=lambda done, total: progress(done / total if total else 1.0, f"{done}/{total} folders"))
+    if not params.get("dry_run"):
+        for level in plan.levels():
+            for d in level:
+                fs_stats.invalidate(d)  # drop cached "missing" entries
+    summary["shots"] = len(shots)
+    return summary
+
+
+# Client deliveries: parallel copies that skip files already delivered (see copyengine.py)
+COPY_WORKERS = int(os.environ.get("DC_COPY_WORKERS", 4))
+COPY_BUFFER = int(os.environ.get("DC_COPY_BUFFER_MB", 8)) * 1024 * 1024
+COPY_CHECKSUM = os.environ.get("DC_COPY_CHECKSUM") or None  # e.g. "md5" to verify every delivery
+
+
+def delivery_copier(checksum=None):
+    checksum = checksum or COPY_CHECKSUM
+    if checksum and checksum not in hashlib.algorithms_available:
+        raise ValueError(f"unknown checksum: {checksum}")
+    return CopyEngine(workers=COPY_WORKERS, buffer_size=COPY_BUFFER, checksum=checksum)
+
+
+def _copy_progress(label, job_progress):
+    def _progress(report):
+        done = report.done_bytes
+        msg = (f"{report.done_files}/{report.total_files} files, "
+               f"{done}/{report.total_bytes} bytes, {report.bytes_per_sec / 1e6:.1f} MB/s")
+        app.logger.info("delivery %s: %s", label, msg)
+        job_progress(done / report.total_bytes if report.total_bytes else 1.0, msg)
+    return _progress
 
 
 @app.route("/api/shots/<int:shot_id>/send_to_client", methods=["POST"])
@@ -853,35 +2806,147 @@ def api_send_to_client(shot_id):
     proj = db.session.get(Project, s.project_id)
     if not proj or not proj.folder_path:
         return jsonify({"error": "project folder_path not configured"}), 400
+    data = request.get_json(silent=True) or {}
+    try:
+        delivery_copier(data.get("checksum"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    mode = data.get("mode") or "link"
+    if mode not in DELIVERY_MODES:
+        return jsonify({"error": f"mode must be one of {', '.join(DELIVERY_MODES)}"}), 400
+    params = {"checksum": data.get("checksum"), "mode": mode}
+    return job_accepted(enqueue_job("send_to_client", params, project=proj, shot=s))
+
+
+@app.route("/api/shots/<int:shot_id>/deliveries")
+def api_shot_deliveries(shot_id):
+    """Client deliveries of a shot, newest first; ?manifest=1 includes the per-file manifests."""
+    s = Shot.query.get_or_404(shot_id)
+    rows = Delivery.query.filter_by(shot_id=s.id).order_by(Delivery.id.desc()).all()
+    return jsonify([d.to_dict(manifest=bool(request.args.get("manifest"))) for d in rows])
+
+
+DELIVERY_MODES = ("link", "changed")
+
+
+def delivery_label_suffix(n):
+    """0 -> A, 25 -> Z, 26 -> AA, ..."""
+    out = ""
+    n += 1
+    while n:
+        n, r = divmod(n - 1, 26)
+        out = chr(ord("A") + r) + out
+    return out
+
+
+def allocate_delivery(proj, s, job, mode):
+    """The Delivery for `job`: the shot's part of a Client/<YYYYMMDD><letter> batch.
+
+    A label is one delivery batch: shots sent on the same day go into the
+    day's latest label. Re-sending a shot that is already in that batch
+    opens the next label, so a delivery is never overwritten. Rows are
+    claimed through the (project_id, label, shot_id) unique key; folders on
+    disk that were never recorded as deliveries are skipped. A retried job
+    reuses its own row.
+    """
+    row = Delivery.query.filter_by(job_id=job.id).first()
+    if row:
+        if row.status == "failed":  # retried from the jobs page
+            row.status, row.finished_at = "running", None
+            db.session.commit()
+        return row  # retry: same folder, already-copied files are skipped
     today = datetime.utcnow().strftime("%Y%m%d")
-    label_suffix = "A"
-    target_base = os.path.join(proj.folder_path, "Client", f"{today}{label_suffix}")
+    client_dir = os.path.join(proj.folder_path, "Client")
+    try:
+        on_disk = set(os.listdir(client_dir))
+    except OSError:
+        on_disk = set()
+    recorded = {}
+    for label, shot_id in (db.session.query(Delivery.label, Delivery.shot_id)
+                           .filter(Delivery.project_id == proj.id, Delivery.label.like(f"{today}%"))):
+        recorded.setdefault(label, set()).add(shot_id)
+    labels = [f"{today}{delivery_label_suffix(n)}" for n in range(26 * 27)]
+    start = max((i for i, label in enumerate(labels) if label in recorded), default=0)
+    for label in labels[start:]:
+        if (label in on_disk and label not in recorded) or s.id in recorded.get(label, ()):
+            continue
+        row = Delivery(project_id=proj.id, shot_id=s.id, job_id=job.id, label=label, mode=mode,
+                       folder=os.path.join(client_dir, label), created_by=job.created_by,
+                       created_at=datetime.utcnow().isoformat())
+        db.session.add(row)
+        try:
+            db.session.commit()
+            return row
+        except IntegrityError:
+            db.session.rollback()  # another send of this shot took this label: try the next one
+    raise JobError(f"no free delivery label left for {today}")
+
+
+def _delivery_failed(job_id):
+    """A send_to_client job failed for good: its delivery will not be finished."""
+    Delivery.query.filter_by(job_id=job_id, status="running").update(
+        {"status": "failed", "finished_at": datetime.utcnow().isoformat()}, synchronize_session=False)
+    db.session.commit()
+
+
+def previous_delivery(shot_id, exclude_id=None):
+    """The shot's last completed Delivery, or None."""
+    q = Delivery.query.filter_by(shot_id=shot_id, status="done")
+    if exclude_id:
+        q = q.filter(Delivery.id != exclude_id)
+    return q.order_by(Delivery.id.desc()).first()
+
+
+@job_handler("send_to_client", on_failure=_delivery_failed)
+def _job_send_to_client(job, params, progress):
+    s, proj = _job_shot(job)
+    copier = delivery_copier(params.get("checksum"))
+    mode = params.get("mode") or "link"
+    delivery = allocate_delivery(proj, s, job, mode)
+    target_base = delivery.folder
     mov_target = os.path.join(target_base, "MOV")
     exr_target = os.path.join(target_base, "EXR")
     os.makedirs(mov_target, exist_ok=True)
     os.makedirs(exr_target, exist_ok=True)
     result = {"mov_copied": None, "exr_copied": None, "target_folder": target_base}
-    try:
-        if s.mov_path and os.path.exists(s.mov_path) and os.path.isfile(s.mov_path):
-            fname = os.path.basename(s.mov_path)
-            tpath = os.path.join(mov_target, fname)
-            shutil.copy2(s.mov_path, tpath)
-            result["mov_copied"] = tpath
-        if s.exr_path:
-            if os.path.isdir(s.exr_path):
-                for f in os.listdir(s.exr_path):
-                    if f.lower().endswith(".exr"):
-                        shutil.copy2(os.path.join(s.exr_path, f), os.path.join(exr_target, f))
-                result["exr_copied"] = exr_target
-            elif os.path.isfile(s.exr_path):
-                fname = os.path.basename(s.exr_path)
-                tpath = os.path.join(exr_target, fname)
-                shutil.copy2(s.exr_path, tpath)
-                result["exr_copied"] = tpath
-        return jsonify(result)
-    except Exception as e:
-        app.logger.exception("send_to_client failed")
-        return jsonify({"error": "copy failed", "detail": str(e)}), 500
+    pairs = []
+    if s.mov_path and fs_stats.isfile(s.mov_path):
+        tpath = os.path.join(mov_target, os.path.basename(s.mov_path))
+        pairs.append((s.mov_path, tpath))
+        result["mov_copied"] = tpath
+    if s.exr_path:
+        if fs_stats.isdir(s.exr_path):
+            pairs.extend(tree_pairs(s.exr_path, exr_target, exts=(".exr",)))
+            result["exr_copied"] = exr_target
+        elif fs_stats.isfile(s.exr_path):
+            tpath = os.path.join(exr_target, os.path.basename(s.exr_path))
+            pairs.append((s.exr_path, tpath))
+            result["exr_copied"] = tpath
+    # unchanged files (same size and mtime as in the last delivery) are linked or left out
+    rel = {src: os.path.relpath(dst, target_base) for src, dst in pairs}
+    prev = previous_delivery(s.id, exclude_id=delivery.id)
+    previous = {}
+    if prev is not None:
+        previous = {os.path.join(target_base, r): e for r, e in json.loads(prev.manifest or "{}").items()}
+    report = copier.copy(pairs, progress=_copy_progress(s.code, progress), previous=previous,
+                         unchanged="omit" if mode == "changed" else "link")
+    fs_stats.invalidate_dir(mov_target)
+    fs_stats.invalidate_dir(exr_target)
+    if report.failed:
+        # already-copied files are skipped on the retry
+        raise IOError(f"{report.failed} file(s) failed to copy: {report.errors[0]['error']}")
+    manifest = {rel[e["src"]]: {k: e[k] for k in ("src", "path", "size", "mtime", "hash", "action")}
+                for e in report.entries}
+    if s.mov_path and manifest.get(rel.get(s.mov_path), {}).get("action") == "unchanged":
+        result["mov_copied"] = None  # "changed" mode: the client already has it
+    delivery.manifest = json.dumps(manifest)
+    delivery.files = len(manifest)
+    delivery.bytes_copied, delivery.bytes_linked = report.bytes_copied, report.bytes_linked
+    delivery.status, delivery.finished_at = "done", datetime.utcnow().isoformat()
+    db.session.commit()
+    result.update(label=delivery.label, delivery_id=delivery.id, mode=mode,
+                  previous_label=prev.label if prev else None, copy=report.to_dict())
+    return result
 
 
 @app.route("/api/shots/<int:shot_id>/start_shot", methods=["POST"])
@@ -895,112 +2960,97 @@ def api_start_shot(shot_id):
     proj = db.session.get(Project, s.project_id)
     if not proj or not proj.folder_path:
         return jsonify({"error": "project folder_path not configured"}), 400
+    return job_accepted(enqueue_job("start_shot", project=proj, shot=s))
 
-    # Determine reel
-    parts = (s.code or "").split("_")
-    raw_reel = s.reel if s.reel and str(s.reel).strip() else (parts[1] if len(parts) >= 2 and parts[1] else "01")
-    if isinstance(raw_reel, str) and raw_reel.strip():
-        rr = raw_reel.strip()
-    else:
-        rr = "01"
-    if rr.lower().startswith("reel"):
-        reel_folder_name = rr
-    else:
-        reel_folder_name = f"Reel_{rr}"
 
+@job_handler("start_shot")
+def _job_start_shot(job, params, progress):
+    s, proj = _job_shot(job)
+    result = start_shot_from_template(proj, s, user=job.created_by)
+    db.session.commit()
+    return result
+
+
+def start_shot_from_template(proj, s, user=None):
+    """Write the project's template for the shot's version to its comp folder; JobError if there is none.
+
+    Templates come from the in-memory library, so the NAS only sees the
+    destination write. The caller commits the registered version.
+    """
     shot_folder = s.code or f"shot_{s.id}"
     shot_version = s.extract_version() or "V1"  # Use extract_version to get version from code
-
-    # Build template folder path
     template_folder = os.path.join(proj.folder_path, "template")
-    
-    app.logger.info(f"Start shot: shot_id={shot_id}, shot_code={s.code}, extracted_version={shot_version}")
-    app.logger.info(f"Template folder: {template_folder}")
-    
-    # Check if template folder exists
-    if not os.path.isdir(template_folder):
-        app.logger.warning(f"Template folder not found: {template_folder}")
-        return jsonify({"error": "Template folder not found"}), 404
-    
-    # List all template files
-    try:
-        template_files = [f for f in os.listdir(template_folder) if f.endswith('.nk')]
-        app.logger.info(f"Template files found: {template_files}")
-    except Exception as e:
-        app.logger.warning(f"Error listing template folder: {e}")
-        return jsonify({"error": "Cannot read template folder"}), 500
-    
-    # Try to find the template file
-    template_path = None
-    template_filename_used = None
-    
-    # Extract just the version number from shot_version (e.g., "001" from "V001")
-    import re
-    version_match = re.search(r'\d+', shot_version)
-    version_number = version_match.group(0) if version_match else ""
-    
-    # Try variations of the template filename
-    possible_names = [
-        f"template_{shot_version}.nk",  # template_V001.nk
-        f"template_v{version_number}.nk",  # template_v001.nk
-        f"template_{shot_version.lower()}.nk",  # template_v001.nk
-    ]
-    
-    app.logger.info(f"Looking for template files matching: {possible_names}")
-    
-    # Case-insensitive search
-    for fname in template_files:
-        fname_lower = fname.lower()
-        for possible_name in possible_names:
-            if fname_lower == possible_name.lower():
-                template_path = os.path.join(template_folder, fname)
-                template_filename_used = fname
-                app.logger.info(f"Found matching template: {fname}")
-                break
-        if template_path:
-            break
-    
-    # If still not found, use the first template_*.nk file
-    if not template_path and template_files:
-        for fname in template_files:
-            if fname.lower().startswith("template_") and fname.lower().endswith(".nk"):
-                template_path = os.path.join(template_folder, fname)
-                template_filename_used = fname
-                app.logger.info(f"Using first available template: {fname}")
-                break
-    
-    # Check if template file exists
-    if not template_path or not os.path.isfile(template_path):
-        app.logger.warning(f"No suitable template file found in: {template_folder}")
-        return jsonify({"error": "File not found"}), 404
 
+    if not nuke_templates.exists(template_folder):
+        app.logger.warning("Template folder not found: %s", template_folder)
+        raise JobError("Template folder not found")
+    # template_<version>.nk (V001 / v001 / v1 all match), else the first template_*.nk
+    tpl = nuke_templates.find(template_folder, shot_version)
+    if tpl is None:
+        app.logger.warning("No suitable template file found in: %s", template_folder)
+        raise JobError("File not found")
+
+    # Destination: Comps/<Reel_xx>/<shot_code>/Comp/<shot_code>_comp_<version>.nk
+    comp_dir = os.path.join(proj.folder_path, "Comps", shot_reel(s)[1], shot_folder, "Comp")
+    os.makedirs(comp_dir, exist_ok=True)
+    dest_filename = f"{shot_folder}_comp_{shot_version}.nk"
+    dest_path = os.path.join(comp_dir, dest_filename)
+    nuke_templates.write(tpl, dest_path)
+    version_number = version_key(shot_version)
+    if isinstance(version_number, int):
+        register_version(s, "comp", version_number, dest_path, source="start_shot", user=user)
+
+    app.logger.info("Start shot %s (%s): %s -> %s", s.id, s.code, tpl.name, dest_path)
+    return {
+        "message": f"Shot started! Template copied to {dest_filename}",
+        "dest_path": dest_path,
+        "template": tpl.name,
+    }
+
+
+@app.route("/api/projects/<int:project_id>/start_shots", methods=["POST"])
+@app.route("/api/projects/<int:project_id>/reels/<reel>/start_shots", methods=["POST"])
+def api_project_start_shots(project_id, reel=None):
+    """Start every shot of a project (or one reel) from its template in a single job.
+
+    JSON (optional): {"shot_ids": [...]}. The job result has one entry per shot.
+    """
+    proj = Project.query.get_or_404(project_id)
+    uid = session.get("user_id")
+    current = db.session.get(User, uid) if uid else None
+    if not current or current.role not in ("admin", "producer", "supervisor"):
+        return jsonify({"error": "forbidden"}), 403
+    if not proj.folder_path:
+        return jsonify({"error": "project folder_path not configured"}), 400
+    data = request.get_json(silent=True) or {}
     try:
-        # Build destination path
-        comp_base = os.path.join(proj.folder_path, "Comps")
-        reel_dir = os.path.join(comp_base, reel_folder_name)
-        shot_dir = os.path.join(reel_dir, shot_folder)
-        comp_dir = os.path.join(shot_dir, "Comp")
-        
-        # Ensure comp directory exists
-        os.makedirs(comp_dir, exist_ok=True)
-        
-        # Destination filename: <shot_code>_comp_<version>.nk
-        dest_filename = f"{shot_folder}_comp_{shot_version}.nk"
-        dest_path = os.path.join(comp_dir, dest_filename)
-        
-        app.logger.info(f"Copying {template_path} to {dest_path}")
-        
-        # Copy the file
-        shutil.copy2(template_path, dest_path)
-        
-        app.logger.info(f"Successfully copied template for shot {shot_id}")
-        return jsonify({
-            "message": f"Shot started! Template copied to {dest_filename}",
-            "dest_path": dest_path
-        }), 200
-    except Exception as e:
-        app.logger.exception("start_shot failed")
-        return jsonify({"error": "copy failed", "detail": str(e)}), 500
+        shot_ids = shot_ids_arg(data.get("shot_ids"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    n = _structure_shots_query(project_id, reel, shot_ids).count()
+    if not n:
+        return jsonify({"error": "no matching shots"}), 404
+    job = enqueue_job("start_shot_batch", {"reel": reel, "shot_ids": shot_ids}, project=proj)
+    return jsonify({"job_id": job.id, "job": job.to_dict(), "shots": n}), 202
+
+
+@job_handler("start_shot_batch")
+def _job_start_shot_batch(job, params, progress):
+    proj = db.session.get(Project, job.project_id)
+    if not proj or not proj.folder_path:
+        raise JobError("project folder_path not configured")
+    ids = [r.id for r in _structure_shots_query(proj.id, params.get("reel"), params.get("shot_ids"))]
+    shots = Shot.query.filter(Shot.id.in_(ids)).order_by(Shot.id).all() if ids else []
+    started, errors = [], []
+    for i, s in enumerate(shots, 1):
+        try:
+            r = start_shot_from_template(proj, s, user=job.created_by)
+            started.append({"shot_id": s.id, "code": s.code, "dest_path": r["dest_path"], "template": r["template"]})
+        except Exception as e:
+            errors.append({"shot_id": s.id, "code": s.code, "error": str(e)})
+        db.session.commit()  # registered version; keeps the transaction short between progress updates
+        progress(i / len(shots), f"{i}/{len(shots)} shots")
+    return {"started": started, "errors": errors}
 
 
 @app.route("/api/projects/<int:project_id>/export_csv")
@@ -1123,10 +3173,9 @@ def api_import_csv(project_id):
                 errors.append({"line": line_no, "error": "missing code"})
                 continue
 
+            derived = derive_fields(code, reel, version)
             if not version:
-                m = re.search(r"[Vv](\d+)", code)
-                if m:
-                    version = f"V{m.group(1)}"
+                version = derived["version_label"] or ""
 
             # build mapping for bulk insert (reel stored separately, code unchanged)
             mapping = {
@@ -1143,6 +3192,7 @@ def api_import_csv(project_id):
                 "exr_path": exr_path,
                 "version": version,
             }
+            mapping.update(derived)
             to_insert.append(mapping)
     else:
         # No headers - fallback to positional mapping (legacy behavior)
@@ -1216,10 +3266,9 @@ def api_import_csv(project_id):
                 errors.append({"line": line_no, "error": "missing code"})
                 continue
 
+            derived = derive_fields(code, reel, version)
             if not version:
-                m = re.search(r"[Vv](\d+)", code)
-                if m:
-                    version = f"V{m.group(1)}"
+                version = derived["version_label"] or ""
 
             mapping = {
                 "project_id": project_id,
@@ -1235,6 +3284,7 @@ def api_import_csv(project_id):
                 "exr_path": exr_path,
                 "version": version,
             }
+            mapping.update(derived)
             to_insert.append(mapping)
 
     # Perform bulk insert for speed
@@ -1258,6 +3308,11 @@ def api_import_csv(project_id):
                 db.session.bulk_insert_mappings(Shot, filtered_rows)
                 db.session.commit()
                 imported = len(filtered_rows)
+                # one query to recover ids of the inserted shots for the history log
+                new_codes = [m["code"] for m in filtered_rows]
+                rows = db.session.query(Shot.id, Shot.project_id, Shot.code).filter(Shot.project_id == project_id, Shot.code.in_(new_codes)).all()
+                record_shot_history([history_event({"id": r.id, "project_id": r.project_id, "code": r.code}, "import", user=current) for r in rows])
+                prefetch_thumbnails(filtered_rows)
         except Exception as e:
             db.session.rollback()
             errors.append({"error": "bulk insert failed", "detail": str(e)})
@@ -1372,7 +3427,161 @@ def api_import_preview(project_id):
 def api_project_raw(project_id):
     p = Project.query.get_or_404(project_id)
     shots = Shot.query.filter_by(project_id=project_id).all()
-    return jsonify({"project": p.to_dict(), "shots": [s.to_dict() for s in shots]})
+    return jsonify({"project": p.to_dict(), "shots": shots_to_dicts(project_id, shots, _include_args())})
+
+
+BATCH_MAX_REQUESTS = int(os.environ.get("DC_BATCH_MAX_REQUESTS", 50))
+# Sub-requests run with the caller's session but their session changes are not sent
+# back (there is no Set-Cookie per sub-request), so routes that log in or out are refused.
+# Media and package routes stream files under an admission ticket and are refused too.
+BATCH_EXCLUDED_ENDPOINTS = {"api_batch", "api_login", "api_shot_thumb", "api_shot_media", "api_stream_file",
+                            "api_shot_package", "api_reel_package"}
+
+
+def _run_batch_item(item):
+    """Dispatch one batch sub-request through the full request cycle and return {status, body}.
+
+    before_request/after_request hooks run as for a normal request; the
+    metrics and SQL profile of sub-requests count towards /api/batch itself.
+    """
+    if not isinstance(item, dict):
+        return {"status": 400, "body": {"error": "sub-request must be an object"}}
+    method = (item.get("method") or "GET").upper()
+    path = item.get("path") or ""
+    if not path.startswith("/api/"):
+        return {"status": 400, "body": {"error": "path must be an /api/ route"}}
+    # Forward the caller's cookie so handlers see the same logged-in session
+    headers = {"Cookie": request.headers.get("Cookie", ""), "X-Request-ID": request_id()}
+    kwargs = {"method": method, "headers": headers, "environ_overrides": {"dc.batch": True}}
+    if "body" in item:
+        kwargs["json"] = item.get("body")
+    # Reuses the active app context, so every sub-request shares one db.session
+    with app.test_request_context(path, **kwargs):
+        e = request.routing_exception
+        if e is not None:
+            return {"status": getattr(e, "code", None) or 404, "body": {"error": getattr(e, "name", "Not Found")}}
+        if request.endpoint in BATCH_EXCLUDED_ENDPOINTS:
+            return {"status": 400, "body": {"error": f"{request.path} cannot be batched"}}
+        try:
+            resp = app.full_dispatch_request()
+        except Exception as e:
+            db.session.rollback()
+            app.logger.exception("batch sub-request failed: %s %s", method, path)
+            return {"status": 500, "body": {"error": "sub-request failed", "detail": str(e)}}
+        try:
+            if resp.is_json:
+                return {"status": resp.status_code, "body": resp.get_json()}
+            if resp.status_code >= 400:
+                return {"status": resp.status_code, "body": {"error": HTTP_STATUS_CODES.get(resp.status_code, "error")}}
+            return {"status": 400, "body": {"error": "only JSON endpoints can be batched"}}
+        finally:
+            resp.close()  # frees admission tickets and file handles held by streamed bodies
+
+
+@app.route("/api/batch", methods=["POST"])
+def api_batch():
+    """Run several API calls in one round trip.
+
+    Expects JSON {"requests": [{"method": "GET", "path": "/api/shots/1", "body": {...}}, ...]}
+    and returns {"responses": [{"status": 200, "body": {...}}, ...]} in the same order.
+    Only JSON routes can be batched: /api/login and the media/package streaming routes are refused.
+    """
+    data = request.get_json(silent=True) or {}
+    items = data.get("requests")
+    if not isinstance(items, list):
+        return jsonify({"error": "requests (list) required"}), 400
+    if len(items) > BATCH_MAX_REQUESTS:
+        return jsonify({"error": f"at most {BATCH_MAX_REQUESTS} requests per batch"}), 400
+    return jsonify({"responses": [_run_batch_item(it) for it in items]})
+
+
+@app.route("/api/projects/<int:project_id>/scan_media", methods=["POST"])
+def api_project_scan_media(project_id):
+    """Start a background media index scan of the project folder."""
+    proj = Project.query.get_or_404(project_id)
+    uid = session.get("user_id")
+    current = db.session.get(User, uid) if uid else None
+    if not current or current.role not in ("admin", "producer", "supervisor"):
+        return jsonify({"error": "forbidden"}), 403
+    if not proj.folder_path:
+        return jsonify({"error": "project folder_path not configured"}), 400
+    if not start_media_scan(project_id):
+        return jsonify({"error": "a media scan is already running", "started": False, "running": True}), 409
+    return jsonify({"started": True, "running": True}), 202
+
+
+@app.route("/api/projects/<int:project_id>/media_index")
+def api_project_media_index(project_id):
+    """Last media scan state for a project."""
+    Project.query.get_or_404(project_id)
+    state = db.session.get(MediaScan, project_id)
+    with _media_scans_lock:
+        running = project_id in _media_scans_running
+    return jsonify({"scan": state.to_dict() if state else None, "running": running})
+
+
+@app.route("/api/projects/<int:project_id>/validate_paths", methods=["GET", "POST"])
+def api_project_validate_paths(project_id):
+    """POST queues a check of every stored plate/mov/exr path; GET returns the stored results.
+
+    GET lists only paths that are not "ok" unless ?all=1; no filesystem access.
+    """
+    proj = Project.query.get_or_404(project_id)
+    if request.method == "POST":
+        uid = session.get("user_id")
+        current = db.session.get(User, uid) if uid else None
+        if not current or current.role not in ("admin", "producer", "supervisor"):
+            return jsonify({"error": "forbidden"}), 403
+        return job_accepted(enqueue_job("validate_paths", project=proj))
+    counts = dict(db.session.query(PathCheck.status, func.count(PathCheck.id))
+                  .filter(PathCheck.project_id == project_id).group_by(PathCheck.status).all())
+    q = PathCheck.query.filter_by(project_id=project_id)
+    if not request.args.get("all"):
+        q = q.filter(PathCheck.status != "ok")
+    checked_at = db.session.query(func.max(PathCheck.checked_at)).filter(PathCheck.project_id == project_id).scalar()
+    return jsonify({"project_id": project_id, "checked_at": checked_at, "statuses": counts,
+                    "paths": [r.to_dict() for r in q.order_by(PathCheck.shot_id, PathCheck.field).all()]})
+
+
+@app.route("/api/projects/<int:project_id>/usage", methods=["GET", "POST"])
+def api_project_usage(project_id):
+    """Disk usage rollups from the last scan (GET, no filesystem access); POST queues a rescan.
+
+    POST {"full": true} re-lists every directory instead of only changed ones.
+    """
+    proj = Project.query.get_or_404(project_id)
+    if request.method == "POST":
+        uid = session.get("user_id")
+        current = db.session.get(User, uid) if uid else None
+        if not current or current.role not in ("admin", "producer", "supervisor"):
+            return jsonify({"error": "forbidden"}), 403
+        if not proj.folder_path:
+            return jsonify({"error": "project folder_path not configured"}), 400
+        data = request.get_json(silent=True) or {}
+        return job_accepted(enqueue_job("disk_usage", {"full": bool(data.get("full"))}, project=proj))
+    state = db.session.get(UsageScan, project_id)
+    out = {"project_id": project_id, "scan": state.to_dict() if state else None,
+           "areas": {}, "reels": {}, "client": {}, "shots": {}}
+    scopes = {"area": "areas", "reel": "reels", "client": "client", "shot": "shots"}
+    codes = dict(db.session.query(Shot.id, Shot.code).filter_by(project_id=project_id).all())
+    for r in UsageRollup.query.filter_by(project_id=project_id).all():
+        entry = {"bytes": r.bytes, "files": r.files}
+        if r.scope == "project":
+            out["total"] = entry
+        elif r.scope == "shot":
+            entry["code"] = codes.get(int(r.key))
+            out["shots"][r.key] = entry
+        elif r.scope in scopes:
+            out[scopes[r.scope]][r.key] = entry
+    return jsonify(out)
+
+
+@app.route("/api/shots/<int:shot_id>/media")
+def api_shot_media_index(shot_id):
+    """Indexed media for one shot, newest first."""
+    s = Shot.query.get_or_404(shot_id)
+    rows = ShotMedia.query.filter_by(project_id=s.project_id, shot_id=shot_id).order_by(ShotMedia.mtime.desc()).all()
+    return jsonify([m.to_dict() for m in rows])
 
 
 @app.route("/api/open_folder", methods=["POST"])
@@ -1407,6 +3616,82 @@ def api_open_folder():
         return jsonify({"error": str(e)}), 500
 
 
+@app.route("/api/jobs")
+def api_jobs():
+    """Recent jobs, newest first; filter with ?status=&project_id=&shot_id=&kind=&limit=."""
+    q = Job.query
+    for col in ("status", "kind"):
+        if request.args.get(col):
+            q = q.filter(getattr(Job, col) == request.args[col])
+    for col in ("project_id", "shot_id"):
+        if request.args.get(col, type=int):
+            q = q.filter(getattr(Job, col) == request.args.get(col, type=int))
+    limit = min(max(request.args.get("limit", 50, type=int), 1), 500)
+    return jsonify([j.to_dict() for j in q.order_by(Job.id.desc()).limit(limit).all()])
+
+
+@app.route("/api/jobs/<int:job_id>")
+def api_job(job_id):
+    """Status, progress, result and error of one job."""
+    job = Job.query.get_or_404(job_id)
+    if job.status == "queued":
+        start_job_workers()  # make sure this process is serving the queue
+    return jsonify(job.to_dict())
+
+
+@app.route("/api/jobs/<int:job_id>/retry", methods=["POST"])
+def api_job_retry(job_id):
+    """Queue a failed job again with a fresh attempt budget."""
+    job = Job.query.get_or_404(job_id)
+    uid = session.get("user_id")
+    current = db.session.get(User, uid) if uid else None
+    if not current or current.role not in ("admin", "producer", "supervisor"):
+        return jsonify({"error": "forbidden"}), 403
+    if job.status != "failed":
+        return jsonify({"error": f"job is {job.status}"}), 409
+    job.status, job.attempts, job.run_after, job.error, job.finished_at = "queued", 0, 0.0, None, None
+    db.session.commit()
+    start_job_workers()
+    _job_wakeup.set()
+    return job_accepted(job)
+
+
+@app.route("/api/proxy_cache")
+def api_proxy_cache():
+    """Size, queue depth and failures of the review proxy cache."""
+    return jsonify(proxies.stats())
+
+
+@app.route("/api/media_admission")
+def api_media_admission():
+    """Active, waiting and shed media requests per storage root."""
+    return jsonify(media_gate.stats())
+
+
+@app.route("/api/stat_cache")
+def api_stat_cache():
+    """Hit ratio and saved NAS stat time for the media path stat cache."""
+    return jsonify(fs_stats.stats())
+
+
+@app.route("/_metrics")
+def prometheus_metrics():
+    """Prometheus text exposition of this process's request metrics."""
+    if METRICS_TOKEN and request.headers.get("Authorization") != f"Bearer {METRICS_TOKEN}":
+        return jsonify({"error": "forbidden"}), 403
+    stat = fs_stats.stats()
+    logs = log_queue.stats()
+    gauges = {
+        "media_inflight": media_gate.stats()["inflight"],
+        "stat_cache_hit_ratio": stat["hit_ratio"],
+        "stat_cache_entries": stat["entries"],
+        "log_queue_depth": logs["queued"],
+        "log_records_dropped": logs["dropped"],
+        "log_records_sampled_out": logs["sampled_out"],
+    }
+    return Response(metrics.render(gauges), mimetype="text/plain; version=0.0.4")
+
+
 @app.route("/_health")
 def health():
     return jsonify({"ok": True})
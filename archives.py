@@ -0,0 +1,243 @@
+"""Streaming ZIP/TAR archives assembled on the fly from files on disk.
+
+Members are stored as-is (ZIP method 0 / plain TAR): media is already
+compressed, so recompressing only costs CPU. The archive layout is computed
+from names, sizes and mtimes before any data is read, which gives an exact
+Content-Length and lets a byte range be served without producing the bytes
+before it, so interrupted downloads can resume. Memory use is one read
+buffer per download and nothing is written to temp files.
+
+ZIP members use a data descriptor, so each CRC is computed while the file
+streams; CRCs are remembered per (path, size, mtime) so a resumed download
+does not re-read files already sent. ZIP64 records are used when sizes or
+offsets need them.
+"""
+import os
+import time
+import zlib
+import struct
+import hashlib
+import tarfile
+import threading
+from collections import OrderedDict
+
+CHUNK = 1024 * 1024
+
+_crc_cache = OrderedDict()  # (path, size, mtime_ns) -> crc32
+_crc_lock = threading.Lock()
+CRC_CACHE_ENTRIES = 100000
+
+
+class Member:
+    def __init__(self, arcname, path, st):
+        self.arcname = arcname.replace(os.sep, "/").lstrip("/")
+        self.path = path
+        self.size = st.st_size
+        self.mtime = st.st_mtime
+        self.mtime_ns = st.st_mtime_ns
+        self.crc = None
+
+    @property
+    def _crc_key(self):
+        return (self.path, self.size, self.mtime_ns)
+
+
+def members_for(pairs):
+    """[Member] for (arcname, path) pairs, skipping paths that cannot be stat'ed."""
+    out = []
+    for arcname, path in pairs:
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        out.append(Member(arcname, path, st))
+    return out
+
+
+# -- segments: the archive is a fixed sequence of byte ranges --
+class _Bytes:
+    def __init__(self, data):
+        self.data = data
+        self.length = len(data)
+
+    def read(self, lo, hi):
+        yield self.data[lo:hi]
+
+
+class _Lazy:
+    """Bytes of known length that depend on CRCs, built when first emitted."""
+    def __init__(self, length, build):
+        self.length = length
+        self._build = build
+
+    def read(self, lo, hi):
+        data = self._build()
+        assert len(data) == self.length
+        yield data[lo:hi]
+
+
+class _FileData:
+    def __init__(self, member, want_crc):
+        self.member = member
+        self.length = member.size
+        self.want_crc = want_crc
+
+    def read(self, lo, hi):
+        m = self.member
+        crc = 0 if (self.want_crc and lo == 0 and hi == self.length) else None
+        remaining = hi - lo
+        with open(m.path, "rb") as fh:
+            fh.seek(lo)
+            while remaining > 0:
+                buf = fh.read(min(CHUNK, remaining))
+                if not buf:
+                    raise IOError(f"{m.path} changed while streaming")
+                remaining -= len(buf)
+                if crc is not None:
+                    crc = zlib.crc32(buf, crc)
+                yield buf
+        if crc is not None:
+            m.crc = crc
+            _remember_crc(m)
+
+
+def _remember_crc(m):
+    with _crc_lock:
+        _crc_cache[m._crc_key] = m.crc
+        _crc_cache.move_to_end(m._crc_key)
+        while len(_crc_cache) > CRC_CACHE_ENTRIES:
+            _crc_cache.popitem(last=False)
+
+
+def _crc_of(m):
+    """CRC32 of a member: already computed, remembered from an earlier download, or read now."""
+    if m.crc is None:
+        with _crc_lock:
+            m.crc = _crc_cache.get(m._crc_key)
+    if m.crc is None:
+        crc = 0
+        with open(m.path, "rb") as fh:
+            while True:
+                buf = fh.read(CHUNK)
+                if not buf:
+                    break
+                crc = zlib.crc32(buf, crc)
+        m.crc = crc
+        _remember_crc(m)
+    return m.crc
+
+
+class Archive:
+    """A stream of `members` in "zip" or "tar" format."""
+
+    def __init__(self, members, fmt="zip"):
+        if fmt not in ("zip", "tar"):
+            raise ValueError("format must be zip or tar")
+        self.fmt = fmt
+        self.members = members
+        self.segments = self._zip_segments() if fmt == "zip" else self._tar_segments()
+        self.size = sum(seg.length for seg in self.segments)
+
+    @property
+    def mimetype(self):
+        return "application/zip" if self.fmt == "zip" else "application/x-tar"
+
+    @property
+    def etag(self):
+        h = hashlib.sha1(self.fmt.encode())
+        for m in self.members:
+            h.update(f"{m.arcname}|{m.size}|{m.mtime_ns}\n".encode("utf-8", "surrogateescape"))
+        return h.hexdigest()
+
+    def iter_bytes(self, start=0, end=None):
+        """Yield archive bytes start..end (inclusive)."""
+        end = self.size - 1 if end is None else min(end, self.size - 1)
+        pos = 0
+        for seg in self.segments:
+            seg_end = pos + seg.length
+            if seg_end > start and pos <= end and seg.length:
+                yield from seg.read(max(start - pos, 0), min(end + 1 - pos, seg.length))
+            if pos > end:
+                break
+            pos = seg_end
+
+    # -- TAR --
+    def _tar_segments(self):
+        segs = []
+        for m in self.members:
+            info = tarfile.TarInfo(m.arcname)
+            info.size = m.size
+            info.mtime = int(m.mtime)
+            info.mode = 0o644
+            segs.append(_Bytes(info.tobuf(format=tarfile.PAX_FORMAT, encoding="utf-8", errors="surrogateescape")))
+            segs.append(_FileData(m, want_crc=False))
+            pad = (-m.size) % tarfile.BLOCKSIZE
+            if pad:
+                segs.append(_Bytes(b"\0" * pad))
+        segs.append(_Bytes(b"\0" * tarfile.BLOCKSIZE * 2))
+        return segs
+
+    # -- ZIP (stored, data descriptors, ZIP64 when needed) --
+    def _zip_segments(self):
+        segs, central = [], []
+        offset = 0
+        for m in self.members:
+            name = m.arcname.encode("utf-8", "surrogateescape")
+            zip64 = m.size >= 0xFFFFFFFF or offset >= 0xFFFFFFFF
+            dostime, dosdate = _dos_datetime(m.mtime)
+            flags = 0x08 | 0x800  # data descriptor, UTF-8 names
+            version = 45 if zip64 else 20
+            if zip64:
+                extra = struct.pack("<HHQQ", 0x0001, 16, m.size, m.size)
+                sizes = (0xFFFFFFFF, 0xFFFFFFFF)
+            else:
+                extra = b""
+                sizes = (0, 0)
+            local = struct.pack("<IHHHHHIIIHH", 0x04034b50, version, flags, 0, dostime, dosdate,
+                                0, sizes[0], sizes[1], len(name), len(extra)) + name + extra
+            segs.append(_Bytes(local))
+            segs.append(_FileData(m, want_crc=True))
+            if zip64:
+                segs.append(_Lazy(24, lambda m=m: struct.pack("<IIQQ", 0x08074b50, _crc_of(m), m.size, m.size)))
+            else:
+                segs.append(_Lazy(16, lambda m=m: struct.pack("<IIII", 0x08074b50, _crc_of(m), m.size, m.size)))
+            central.append((m, name, offset, version, flags, dostime, dosdate))
+            offset += len(local) + m.size + (24 if zip64 else 16)
+
+        cd_start = offset
+        cd_len = 0
+        for m, name, local_offset, version, flags, dostime, dosdate in central:
+            fields, big_size = [], m.size >= 0xFFFFFFFF
+            if big_size:
+                fields += [m.size, m.size]
+            if local_offset >= 0xFFFFFFFF:
+                fields.append(local_offset)
+            extra = struct.pack("<HH" + "Q" * len(fields), 0x0001, 8 * len(fields), *fields) if fields else b""
+            ver = 45 if fields else version
+            size32 = 0xFFFFFFFF if big_size else m.size
+            off32 = min(local_offset, 0xFFFFFFFF)
+            length = 46 + len(name) + len(extra)
+
+            def build(m=m, name=name, extra=extra, ver=ver, flags=flags, dostime=dostime, dosdate=dosdate,
+                      size32=size32, off32=off32):
+                return struct.pack("<IHHHHHHIIIHHHHHII", 0x02014b50, (3 << 8) | ver, ver, flags, 0, dostime, dosdate,
+                                   _crc_of(m), size32, size32, len(name), len(extra), 0, 0, 0, 0o100644 << 16,
+                                   off32) + name + extra
+            segs.append(_Lazy(length, build))
+            cd_len += length
+
+        count = len(central)
+        need64 = cd_start >= 0xFFFFFFFF or cd_len >= 0xFFFFFFFF or count >= 0xFFFF
+        if need64:
+            zip64_eocd_offset = cd_start + cd_len
+            segs.append(_Bytes(struct.pack("<IQHHIIQQQQ", 0x06064b50, 44, 45, 45, 0, 0, count, count, cd_len, cd_start)))
+            segs.append(_Bytes(struct.pack("<IIQI", 0x07064b50, 0, zip64_eocd_offset, 1)))
+        segs.append(_Bytes(struct.pack("<IHHHHIIH", 0x06054b50, 0, 0, min(count, 0xFFFF), min(count, 0xFFFF),
+                                       min(cd_len, 0xFFFFFFFF), min(cd_start, 0xFFFFFFFF), 0)))
+        return segs
+
+
+def _dos_datetime(mtime):
+    t = time.localtime(mtime)
+    year = min(max(t.tm_year, 1980), 2107)
+    return (t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2), ((year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Backfill the derived shot columns (version_label, version_num, sequence,
+reel_name, reel_folder) for existing rows.
+
+New and updated shots get these at write time; run this once after
+create_mysql_db.py has added the columns, and again after changing
+DC_SHOT_CODE_PATTERN.
+
+Usage: python3 backfill_shot_codes.py [--batch 1000]
+"""
+import sys
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from app import app, db, Shot
+from shot_codes import derive_fields
+
+
+def backfill(batch_size=1000):
+    """Recompute derived fields for every shot, walking ids in keyset batches."""
+    updated = 0
+    last_id = 0
+    while True:
+        rows = (db.session.query(Shot.id, Shot.code, Shot.reel, Shot.version)
+                .filter(Shot.id > last_id).order_by(Shot.id).limit(batch_size).all())
+        if not rows:
+            break
+        mappings = [dict(id=r.id, **derive_fields(r.code, r.reel, r.version)) for r in rows]
+        db.session.bulk_update_mappings(Shot, mappings)
+        db.session.commit()
+        updated += len(rows)
+        last_id = rows[-1].id
+        print(f"   ✓ {updated} shots updated")
+    return updated
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--batch", type=int, default=1000, help="rows per commit")
+    args = ap.parse_args()
+    print("🔧 Backfilling derived shot code fields...")
+    with app.app_context():
+        total = backfill(args.batch)
+    print(f"\n✅ Backfill complete: {total} shots")
@@ -0,0 +1,11 @@
+"""API benchmark suite: synthetic studio data, scripted workloads, baselines.
+
+- datagen.py seeds users, projects, shots and comments and writes a fake
+  storage tree (plates, EXR sequences, movies, Nuke templates);
+- workloads.py holds the user actions that are timed (list, filter, import,
+  export, bulk_update, thumbnail, stream);
+- runner.py drives them through the in-process test client or over HTTP and
+  computes percentiles and baseline comparisons.
+
+Run ``python3 -m bench --help`` from the repository root.
+"""
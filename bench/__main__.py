@@ -0,0 +1,154 @@
+"""
+Benchmark the DC Projects API on a synthetic studio.
+
+Seeds a throwaway database (SQLite by default, or any SQLAlchemy URL whose
+database name contains "bench", e.g. a MySQL stand-in) and a fake storage
+tree, then runs each workload with concurrent clients and prints p50/p95/p99
+latency and throughput. The database and tree are rebuilt on every run, so
+runs with the same options make the same requests against the same data.
+
+--save-baseline stores the results as JSON; --baseline compares a run
+against them and exits with status 1 when a workload regressed.
+
+Modes:
+  client  in-process Flask test client: handler and database cost only
+  http    real HTTP: starts gunicorn with --workers processes on the seeded
+          database (or uses --base for a server you started on it yourself)
+
+Usage:
+  python3 -m bench --shots 2000 --clients 8 --save-baseline bench_baseline.json
+  python3 -m bench --shots 2000 --clients 8 --baseline bench_baseline.json
+  python3 -m bench --mode http --workers 4 --workloads list,filter,thumbnail,stream
+"""
+import os
+import sys
+import json
+import shutil
+import argparse
+import tempfile
+from urllib.parse import urlsplit
+
+from .datagen import Scale, seed
+from .workloads import WORKLOADS
+from .runner import AppClient, HttpClient, start_gunicorn, run_workload, compare, format_table
+
+
+def _check_db_url(ap, url):
+    """Refuse URLs that could point at a real database: the bench drops every table."""
+    parts = urlsplit(url)
+    if parts.scheme.startswith("sqlite"):
+        return
+    if "bench" not in parts.path.lower():
+        ap.error(f"--db {url}: the database name must contain 'bench' (all tables are dropped)")
+
+
+def main():
+    ap = argparse.ArgumentParser(prog="python3 -m bench", description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--workdir", default=os.path.join(tempfile.gettempdir(), "dc_bench"),
+                    help="database file, storage tree and caches go here")
+    ap.add_argument("--db", help="SQLAlchemy URL (default: SQLite in --workdir)")
+    ap.add_argument("--projects", type=int, default=Scale().projects)
+    ap.add_argument("--shots", type=int, default=Scale().shots, help="shots per project")
+    ap.add_argument("--comments", type=int, default=Scale().comments, help="comments per shot")
+    ap.add_argument("--users", type=int, default=Scale().users)
+    ap.add_argument("--reels", type=int, default=Scale().reels, help="reels per project")
+    ap.add_argument("--frames", type=int, default=Scale().frames, help="EXR frames per shot")
+    ap.add_argument("--mov-kb", type=int, default=Scale().mov_kb, help="size of each shot's movie")
+    ap.add_argument("--seed", type=int, default=Scale().seed)
+    ap.add_argument("--workloads", default=",".join(WORKLOADS), help="comma-separated, run in this order")
+    ap.add_argument("--mode", choices=["client", "http"], default="client")
+    ap.add_argument("--workers", type=int, default=4, help="gunicorn workers (http mode)")
+    ap.add_argument("--base", help="use this running server instead of starting gunicorn (http mode)")
+    ap.add_argument("--clients", type=int, default=4, help="concurrent clients per workload")
+    ap.add_argument("--requests", type=int, default=200, help="timed requests per workload")
+    ap.add_argument("--seconds", type=float, help="run each workload for this long instead of --requests")
+    ap.add_argument("--warmup", type=int, default=5, help="untimed requests per client first")
+    ap.add_argument("--import-rows", type=int, default=50, help="rows per CSV import")
+    ap.add_argument("--batch-size", type=int, default=20, help="shots per bulk update")
+    ap.add_argument("--range-kb", type=int, default=32, help="byte range per stream request (0 = whole movie)")
+    ap.add_argument("--baseline", help="compare against this results file")
+    ap.add_argument("--save-baseline", help="write results to this file")
+    ap.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown vs baseline (0.2 = 20%%)")
+    args = ap.parse_args()
+
+    names = [n.strip() for n in args.workloads.split(",") if n.strip()]
+    unknown = [n for n in names if n not in WORKLOADS]
+    if unknown:
+        ap.error(f"unknown workload(s) {', '.join(unknown)}; choose from {', '.join(WORKLOADS)}")
+    scale = Scale(args.projects, args.shots, args.comments, args.users, args.reels, args.frames, args.mov_kb, args.seed)
+    workdir = os.path.abspath(args.workdir)
+    storage = os.path.join(workdir, "storage")
+    db_url = args.db or f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    _check_db_url(ap, db_url)
+
+    # app.py reads its configuration at import time
+    os.environ.update({
+        "DC_DATABASE_URL": db_url,
+        "DC_PROJECTS_ROOT": storage,
+        "DC_THUMB_CACHE_DIR": os.path.join(workdir, "thumbs"),
+        "DC_PROXY_CACHE_DIR": os.path.join(workdir, "proxies"),
+    })
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import app as appmod
+
+    print(f"🔧 Seeding {scale.projects} project(s) x {scale.shots} shots into {db_url}...")
+    shutil.rmtree(storage, ignore_errors=True)
+    shutil.rmtree(os.environ["DC_THUMB_CACHE_DIR"], ignore_errors=True)
+    os.makedirs(storage, exist_ok=True)
+    with appmod.app.app_context():
+        appmod.db.drop_all()
+        appmod.db.create_all()
+        appmod.ensure_db()
+        ctx = seed(appmod, storage, scale)
+    ctx.update(import_rows=args.import_rows, batch_size=args.batch_size, range_kb=args.range_kb, mov_kb=args.mov_kb)
+
+    server = None
+    if args.mode == "http":
+        base = args.base
+        if not base:
+            print(f"🔧 Starting gunicorn with {args.workers} worker(s)...")
+            server, base = start_gunicorn(args.workers, dict(os.environ))
+        make_client = lambda: HttpClient(base)
+    else:
+        make_client = lambda: AppClient(appmod.app)
+
+    results = {}
+    try:
+        for name in names:
+            print(f"📈 {name}...")
+            results[name] = run_workload(name, make_client, ctx, clients=args.clients, requests=args.requests,
+                                         seconds=args.seconds, warmup=args.warmup, seed=args.seed)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+
+    meta = {"scale": scale._asdict(), "mode": args.mode, "clients": args.clients,
+            "workers": args.workers if args.mode == "http" else None}
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            saved = json.load(f)
+        baseline = saved["results"]
+        if saved.get("meta") != meta:
+            print(f"⚠️  baseline was recorded with different options: {saved.get('meta')}")
+    print(format_table(results, baseline))
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump({"meta": meta, "results": results}, f, indent=2)
+        print(f"✓ Results saved to {args.save_baseline}")
+    if baseline is not None:
+        problems = compare(results, baseline, tolerance=args.tolerance)
+        if problems:
+            print("❌ Regressions against baseline:")
+            for p in problems:
+                print(f"   {p}")
+            return 1
+        print("✅ No regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
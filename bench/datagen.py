@@ -0,0 +1,141 @@
+"""Synthetic studio data: users, projects, shots and comments in the database,
+plus a matching fake storage tree for each project.
+
+Everything is derived from a seed, so two runs with the same ``Scale`` get
+the same codes, assignments, statuses and file sizes. Each project folder
+looks like a real one:
+
+    <storage>/<Project>/template/template_V001.nk
+    <storage>/<Project>/Plates/<code>/<code>.png           plate_path (thumbnail source)
+    <storage>/<Project>/Render/<code>/<code>.1001.exr ...  exr_path (frame sequence)
+    <storage>/<Project>/Dailies/<code>.mov                 mov_path (stream source)
+    <storage>/<Project>/Comps/Reel_<nn>/<code>/
+
+Frames and movies are random bytes: the app only stats, lists, copies and
+streams them.
+"""
+import os
+import zlib
+import random
+import struct
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+Scale = namedtuple("Scale", "projects shots comments users reels frames mov_kb seed")
+Scale.__new__.__defaults__ = (2, 500, 3, 20, 4, 4, 64, 1)
+
+STATUSES = ("Not Started", "In Progress", "Pending Review", "Approved", "On Hold", "Final")
+ROLES = ("artist", "artist", "artist", "lead", "supervisor", "producer")
+WORDS = ("sky", "replacement", "cleanup", "roto", "paint", "grade", "retime", "keying", "set", "extension",
+         "crowd", "fx", "smoke", "wire", "removal", "beauty", "fix", "matte", "track", "stabilise")
+
+
+def _png(width, height, rgb):
+    """A solid-colour RGB PNG, written without Pillow."""
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+    row = b"\x00" + bytes(rgb) * width
+    return (b"\x89PNG\r\n\x1a\n"
+            + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(row * height))
+            + chunk(b"IEND", b""))
+
+
+def shot_code(seq, reel, n):
+    return f"{seq}_{reel:02d}_{n * 10:04d}_V001"
+
+
+def project_plan(scale, index):
+    """Shots of project `index` as dicts of Shot columns (no paths yet), in a seeded order."""
+    rng = random.Random(f"{scale.seed}:{index}")
+    seqs = ["".join(rng.choice("ABCDEFGHJKLMNPRSTW") for _ in range(2)) for _ in range(max(1, scale.reels))]
+    start = datetime(2025, 1, 6) + timedelta(days=7 * index)
+    shots = []
+    for n in range(scale.shots):
+        reel = n % max(1, scale.reels) + 1
+        due = start + timedelta(days=rng.randrange(10, 120))
+        shots.append({
+            "code": shot_code(seqs[reel - 1], reel, n + 1),
+            "reel": f"{reel:02d}",
+            "description": " ".join(rng.sample(WORDS, 3)),
+            "status": rng.choice(STATUSES),
+            "start_date": start.strftime("%Y-%m-%d"),
+            "due_date": due.strftime("%Y-%m-%d"),
+            "version": "V001",
+        })
+    return shots
+
+
+def build_storage(project_dir, shots, scale, rng):
+    """Write the fake storage tree for one project and fill in each shot's media paths."""
+    os.makedirs(os.path.join(project_dir, "template"), exist_ok=True)
+    with open(os.path.join(project_dir, "template", "template_V001.nk"), "w") as f:
+        f.write("#! nuke\nversion 14.0\nRoot {\n inputs 0\n name template\n}\n")
+    frame = rng.randbytes(4096)
+    for i, s in enumerate(shots):
+        code = s["code"]
+        plate_dir = os.path.join(project_dir, "Plates", code)
+        exr_dir = os.path.join(project_dir, "Render", code)
+        os.makedirs(plate_dir, exist_ok=True)
+        os.makedirs(exr_dir, exist_ok=True)
+        os.makedirs(os.path.join(project_dir, "Comps", f"Reel_{s['reel']}", code), exist_ok=True)
+        os.makedirs(os.path.join(project_dir, "Dailies"), exist_ok=True)
+        plate = os.path.join(plate_dir, f"{code}.png")
+        with open(plate, "wb") as f:
+            f.write(_png(64, 36, ((i * 37) % 256, (i * 91) % 256, (i * 13) % 256)))
+        for n in range(scale.frames):
+            with open(os.path.join(exr_dir, f"{code}.{1001 + n}.exr"), "wb") as f:
+                f.write(frame)
+        mov = os.path.join(project_dir, "Dailies", f"{code}.mov")
+        with open(mov, "wb") as f:
+            f.write(rng.randbytes(scale.mov_kb * 1024))
+        s.update(plate_path=plate, exr_path=exr_dir, mov_path=mov)
+
+
+def seed(appmod, storage_root, scale, progress=print):
+    """Create the synthetic studio in appmod's database (tables must be empty) and on disk.
+
+    Returns {"projects": [{"id", "name", "shot_ids", "reels", "artists"}], "users": [usernames]}.
+    Call inside an app context.
+    """
+    db, rng = appmod.db, random.Random(scale.seed)
+    pwd_hash = appmod.generate_password_hash("bench")
+    users = [appmod.User(username=f"artist{n:03d}", pwd_hash=pwd_hash, role=ROLES[n % len(ROLES)],
+                         display_name=f"Artist {n:03d}") for n in range(scale.users)]
+    db.session.add_all(users)
+    db.session.commit()
+    artists = [u.display_name for u in users] or ["Administrator"]
+
+    out = {"projects": [], "users": [u.username for u in users]}
+    for p in range(scale.projects):
+        name = f"Bench{p + 1:02d}"
+        project_dir = os.path.join(storage_root, name)
+        proj = appmod.Project(name=name, short=f"B{p + 1:02d}", start_date="2025-01-06", folder_path=project_dir)
+        db.session.add(proj)
+        db.session.commit()
+        shots = project_plan(scale, p)
+        build_storage(project_dir, shots, scale, rng)
+        for s in shots:
+            s["assigned_to"] = rng.choice(artists)
+        rows = [appmod.Shot(project_id=proj.id, **s) for s in shots]
+        db.session.add_all(rows)  # ORM add so the derived code columns are filled
+        db.session.commit()
+        comments = []
+        stamp = datetime(2025, 2, 1)
+        for s in rows:
+            for c in range(scale.comments):
+                author = rng.choice(users) if users else None
+                comments.append({
+                    "shot_id": s.id,
+                    "author": author.display_name if author else "Administrator",
+                    "author_role": author.role if author else "admin",
+                    "text": f"{rng.choice(WORDS)} {rng.choice(WORDS)} needs another pass ({c + 1})",
+                    "created_at": (stamp + timedelta(minutes=rng.randrange(0, 60 * 24 * 90))).isoformat(),
+                })
+        for i in range(0, len(comments), 1000):
+            db.session.bulk_insert_mappings(appmod.Comment, comments[i:i + 1000])
+        db.session.commit()
+        out["projects"].append({"id": proj.id, "name": name, "shot_ids": [s.id for s in rows],
+                                "reels": sorted({s.reel for s in rows}), "artists": artists})
+        progress(f"   ✓ {name}: {len(rows)} shots, {len(comments)} comments, tree at {project_dir}")
+    return out
@@ -0,0 +1,212 @@
+"""Drive workloads through the app and summarise latency, throughput and regressions.
+
+Two clients share one interface, ``request(method, path, json=None,
+upload=None, headers=None) -> (status, nbytes)``:
+
+- ``AppClient`` calls the Flask app in-process through its test client (no
+  network or server overhead, so it isolates handler and database cost);
+- ``HttpClient`` talks to a real server, e.g. gunicorn with several workers,
+  so it also measures process and socket overhead and contention.
+"""
+import os
+import sys
+import time
+import uuid
+import socket
+import random
+import threading
+import subprocess
+import urllib.error
+import urllib.request
+from io import BytesIO
+from json import dumps
+from http.cookiejar import CookieJar
+
+from .workloads import WORKLOADS
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of `values` (0.0 when empty)."""
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+class AppClient:
+    def __init__(self, app, username="admin", password="admin"):
+        self.client = app.test_client()
+        status, _ = self.request("POST", "/api/login", json={"username": username, "password": password})
+        if status != 200:
+            raise RuntimeError(f"login as {username} failed ({status})")
+
+    def request(self, method, path, json=None, upload=None, headers=None):
+        kwargs = {"method": method, "headers": headers or {}, "buffered": True}  # buffered: close like a server
+        if json is not None:
+            kwargs["json"] = json
+        if upload:
+            field, filename, data = upload
+            kwargs["data"] = {field: (BytesIO(data), filename)}
+        resp = self.client.open(path, **kwargs)
+        n = len(resp.get_data())
+        resp.close()
+        return resp.status_code, n
+
+
+class HttpClient:
+    def __init__(self, base, username="admin", password="admin"):
+        self.base = base.rstrip("/")
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(CookieJar()))
+        status, _ = self.request("POST", "/api/login", json={"username": username, "password": password})
+        if status != 200:
+            raise RuntimeError(f"login as {username} failed ({status})")
+
+    def request(self, method, path, json=None, upload=None, headers=None):
+        headers = dict(headers or {})
+        data = None
+        if json is not None:
+            data = dumps(json).encode()
+            headers["Content-Type"] = "application/json"
+        elif upload:
+            data, headers["Content-Type"] = _multipart(*upload)
+        req = urllib.request.Request(self.base + path, data=data, headers=headers, method=method)
+        try:
+            with self.opener.open(req, timeout=120) as resp:
+                return resp.status, len(resp.read())
+        except urllib.error.HTTPError as e:
+            return e.code, len(e.read())
+
+
+def _multipart(field, filename, data):
+    boundary = uuid.uuid4().hex
+    body = (f'--{boundary}\r\nContent-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+            f"Content-Type: application/octet-stream\r\n\r\n").encode() + data + f"\r\n--{boundary}--\r\n".encode()
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+def start_gunicorn(workers, env, threads=4, timeout=60):
+    """Start gunicorn serving app:app on a free local port; returns (process, base URL)."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    cmd = [sys.executable, "-m", "gunicorn", "-w", str(workers), "-k", "gthread", "--threads", str(threads),
+           "-b", f"127.0.0.1:{port}", "--log-level", "warning", "app:app"]
+    proc = subprocess.Popen(cmd, cwd=root, env=env)
+    base = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with status {proc.returncode} (is it installed?)")
+        try:
+            urllib.request.urlopen(base + "/_health", timeout=2).read()
+            return proc, base
+        except OSError:
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError(f"gunicorn did not answer on {base} within {timeout}s")
+
+
+def run_workload(name, make_client, ctx, clients=4, requests=200, seconds=None, warmup=5, seed=1):
+    """Run one workload from `clients` threads; returns its summary dict.
+
+    Each thread makes `requests / clients` requests (or runs for `seconds`
+    when given) after `warmup` untimed ones. Responses with status >= 400 count
+    as errors and are left out of the latency figures.
+    """
+    fn = WORKLOADS[name]
+    latencies, errors, received = [], [0], [0]
+    lock = threading.Lock()
+    per_client = max(1, requests // clients)
+    barrier = threading.Barrier(clients + 1)
+    failures = []
+
+    def worker(n):
+        try:
+            client = make_client()
+            wctx = dict(ctx, worker=n)
+            rng = random.Random(f"{seed}:{name}:{n}")
+            for _ in range(warmup):
+                fn(client, wctx, rng)
+        except Exception as e:
+            failures.append(e)
+            barrier.abort()
+            return
+        try:
+            barrier.wait()
+        except threading.BrokenBarrierError:
+            return
+        deadline = time.monotonic() + seconds if seconds else None
+        done = 0
+        while (time.monotonic() < deadline) if deadline else (done < per_client):
+            t0 = time.perf_counter()
+            status, nbytes = fn(client, wctx, rng)
+            elapsed = time.perf_counter() - t0
+            done += 1
+            with lock:
+                if status >= 400:
+                    errors[0] += 1
+                else:
+                    latencies.append(elapsed)
+                    received[0] += nbytes
+
+    threads = [threading.Thread(target=worker, args=(n,), daemon=True) for n in range(clients)]
+    for t in threads:
+        t.start()
+    try:
+        barrier.wait()
+    except threading.BrokenBarrierError:
+        raise RuntimeError(f"{name}: client setup failed: {failures[0] if failures else 'unknown error'}")
+    t0 = time.monotonic()
+    for t in threads:
+        t.join()
+    elapsed = time.monotonic() - t0
+    return {
+        "requests": len(latencies) + errors[0],
+        "errors": errors[0],
+        "seconds": round(elapsed, 3),
+        "req_per_sec": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "mb_per_sec": round(received[0] / elapsed / 1e6, 3) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+def compare(results, baseline, tolerance=0.2, floor_ms=2.0):
+    """Regressions of `results` against a baseline's results, as a list of messages.
+
+    A workload regresses when its p95 or p99 is more than `tolerance` (a
+    fraction) above the baseline and by at least `floor_ms`, when throughput
+    drops by more than `tolerance`, or when it has errors the baseline did not.
+    """
+    problems = []
+    for name, cur in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        for key in ("p95_ms", "p99_ms"):
+            if cur[key] > base[key] * (1 + tolerance) and cur[key] - base[key] >= floor_ms:
+                problems.append(f"{name}: {key} {base[key]} -> {cur[key]} (+{_pct(cur[key], base[key])})")
+        if base["req_per_sec"] and cur["req_per_sec"] < base["req_per_sec"] * (1 - tolerance):
+            problems.append(f"{name}: req_per_sec {base['req_per_sec']} -> {cur['req_per_sec']} "
+                            f"({_pct(cur['req_per_sec'], base['req_per_sec'])})")
+        if cur["errors"] and not base.get("errors"):
+            problems.append(f"{name}: {cur['errors']} errors (baseline had none)")
+    return problems
+
+
+def _pct(cur, base):
+    return f"{(cur / base - 1) * 100:+.0f}%" if base else "n/a"
+
+
+def format_table(results, baseline=None):
+    cols = ("requests", "errors", "req_per_sec", "p50_ms", "p95_ms", "p99_ms")
+    lines = [f"   {'workload':<12}" + "".join(f"{c:>13}" for c in cols)]
+    for name, r in results.items():
+        line = f"   {name:<12}" + "".join(f"{r[c]:>13}" for c in cols)
+        base = (baseline or {}).get(name)
+        if base:
+            line += f"   p95 {_pct(r['p95_ms'], base['p95_ms'])} vs baseline"
+        lines.append(line)
+    return "\n".join(lines)
@@ -0,0 +1,90 @@
+"""Scripted workloads: one function per user action, timed one request at a time.
+
+A workload is ``fn(client, ctx, rng)`` returning the ``(status, nbytes)`` of
+the request it made (see runner.py for clients). ``ctx`` is the dict returned
+by datagen.seed plus the run options (``import_rows``, ``batch_size``,
+``range_kb``) and a per-client ``worker`` number; ``rng`` is seeded per
+workload and client so a run always makes the same requests.
+"""
+import csv
+from io import StringIO
+
+WORKLOADS = {}
+
+
+def workload(name):
+    def register(fn):
+        WORKLOADS[name] = fn
+        return fn
+    return register
+
+
+def _project(ctx, rng):
+    return rng.choice(ctx["projects"])
+
+
+def _shot(ctx, rng):
+    return rng.choice(_project(ctx, rng)["shot_ids"])
+
+
+@workload("list")
+def list_shots(client, ctx, rng):
+    """Shot list as the UI loads it."""
+    p = _project(ctx, rng)
+    return client.request("GET", f"/api/projects/{p['id']}/shots?include=comments,media")
+
+
+@workload("filter")
+def filter_shots(client, ctx, rng):
+    """Shot list filtered by reel, status and artist."""
+    p = _project(ctx, rng)
+    reel = rng.choice(p["reels"])
+    artist = rng.choice(p["artists"]).split()[-1]
+    return client.request("GET", f"/api/projects/{p['id']}/shots?reel={reel}&status=In+Progress&artist={artist}")
+
+
+@workload("import")
+def import_csv(client, ctx, rng):
+    """CSV upload of `import_rows` new shots (codes unique per client and call)."""
+    p = _project(ctx, rng)
+    ctx["imports"] = n = ctx.get("imports", 0) + 1
+    si = StringIO()
+    cw = csv.writer(si)
+    cw.writerow(["code", "reel", "description", "status", "due_date"])
+    for i in range(ctx["import_rows"]):
+        cw.writerow([f"IMP_{ctx['worker']:02d}_{n:05d}{i:04d}", "09", "imported by bench", "Not Started", "2025-06-30"])
+    return client.request("POST", f"/api/projects/{p['id']}/import_csv",
+                          upload=("file", "bench.csv", si.getvalue().encode()))
+
+
+@workload("export")
+def export_csv(client, ctx, rng):
+    p = _project(ctx, rng)
+    return client.request("GET", f"/api/projects/{p['id']}/export_csv")
+
+
+@workload("bulk_update")
+def bulk_update(client, ctx, rng):
+    """Status change on `batch_size` shots in one /api/batch call, like a multi-select edit."""
+    p = _project(ctx, rng)
+    ids = rng.sample(p["shot_ids"], min(ctx["batch_size"], len(p["shot_ids"])))
+    status = rng.choice(("In Progress", "Pending Review", "Approved"))
+    items = [{"method": "PUT", "path": f"/api/shots/{sid}", "body": {"status": status}} for sid in ids]
+    return client.request("POST", "/api/batch", json={"requests": items})
+
+
+@workload("thumbnail")
+def thumbnail(client, ctx, rng):
+    return client.request("GET", f"/api/shot_thumb/{_shot(ctx, rng)}")
+
+
+@workload("stream")
+def stream(client, ctx, rng):
+    """A `range_kb` byte range of a shot's movie, like a scrubbing player (whole file if 0)."""
+    headers = None
+    if ctx["range_kb"]:
+        size = ctx["mov_kb"] * 1024
+        length = min(size, ctx["range_kb"] * 1024)
+        start = rng.randrange(0, size - length + 1)
+        headers = {"Range": f"bytes={start}-{start + length - 1}"}
+    return client.request("GET", f"/api/shot_media/{_shot(ctx, rng)}?type=mov", headers=headers)
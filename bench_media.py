@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Benchmark concurrent media streaming against a running DC Projects server.
+
+Each client logs in, then repeatedly fetches a shot's media (or any
+/api/stream_file path) for the given duration, either whole or as random
+byte ranges like a scrubbing player. Run it once with the server in plain
+mode and once with DC_MEDIA_OFFLOAD=nginx (or sendfile) behind the proxy,
+and compare throughput and latency.
+
+Usage:
+  python3 bench_media.py --base http://localhost --shot 12 --type mov --clients 16 --seconds 30
+  python3 bench_media.py --base http://localhost --path /mnt/nas/proj/dailies.mov --range 4
+"""
+import json
+import time
+import random
+import argparse
+import threading
+import urllib.request
+from http.cookiejar import CookieJar
+from urllib.parse import quote
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+class Client:
+    def __init__(self, base, username, password):
+        self.base = base.rstrip("/")
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(CookieJar()))
+        req = urllib.request.Request(
+            f"{self.base}/api/login", data=json.dumps({"username": username, "password": password}).encode(),
+            headers={"Content-Type": "application/json"}, method="POST")
+        self.opener.open(req, timeout=30).read()
+
+    def fetch(self, url, byte_range=None, chunk=1024 * 1024):
+        """GET url, draining the body; returns bytes received."""
+        headers = {}
+        if byte_range:
+            headers["Range"] = f"bytes={byte_range[0]}-{byte_range[1]}"
+        total = 0
+        with self.opener.open(urllib.request.Request(url, headers=headers), timeout=120) as resp:
+            while True:
+                buf = resp.read(chunk)
+                if not buf:
+                    break
+                total += len(buf)
+        return total
+
+
+def run(args):
+    if args.path:
+        url = f"{args.base.rstrip('/')}/api/stream_file?path={quote(args.path)}"
+    else:
+        url = f"{args.base.rstrip('/')}/api/shot_media/{args.shot}?type={args.type}"
+    probe = Client(args.base, args.user, args.password)
+    req = urllib.request.Request(url, headers={"Range": "bytes=0-0"})
+    with probe.opener.open(req, timeout=30) as resp:
+        size = int((resp.headers.get("Content-Range") or "/0").rsplit("/", 1)[-1] or 0)
+    range_bytes = int(args.range * 1024 * 1024) if args.range else 0
+
+    latencies, received, errors = [], [0], [0]
+    lock = threading.Lock()
+    deadline = time.monotonic() + args.seconds
+
+    def worker():
+        client = Client(args.base, args.user, args.password)
+        while time.monotonic() < deadline:
+            byte_range = None
+            if range_bytes and size > range_bytes:
+                start = random.randrange(0, size - range_bytes)
+                byte_range = (start, start + range_bytes - 1)
+            t0 = time.perf_counter()
+            try:
+                n = client.fetch(url, byte_range)
+            except Exception:
+                with lock:
+                    errors[0] += 1
+                continue
+            with lock:
+                latencies.append(time.perf_counter() - t0)
+                received[0] += n
+
+    t0 = time.monotonic()
+    threads = [threading.Thread(target=worker) for _ in range(args.clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.monotonic() - t0
+    return {
+        "url": url,
+        "file_bytes": size,
+        "clients": args.clients,
+        "seconds": round(elapsed, 2),
+        "requests": len(latencies),
+        "errors": errors[0],
+        "mb_per_sec": round(received[0] / elapsed / 1e6, 2),
+        "req_per_sec": round(len(latencies) / elapsed, 2),
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(_percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 1),
+    }
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--base", default="http://localhost:8000", help="server (or proxy) URL")
+    ap.add_argument("--user", default="admin")
+    ap.add_argument("--password", default="admin")
+    ap.add_argument("--shot", type=int, help="shot id for /api/shot_media")
+    ap.add_argument("--type", default="mov", choices=["plate", "mov", "exr"])
+    ap.add_argument("--path", help="file for /api/stream_file instead of a shot")
+    ap.add_argument("--clients", type=int, default=8, help="concurrent streams")
+    ap.add_argument("--seconds", type=float, default=20)
+    ap.add_argument("--range", type=float, default=0, help="fetch random ranges of this many MB (0 = whole file)")
+    args = ap.parse_args()
+    if not args.shot and not args.path:
+        ap.error("--shot or --path is required")
+    print("📈 Streaming benchmark...")
+    result = run(args)
+    for k, v in result.items():
+        print(f"   {k:>12}: {v}")
@@ -0,0 +1,298 @@
+"""Parallel, resumable file copies for client deliveries.
+
+A delivery is a list of (source, destination) pairs copied by a bounded
+thread pool. Each file is written to ``<dst>.part`` and renamed into place
+once complete, so a destination that exists always holds a whole file. A
+re-run skips destinations whose size and mtime already match the source
+(os.utime gives each copy the source mtime), which makes an interrupted
+delivery resumable. Transfers use ``os.copy_file_range`` (in-kernel, server-side on
+NFS/SMB mounts that support it), then ``os.sendfile``, then a plain buffered
+loop, falling back once a method is reported unsupported. Optional checksums
+re-read source and destination after the copy.
+
+Delta deliveries pass the manifest of an earlier delivery: a source whose
+size and mtime still match what was delivered then is not copied again but
+hard-linked from the earlier delivery folder (or left out entirely), so a
+re-send after a partial re-render only moves the changed frames.
+"""
+import os
+import time
+import errno
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+log = logging.getLogger(__name__)
+
+# copy_file_range/sendfile errors that mean "not supported here", not "copy failed"
+_UNSUPPORTED = {errno.ENOSYS, errno.EXDEV, errno.EINVAL, errno.EOPNOTSUPP, errno.ENOTSUP, errno.EBADF}
+CHUNK = 64 * 1024 * 1024  # per copy_file_range/sendfile call
+
+
+class CopyReport:
+    def __init__(self, total_files=0, total_bytes=0):
+        self.total_files = total_files
+        self.total_bytes = total_bytes
+        self.copied = 0
+        self.skipped = 0
+        self.linked = 0
+        self.unchanged = 0
+        self.failed = 0
+        self.bytes_copied = 0
+        self.bytes_skipped = 0
+        self.bytes_linked = 0
+        self.bytes_unchanged = 0
+        self.errors = []
+        self.entries = []  # per file: src, dst, size, mtime, action, hash (for delivery manifests)
+        self.started = time.monotonic()
+        self.finished = None
+
+    @property
+    def done_files(self):
+        return self.copied + self.skipped + self.linked + self.unchanged + self.failed
+
+    @property
+    def done_bytes(self):
+        return self.bytes_copied + self.bytes_skipped + self.bytes_linked + self.bytes_unchanged
+
+    @property
+    def seconds(self):
+        return (self.finished or time.monotonic()) - self.started
+
+    @property
+    def bytes_per_sec(self):
+        s = self.seconds
+        return self.bytes_copied / s if s > 0 else 0.0
+
+    def to_dict(self):
+        return {
+            "files": self.total_files,
+            "copied": self.copied,
+            "skipped": self.skipped,
+            "linked": self.linked,
+            "unchanged": self.unchanged,
+            "failed": self.failed,
+            "bytes_total": self.total_bytes,
+            "bytes_copied": self.bytes_copied,
+            "bytes_skipped": self.bytes_skipped,
+            "bytes_linked": self.bytes_linked,
+            "bytes_unchanged": self.bytes_unchanged,
+            "seconds": round(self.seconds, 3),
+            "bytes_per_sec": int(self.bytes_per_sec),
+            "errors": self.errors[:50],
+        }
+
+
+class CopyEngine:
+    def __init__(self, workers=4, buffer_size=8 * 1024 * 1024, checksum=None, mtime_slop=2.0):
+        """
+        workers: parallel file copies (keep low on a single NAS volume)
+        buffer_size: read size for the buffered fallback and checksums
+        checksum: hashlib name ("md5", "sha1", ...) to verify every copied file, or None
+        mtime_slop: seconds of mtime difference still treated as equal (FAT/SMB granularity)
+        """
+        self.workers = max(1, workers)
+        self.buffer_size = buffer_size
+        self.checksum = checksum
+        self.mtime_slop = mtime_slop
+        self._use_cfr = hasattr(os, "copy_file_range")
+        self._use_sendfile = hasattr(os, "sendfile")
+
+    def copy(self, pairs, progress=None, progress_interval=1.0, previous=None, unchanged="link"):
+        """Copy [(src, dst), ...]; returns a CopyReport.
+
+        progress(report) is called from the calling thread at most every
+        `progress_interval` seconds and once at the end.
+
+        previous: {dst: {"path", "size", "mtime", "hash"}} from an earlier
+        delivery. A source whose size and mtime match its entry is not copied:
+        the earlier file is hard-linked to dst (unchanged="link", copying
+        instead where links are not possible) or left out (unchanged="omit").
+        """
+        previous = previous or {}
+        sized = []
+        for src, dst in pairs:
+            try:
+                st = os.stat(src)
+            except OSError as e:
+                sized.append((src, dst, None, str(e)))
+                continue
+            sized.append((src, dst, st, None))
+        report = CopyReport(len(sized), sum(st.st_size for _, _, st, _ in sized if st is not None))
+        for src, _dst, st, err in sized:
+            if st is None:
+                report.failed += 1
+                report.errors.append({"path": src, "error": err})
+
+        todo = []
+        for src, dst, st, _ in sized:
+            if st is None:
+                continue
+            prev = previous.get(dst)
+            if prev is not None and not self._matches(st, prev):
+                prev = None
+            if prev is not None and unchanged == "omit":
+                report.unchanged += 1
+                report.bytes_unchanged += st.st_size
+                report.entries.append(_entry(src, prev["path"], st, "unchanged", prev.get("hash")))
+                continue
+            todo.append((src, dst, st, prev))
+        made_dirs = set()
+        for _src, dst, _st, _prev in todo:
+            d = os.path.dirname(dst)
+            if d not in made_dirs:
+                os.makedirs(d, exist_ok=True)
+                made_dirs.add(d)
+
+        last_report = 0.0
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="copy") as pool:
+            futures = {pool.submit(self._copy_one, src, dst, st, prev): (src, dst, st)
+                       for src, dst, st, prev in todo}
+            for fut in as_completed(futures):
+                src, dst, st = futures[fut]
+                try:
+                    action, digest = fut.result()
+                except Exception as e:
+                    report.failed += 1
+                    report.errors.append({"path": src, "error": str(e)})
+                    log.warning("copy failed for %s: %s", src, e)
+                else:
+                    report.entries.append(_entry(src, dst, st, action, digest))
+                    if action == "copied":
+                        report.copied += 1
+                        report.bytes_copied += st.st_size
+                    elif action == "linked":
+                        report.linked += 1
+                        report.bytes_linked += st.st_size
+                    else:
+                        report.skipped += 1
+                        report.bytes_skipped += st.st_size
+                now = time.monotonic()
+                if progress and now - last_report >= progress_interval:
+                    last_report = now
+                    progress(report)
+        report.finished = time.monotonic()
+        if progress:
+            progress(report)
+        return report
+
+    # -- single file --
+    def _copy_one(self, src, dst, st, prev=None):
+        """Copy one file; returns (action, source digest or None).
+
+        action is "skipped" when an identical destination already exists,
+        "linked" when the earlier delivered copy `prev` was hard-linked.
+        """
+        if self._up_to_date(dst, st):
+            return "skipped", None
+        tmp = f"{dst}.part"
+        try:
+            if prev is not None and self._link(prev["path"], tmp, st):
+                os.replace(tmp, dst)
+                return "linked", prev.get("hash")
+            with open(src, "rb") as fsrc, open(tmp, "wb") as fdst:
+                self._transfer(fsrc, fdst, st.st_size)
+            os.utime(tmp, ns=(st.st_atime_ns, st.st_mtime_ns))
+            digest = None
+            if self.checksum:
+                digest = self._digest(src)
+                if digest != self._digest(tmp):
+                    raise IOError(f"{self.checksum} mismatch after copy")
+            os.replace(tmp, dst)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        return "copied", digest
+
+    def _matches(self, st, prev):
+        # both stats come from the source filesystem, so no mtime slop here
+        return prev.get("size") == st.st_size and prev.get("mtime") == st.st_mtime
+
+    def _link(self, existing, tmp, st):
+        """Hard-link an earlier delivered file; False (copy instead) if it changed or links are unsupported."""
+        try:
+            if os.stat(existing).st_size != st.st_size:
+                return False
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            os.link(existing, tmp)
+        except OSError:
+            return False
+        return True
+
+    def _up_to_date(self, dst, st):
+        try:
+            dst_st = os.stat(dst)
+        except OSError:
+            return False
+        return dst_st.st_size == st.st_size and abs(dst_st.st_mtime - st.st_mtime) <= self.mtime_slop
+
+    def _transfer(self, fsrc, fdst, size):
+        in_fd, out_fd = fsrc.fileno(), fdst.fileno()
+        offset = 0
+        if self._use_cfr:
+            try:
+                while offset < size:
+                    n = os.copy_file_range(in_fd, out_fd, min(CHUNK, size - offset))
+                    if n == 0:
+                        break
+                    offset += n
+                if offset >= size:
+                    return
+            except OSError as e:
+                if e.errno not in _UNSUPPORTED or offset:
+                    raise
+                self._use_cfr = False
+        if self._use_sendfile:
+            try:
+                while offset < size:
+                    n = os.sendfile(out_fd, in_fd, offset, min(CHUNK, size - offset))
+                    if n == 0:
+                        break
+                    offset += n
+                if offset >= size:
+                    return
+            except OSError as e:
+                if e.errno not in _UNSUPPORTED or offset:
+                    raise
+                self._use_sendfile = False
+        # buffered fallback (also finishes a file that grew since it was stat'ed)
+        fsrc.seek(offset)
+        fdst.seek(offset)
+        buf = bytearray(self.buffer_size)
+        view = memoryview(buf)
+        while True:
+            n = fsrc.readinto(buf)
+            if not n:
+                break
+            fdst.write(view[:n])
+
+    def _digest(self, path):
+        h = hashlib.new(self.checksum)
+        buf = bytearray(self.buffer_size)
+        view = memoryview(buf)
+        with open(path, "rb") as f:
+            while True:
+                n = f.readinto(buf)
+                if not n:
+                    break
+                h.update(view[:n])
+        return h.hexdigest()
+
+
+def _entry(src, path, st, action, digest):
+    return {"src": src, "path": path, "size": st.st_size, "mtime": st.st_mtime, "action": action, "hash": digest}
+
+
+def tree_pairs(src_dir, dst_dir, exts=None):
+    """(src, dst) pairs for the files directly inside `src_dir`, optionally filtered by extension."""
+    exts = tuple(e.lower() for e in exts) if exts else None
+    pairs = []
+    with os.scandir(src_dir) as it:
+        for e in it:
+            if exts and not e.name.lower().endswith(exts):
+                continue
+            if e.is_file():
+                pairs.append((e.path, os.path.join(dst_dir, e.name)))
+    pairs.sort()
+    return pairs
@@ -156,6 +156,94 @@ except Exception as e:
     print(f"   ✗ Error adding reel column: {e}")
     sys.exit(1)
 
+# Step 5: Ensure comment (shot_id, id) index exists (create_all only adds it on new tables)
+print(f"\n6️⃣  Ensuring comment pagination index exists...")
+try:
+    conn = pymysql.connect(
+        host=DB_HOST,
+        port=DB_PORT,
+        user=DB_USER,
+        password=DB_PASSWORD,
+        database=DB_NAME
+    )
+    cursor = conn.cursor()
+
+    cursor.execute("""
+        SELECT INDEX_NAME FROM INFORMATION_SCHEMA.STATISTICS
+        WHERE TABLE_NAME='comment' AND TABLE_SCHEMA=%s AND INDEX_NAME='ix_comment_shot_id_id'
+    """, (DB_NAME,))
+
+    if cursor.fetchone():
+        print(f"   ✓ Index already exists")
+    else:
+        print(f"   - Adding index...")
+        cursor.execute("CREATE INDEX ix_comment_shot_id_id ON comment (shot_id, id)")
+        conn.commit()
+        print(f"   ✓ Index added successfully")
+
+    cursor.close()
+    conn.close()
+
+except Exception as e:
+    print(f"   ✗ Error adding comment index: {e}")
+    sys.exit(1)
+
+# Step 6: Ensure derived shot-code columns exist (filled at write time, see shot_codes.py)
+print(f"\n7️⃣  Ensuring derived shot columns exist...")
+try:
+    conn = pymysql.connect(
+        host=DB_HOST,
+        port=DB_PORT,
+        user=DB_USER,
+        password=DB_PASSWORD,
+        database=DB_NAME
+    )
+    cursor = conn.cursor()
+
+    derived_columns = [
+        ("version_label", "VARCHAR(40) NULL"),
+        ("version_num", "INT NULL"),
+        ("sequence", "VARCHAR(100) NULL"),
+        ("reel_name", "VARCHAR(100) NULL"),
+        ("reel_folder", "VARCHAR(100) NULL"),
+    ]
+    added = False
+    for col, ddl in derived_columns:
+        cursor.execute("""
+            SELECT COLUMN_NAME FROM INFORMATION_SCHEMA.COLUMNS
+            WHERE TABLE_NAME='shot' AND TABLE_SCHEMA=%s AND COLUMN_NAME=%s
+        """, (DB_NAME, col))
+        if cursor.fetchone():
+            continue
+        print(f"   - Adding {col} column...")
+        cursor.execute(f"ALTER TABLE shot ADD COLUMN {col} {ddl}")
+        added = True
+
+    derived_indexes = [
+        ("ix_shot_project_reel_folder", "project_id, reel_folder"),
+        ("ix_shot_project_sequence", "project_id, sequence"),
+        ("ix_shot_project_version_num", "project_id, version_num"),
+    ]
+    for name, cols in derived_indexes:
+        cursor.execute("""
+            SELECT INDEX_NAME FROM INFORMATION_SCHEMA.STATISTICS
+            WHERE TABLE_NAME='shot' AND TABLE_SCHEMA=%s AND INDEX_NAME=%s
+        """, (DB_NAME, name))
+        if not cursor.fetchone():
+            print(f"   - Adding index {name}...")
+            cursor.execute(f"CREATE INDEX {name} ON shot ({cols})")
+    conn.commit()
+    print(f"   ✓ Derived shot columns ready")
+    if added:
+        print(f"   ⓘ Run python3 backfill_shot_codes.py to fill existing shots")
+
+    cursor.close()
+    conn.close()
+
+except Exception as e:
+    print(f"   ✗ Error adding derived shot columns: {e}")
+    sys.exit(1)
+
 print(f"\n✅ Database setup complete!")
 print(f"   Database: {DB_NAME}")
 print(f"   Host: {DB_HOST}:{DB_PORT}")
@@ -0,0 +1,165 @@
+"""Incremental disk-usage walk of a project folder.
+
+Every directory under the project root is listed with parallel ``scandir``
+calls (one level at a time) and recorded with its mtime and the size of the
+files directly in it. On the next pass a directory whose mtime is unchanged
+is not listed again: its file list is the same, so its previous totals are
+reused and only its known subdirectories are visited (each still costs one
+stat). Files rewritten in place without a rename do not change their
+directory's mtime; a full pass (no ``known`` state) picks those up. A
+directory that cannot be listed keeps its previous totals and subdirectories
+(from ``known``, or ``fallback`` on a full pass) with its previous mtime, so
+it is listed again next time instead of dropping out of the totals.
+
+Attribution to shots follows the project layout: ``Comps/Reel_xx/<code>``
+folders belong to that shot, and in ``Plates`` and ``Render`` a directory or
+file whose name starts with a shot code (see media_index.match_code) does.
+Only this module touches the filesystem; app.py stores the results in the
+usage_dir / usage_rollup tables.
+"""
+import os
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from media_index import match_code
+
+MATCH_AREAS = ("plates", "render")
+
+# matched: {shot_id: [bytes, files]} for files in this directory attributed by name
+DirUsage = namedtuple("DirUsage", "mtime parent subdirs shot_id files bytes matched")
+
+
+class UsageResult:
+    def __init__(self):
+        self.dirs = {}          # path -> DirUsage for every directory reached this pass
+        self.rescanned = set()  # dirs that were listed again
+        self.errors = []
+
+
+class UsageScanner:
+    def __init__(self, codes, known_dirs, workers=8, fallback=None):
+        """
+        codes: {lower-case shot code: shot id}
+        known_dirs: {path: DirUsage} from the previous scan (empty for a full pass)
+        fallback: {path: DirUsage} used only for directories whose listing fails
+        """
+        self.codes = codes
+        self.known = known_dirs
+        self.fallback = fallback if fallback is not None else known_dirs
+        self.workers = workers
+
+    def scan(self, project_root):
+        result = UsageResult()
+        level = [(os.path.normpath(project_root), (), None, None)]
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="usage-scan") as pool:
+            while level:
+                nxt = []
+                for task, out in zip(level, pool.map(self._visit, level)):
+                    path, rel, parent, _shot_id = task
+                    if out is None:
+                        continue
+                    usage, subdirs, rescanned, err = out
+                    if err:
+                        result.errors.append({"path": path, "error": err})
+                    result.dirs[path] = usage._replace(parent=parent)
+                    if rescanned:
+                        result.rescanned.add(path)
+                    nxt.extend((d, rel + (os.path.basename(d),), path, sid) for d, sid in subdirs)
+                level = nxt
+        return result
+
+    def _child_shot(self, rel, name, is_dir, shot_id):
+        """Shot id an entry named `name` in the directory at `rel` belongs to."""
+        if shot_id is not None:
+            return shot_id
+        area = rel[0].lower() if rel else None
+        if area == "comps" and len(rel) == 2 and is_dir:
+            return self.codes.get(name.lower())
+        if area in MATCH_AREAS:
+            return match_code(name, self.codes)
+        return None
+
+    def _visit(self, task):
+        path, rel, _parent, shot_id = task
+        st = _safe_stat(path)
+        if st is None:
+            return None
+        prev = self.known.get(path)
+        if prev is not None and prev.mtime == st.st_mtime:
+            subdirs = [(d, self.known[d].shot_id if d in self.known else shot_id) for d in prev.subdirs]
+            return prev, subdirs, False, None
+        try:
+            with os.scandir(path) as it:
+                entries = list(it)
+        except OSError as e:
+            prev = prev or self.fallback.get(path)
+            if prev is None:
+                # never listed: mtime None makes the next pass try again
+                return DirUsage(None, None, [], shot_id, 0, 0, {}), [], False, str(e)
+            subdirs = [(d, self.fallback[d].shot_id if d in self.fallback else shot_id) for d in prev.subdirs]
+            return prev, subdirs, False, str(e)
+        subdirs, files, size, matched = [], 0, 0, {}
+        for e in entries:
+            try:
+                if e.is_dir(follow_symlinks=False):
+                    subdirs.append((e.path, self._child_shot(rel, e.name, True, shot_id)))
+                    continue
+                if not e.is_file(follow_symlinks=False):
+                    continue
+                n = e.stat(follow_symlinks=False).st_size
+            except OSError:
+                continue
+            files += 1
+            size += n
+            sid = None if shot_id is not None else self._child_shot(rel, e.name, False, None)
+            if sid is not None:
+                m = matched.setdefault(sid, [0, 0])
+                m[0] += n
+                m[1] += 1
+        usage = DirUsage(st.st_mtime, None, [d for d, _ in subdirs], shot_id, files, size, matched)
+        return usage, subdirs, True, None
+
+
+def rollups(project_root, dirs):
+    """Totals by scope from {path: DirUsage}.
+
+    Returns (tree, groups): tree is {path: (bytes, files)} including
+    subdirectories; groups is {(scope, key): [bytes, files]} for scopes
+    "project", "area" (top-level folder), "client" (Client/<date>) and
+    "shot" (key is the shot id).
+    """
+    root = os.path.normpath(project_root)
+    tree = {p: [d.bytes, d.files] for p, d in dirs.items()}
+    # children before parents: deepest paths first
+    for p in sorted(dirs, key=lambda x: x.count(os.sep), reverse=True):
+        parent = dirs[p].parent
+        if parent in tree:
+            tree[parent][0] += tree[p][0]
+            tree[parent][1] += tree[p][1]
+
+    groups = {}
+
+    def add(scope, key, b, f):
+        g = groups.setdefault((scope, key), [0, 0])
+        g[0] += b
+        g[1] += f
+
+    for p, d in dirs.items():
+        rel = [] if p == root else os.path.relpath(p, root).split(os.sep)
+        add("project", "", d.bytes, d.files)
+        if rel:
+            add("area", rel[0], d.bytes, d.files)
+            if rel[0].lower() == "client" and len(rel) >= 2:
+                add("client", rel[1], d.bytes, d.files)
+        if d.shot_id is not None:
+            add("shot", d.shot_id, d.bytes, d.files)
+        for sid, (b, f) in d.matched.items():
+            add("shot", sid, b, f)
+    return {p: tuple(v) for p, v in tree.items()}, groups
+
+
+def _safe_stat(path):
+    try:
+        return os.stat(path)
+    except OSError:
+        return None
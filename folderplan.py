@@ -0,0 +1,122 @@
+"""Create a large directory tree on a network share in few round trips.
+
+Folder setup for a whole reel or project is planned first: every leaf and
+its ancestors below a base directory are collected into a set, so shared
+parents (``Comps``, ``Comps/Reel_xx``) appear once, then grouped by depth.
+Each depth level is created with plain ``mkdir`` calls spread over a thread
+pool; parents are always done before their children, an existing directory
+costs a single ``FileExistsError`` round trip, and a subtree whose parent
+failed is skipped. A dry run reports the same plan, stat'ing only directories
+whose parent already exists.
+"""
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+MAX_LISTED = 500  # paths returned per category in the summary
+
+
+class FolderPlan:
+    def __init__(self, base):
+        self.base = os.path.normpath(base)
+        self._dirs = set()
+
+    def add(self, path):
+        """Add `path` (under base) and all of its ancestors below base."""
+        path = os.path.normpath(path)
+        rel = os.path.relpath(path, self.base)
+        if rel == "." or rel.startswith(".."):
+            raise ValueError(f"{path} is not under {self.base}")
+        parts = rel.split(os.sep)
+        for i in range(1, len(parts) + 1):
+            self._dirs.add(os.path.join(self.base, *parts[:i]))
+
+    def levels(self):
+        """Planned directories grouped by depth below base, shallowest first."""
+        by_depth = {}
+        for d in self._dirs:
+            by_depth.setdefault(os.path.relpath(d, self.base).count(os.sep), []).append(d)
+        return [sorted(by_depth[k]) for k in sorted(by_depth)]
+
+    def __len__(self):
+        return len(self._dirs)
+
+    def execute(self, workers=8, dry_run=False, progress=None):
+        """Create (or, with dry_run, check) every planned directory. Returns a summary dict.
+
+        progress(done, total) is called after each depth level.
+        """
+        t0 = time.monotonic()
+        done = 0
+        created, existing, errors = [], [], []
+        missing = set()  # dry run: dirs that do not exist yet, so their children need no check
+        failed = set()
+        if dry_run:
+            if not os.path.isdir(self.base):
+                missing.add(self.base)
+        else:
+            try:
+                os.makedirs(self.base, exist_ok=True)
+            except OSError as e:
+                failed.add(self.base)
+                errors.append({"path": self.base, "error": str(e)})
+
+        with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="mkdir") as pool:
+            for level in self.levels():
+                todo = []
+                for d in level:
+                    parent = os.path.dirname(d)
+                    if parent in failed:
+                        failed.add(d)
+                        errors.append({"path": d, "error": "parent not created"})
+                    elif dry_run and parent in missing:
+                        missing.add(d)
+                        created.append(d)
+                    else:
+                        todo.append(d)
+                fn = _exists if dry_run else _mkdir
+                for d, (state, err) in zip(todo, pool.map(fn, todo)):
+                    if state == "created":
+                        created.append(d)
+                    elif state == "missing":
+                        missing.add(d)
+                        created.append(d)
+                    elif state == "existing":
+                        existing.append(d)
+                    else:
+                        failed.add(d)
+                        errors.append({"path": d, "error": err})
+                done += len(level)
+                if progress:
+                    progress(done, len(self._dirs))
+
+        return {
+            "dry_run": dry_run,
+            "base": self.base,
+            "planned": len(self._dirs),
+            "created": len(created),
+            "existing": len(existing),
+            "failed": len(errors),
+            "created_paths": sorted(created)[:MAX_LISTED],
+            "errors": errors[:MAX_LISTED],
+            "seconds": round(time.monotonic() - t0, 3),
+        }
+
+
+def _mkdir(path):
+    try:
+        os.mkdir(path)
+        return "created", None
+    except FileExistsError:
+        if os.path.isdir(path):
+            return "existing", None
+        return "error", "exists and is not a directory"
+    except OSError as e:
+        return "error", str(e)
+
+
+def _exists(path):
+    try:
+        return ("existing", None) if os.path.isdir(path) else ("missing", None)
+    except OSError as e:
+        return "error", str(e)
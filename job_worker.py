@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+Run background jobs (client deliveries, folder/comp creation) outside the
+web server. Set DC_JOB_WORKERS=0 for the gunicorn workers so they only queue
+jobs, and run one or more of these next to them; all of them share the job
+table, and per-storage-root limits (DC_JOB_ROOT_CONCURRENCY) apply across
+processes.
+
+Usage: python3 job_worker.py [--threads N] [--once]
+"""
+import sys
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from app import app, JOB_WORKERS, run_next_job, start_job_workers
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--threads", type=int, default=max(JOB_WORKERS, 1), help="jobs run in parallel")
+    ap.add_argument("--once", action="store_true", help="run queued jobs until none is runnable, then exit")
+    args = ap.parse_args()
+    if args.once:
+        n = 0
+        with app.app_context():
+            while run_next_job("job_worker.py"):
+                n += 1
+        print(f"✅ Ran {n} jobs")
+    else:
+        print(f"⚙️  Job worker running with {args.threads} threads")
+        for t in start_job_workers(args.threads, daemon=False):
+            t.join()
@@ -0,0 +1,148 @@
+"""Non-blocking logging: records are queued and written by a background thread.
+
+The real handlers (stderr, a log file on a slow disk) run on a
+``QueueListener`` thread, so the thread that logs only pays for an enqueue.
+Messages are formatted on that thread too: log with lazy ``%s`` arguments
+(``log.info("Streaming %s", path)``) and the string is only built for
+records that are kept. ``JsonFormatter`` writes one JSON object per line
+with the request id and route the record was logged under, plus any
+``extra=`` fields.
+
+INFO and DEBUG records of busy routes can be sampled: a rate of 0.1 keeps
+one request in ten, decided per request id so a kept request keeps all of
+its lines. Warnings and errors are always kept. When the queue is full,
+records are dropped and counted rather than making the caller wait.
+"""
+import os
+import json
+import queue
+import random
+import zlib
+import logging
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+# attributes every LogRecord has; anything else on a record came from extra=
+_STANDARD = set(logging.LogRecord("", 0, "", 0, "", (), None).__dict__) | {"message", "asctime", "taskName"}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        out = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _STANDARD and value is not None and not key.startswith("_"):
+                out[key] = value
+        if record.exc_info:
+            out["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            out["exc"] = record.exc_text
+        if record.stack_info:
+            out["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(out, default=str)
+
+
+def parse_sample_rates(spec):
+    """{route prefix: rate} from "route=rate,route=rate" (e.g. "/api/shot_media=0.1")."""
+    rates = {}
+    for item in (spec or "").split(","):
+        route, _, rate = item.strip().partition("=")
+        if route and rate:
+            rates[route.strip()] = min(1.0, max(0.0, float(rate)))
+    return rates
+
+
+class _EnqueueHandler(QueueHandler):
+    def __init__(self, owner):
+        super().__init__(None)
+        self.owner = owner
+
+    def emit(self, record):
+        try:
+            self.owner.enqueue(record)
+        except Exception:
+            self.handleError(record)
+
+
+class QueuedLogging:
+    def __init__(self, handlers, context=None, sample_rates=None, queue_size=10000):
+        """
+        handlers: the real handlers, run on the listener thread
+        context: callable returning (request_id, route) for the calling thread, or (None, None)
+        sample_rates: {route prefix: fraction of requests whose INFO/DEBUG records are kept}
+        queue_size: records waiting to be written before new ones are dropped
+        """
+        self.handlers = list(handlers)
+        self.context = context
+        # longest prefix first, so "/api/shot_media/<int:shot_id>" can override "/api/shot_media"
+        self.sample_rates = sorted((sample_rates or {}).items(), key=lambda kv: len(kv[0]), reverse=True)
+        self.queue_size = queue_size
+        self.handler = _EnqueueHandler(self)
+        self.dropped = 0
+        self.sampled_out = 0
+        self._queue = None
+        self._listener = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def install(self, logger, level=logging.INFO):
+        """Route `logger` (usually the root logger) through the queue."""
+        logger.addHandler(self.handler)
+        logger.setLevel(level)
+        self.start()
+
+    def start(self):
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            # first start, or a forked worker: the parent's listener thread did not survive the fork
+            self._queue = queue.Queue(self.queue_size)
+            self._listener = QueueListener(self._queue, *self.handlers, respect_handler_level=True)
+            self._listener.start()
+            self._pid = os.getpid()
+
+    def stop(self):
+        """Write out queued records and stop the listener thread."""
+        with self._lock:
+            if self._listener is not None and self._pid == os.getpid():
+                self._listener.stop()
+            self._listener = self._pid = None
+
+    def _rate(self, route):
+        for prefix, rate in self.sample_rates:
+            if route.startswith(prefix):
+                return rate
+        return 1.0
+
+    def _keep(self, request_id, route):
+        rate = self._rate(route)
+        if rate >= 1.0:
+            return True
+        if request_id:
+            return zlib.crc32(request_id.encode()) % 10000 < rate * 10000
+        return random.random() < rate
+
+    def enqueue(self, record):
+        if self._pid != os.getpid():
+            self.start()
+        request_id, route = self.context() if self.context else (None, None)
+        request_id = getattr(record, "request_id", None) or request_id
+        route = getattr(record, "route", None) or route
+        if record.levelno < logging.WARNING and route and self.sample_rates and not self._keep(request_id, route):
+            self.sampled_out += 1
+            return
+        record.request_id = request_id
+        record.route = route
+        try:
+            self._queue.put_nowait(record)  # unformatted: the listener thread does the work
+        except queue.Full:
+            self.dropped += 1
+
+    def stats(self):
+        return {"queued": self._queue.qsize() if self._queue else 0, "dropped": self.dropped,
+                "sampled_out": self.sampled_out}
@@ -0,0 +1,154 @@
+"""Incremental scanner that maps project media folders to shots.
+
+Walks ``<project>/Plates``, ``<project>/Render`` and ``<project>/Comps/Reel_*/<code>``
+with a thread pool of parallel ``scandir`` calls. A directory whose mtime has
+not changed since the previous scan is not listed again: its direct entries
+are known to be the same, so the scanner only descends into the subdirectories
+recorded last time. A directory that cannot be listed keeps its previous
+state (the scan still descends into its known subdirectories), so a
+transient NAS error does not drop media that is still there. Only this
+module touches the filesystem; app.py stores the results in the
+shot_media / media_scan_dir tables.
+
+Matching: in Plates/Render an entry belongs to a shot when its name is the
+shot code, or starts with the code followed by ``_``, ``.`` or ``-`` (longest
+code wins, case-insensitive), e.g. ``AB_01_010_plate_v002.mov`` or
+``AB_01_010/``. A matched directory (an image sequence, a render version
+tree) is recorded as one item; its mtime is refreshed on every pass. In Comps
+the shot folder ``Reel_xx/<code>`` and its ``Comp`` subfolder are walked for
+``.nk`` scripts.
+"""
+import os
+import re
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+AREAS = (("Plates", "plate"), ("Render", "render"), ("Comps", "comp"))
+MEDIA_EXTS = {".mov", ".mp4", ".m4v", ".mxf", ".avi", ".mkv", ".exr", ".dpx", ".jpg", ".jpeg", ".png", ".tif", ".tiff"}
+MAX_DEPTH = 6
+
+_SPLIT_RE = re.compile(r"[_.\-]")
+
+MediaItem = namedtuple("MediaItem", "shot_id kind path parent_dir is_dir size mtime")
+# shot_id is set for dirs inside a comp shot folder
+DirState = namedtuple("DirState", "mtime parent subdirs shot_id")
+
+
+class ScanResult:
+    def __init__(self):
+        self.dirs = {}          # path -> DirState for every directory reached this pass
+        self.rescanned = set()  # dirs whose entries were re-listed (their media rows must be replaced)
+        self.items = []         # MediaItem found in rescanned dirs
+        self.refreshed = {}     # matched media dir -> current mtime
+        self.errors = []
+
+
+def match_code(name, codes):
+    """Return the shot id whose code `name` starts with (at a separator), or None."""
+    lowered = name.lower()
+    if lowered in codes:
+        return codes[lowered]
+    # try progressively shorter prefixes cut at separators: longest match wins
+    for m in reversed(list(_SPLIT_RE.finditer(lowered))):
+        sid = codes.get(lowered[:m.start()])
+        if sid is not None:
+            return sid
+    return None
+
+
+class MediaScanner:
+    def __init__(self, codes, known_dirs, matched_dirs=(), workers=8):
+        """
+        codes: {lower-case shot code: shot id}
+        known_dirs: {path: DirState} from the previous scan
+        matched_dirs: shot-matched media directories from the previous scan
+        """
+        self.codes = codes
+        self.known = known_dirs
+        self.matched_dirs = list(matched_dirs)
+        self.workers = workers
+
+    def scan(self, project_root):
+        result = ScanResult()
+        level = [(os.path.join(project_root, folder), kind, 0, None, None) for folder, kind in AREAS]
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="media-scan") as pool:
+            while level:
+                nxt = []
+                for task, out in zip(level, pool.map(self._visit, level)):
+                    path, kind, depth, parent, shot_id = task
+                    if out is None:
+                        continue
+                    mtime, subdirs, items, rescanned, err = out
+                    if err:
+                        result.errors.append({"path": path, "error": err})
+                        prev = self.known.get(path)
+                        if prev is None:
+                            continue
+                        # keep the old mtime: the listing is retried on the next pass
+                        mtime = prev.mtime
+                        subdirs = [(d, self.known[d].shot_id if d in self.known else shot_id) for d in prev.subdirs]
+                    result.dirs[path] = DirState(mtime, parent, [d for d, _ in subdirs], shot_id)
+                    if rescanned:
+                        result.rescanned.add(path)
+                        result.items.extend(items)
+                    nxt.extend((d, kind, depth + 1, path, sid) for d, sid in subdirs)
+                level = nxt
+            # matched dirs in unchanged parents were not re-listed: refresh their mtime
+            stale = [p for p in self.matched_dirs
+                     if os.path.dirname(p) in result.dirs and os.path.dirname(p) not in result.rescanned]
+            for p, st in zip(stale, pool.map(_safe_stat, stale)):
+                if st is not None:
+                    result.refreshed[p] = st.st_mtime
+        return result
+
+    def _visit(self, task):
+        path, kind, depth, _parent, shot_id = task
+        st = _safe_stat(path)
+        if st is None:
+            return None
+        prev = self.known.get(path)
+        if prev is not None and prev.mtime == st.st_mtime:
+            subdirs = [(d, self.known[d].shot_id if d in self.known else shot_id) for d in prev.subdirs]
+            return st.st_mtime, subdirs, [], False, None
+        try:
+            with os.scandir(path) as it:
+                entries = list(it)
+        except OSError as e:
+            return st.st_mtime, [], [], False, str(e)
+        subdirs, items = [], []
+        for e in entries:
+            try:
+                is_dir = e.is_dir()
+                if shot_id is not None:
+                    # inside a comp shot folder: scripts, plus the Comp subfolder
+                    if is_dir and e.name.lower() == "comp":
+                        subdirs.append((e.path, shot_id))
+                    elif e.name.lower().endswith(".nk"):
+                        fst = e.stat()
+                        items.append(MediaItem(shot_id, "comp", e.path, path, False, fst.st_size, fst.st_mtime))
+                    continue
+                if kind == "comp":
+                    sid = self.codes.get(e.name.lower()) if depth == 1 and is_dir else None
+                    if sid is not None:
+                        subdirs.append((e.path, sid))
+                    elif is_dir and depth == 0:
+                        subdirs.append((e.path, None))  # Reel_xx
+                    continue
+                sid = None
+                if is_dir or os.path.splitext(e.name)[1].lower() in MEDIA_EXTS:
+                    sid = match_code(e.name, self.codes)
+                if sid is not None:
+                    est = e.stat()
+                    items.append(MediaItem(sid, kind, e.path, path, is_dir, None if is_dir else est.st_size, est.st_mtime))
+                elif is_dir and depth < MAX_DEPTH:
+                    subdirs.append((e.path, None))
+            except OSError:
+                continue
+        return st.st_mtime, subdirs, items, True, None
+
+
+def _safe_stat(path):
+    try:
+        return os.stat(path)
+    except OSError:
+        return None
@@ -0,0 +1,168 @@
+"""In-process request metrics in Prometheus text format.
+
+Per route (the URL rule, e.g. ``/api/shots/<int:shot_id>``, so the label set
+stays small) and method: a latency histogram, request counts by status,
+response bytes, and per-request SQL query count and database time. The web
+layer calls ``begin()`` / ``end()`` around each request and ``add_query()``
+from SQLAlchemy cursor events; the current request is tracked per thread, so
+queries run by background threads are not attributed to any route.
+
+Each process keeps its own numbers (no shared state between gunicorn
+workers); scrape every worker or run one process per port.
+"""
+import time
+import threading
+from bisect import bisect_left
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+class RequestStats:
+    """What one request has done so far (read by Server-Timing and the SQL profiler)."""
+    __slots__ = ("started", "queries", "db_seconds", "extra")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.extra = None  # free slot for other per-request collectors
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class _RouteMetrics:
+    __slots__ = ("latency", "queries", "db_seconds", "bytes", "status")
+
+    def __init__(self):
+        self.latency = _Histogram(LATENCY_BUCKETS)
+        self.queries = _Histogram(QUERY_BUCKETS)
+        self.db_seconds = 0.0
+        self.bytes = 0
+        self.status = {}
+
+
+class Metrics:
+    def __init__(self, prefix="dc"):
+        self.prefix = prefix
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._routes = {}
+        self.started_at = time.time()
+
+    # -- per request --
+    def begin(self):
+        stats = RequestStats()
+        self._local.stats = stats
+        return stats
+
+    def current(self):
+        return getattr(self._local, "stats", None)
+
+    def add_query(self, seconds):
+        stats = getattr(self._local, "stats", None)
+        if stats is not None:
+            stats.queries += 1
+            stats.db_seconds += seconds
+
+    def end(self, route, method, status, nbytes):
+        """Record the current request; returns its RequestStats (None if begin() was not called)."""
+        stats = getattr(self._local, "stats", None)
+        self._local.stats = None
+        if stats is None:
+            return None
+        elapsed = stats.elapsed
+        key = (route, method)
+        with self._lock:
+            m = self._routes.get(key)
+            if m is None:
+                m = self._routes[key] = _RouteMetrics()
+            m.latency.observe(elapsed)
+            m.queries.observe(stats.queries)
+            m.db_seconds += stats.db_seconds
+            m.bytes += nbytes or 0
+            m.status[status] = m.status.get(status, 0) + 1
+        return stats
+
+    # -- exposition --
+    def render(self, gauges=None):
+        """Prometheus text exposition; `gauges` adds {name: value} process-level gauges."""
+        p = self.prefix
+        with self._lock:
+            snapshot = [(k, _copy(m)) for k, m in sorted(self._routes.items())]
+        lines = [
+            f"# HELP {p}_http_request_duration_seconds Time until the response headers are ready.",
+            f"# TYPE {p}_http_request_duration_seconds histogram",
+        ]
+        for (route, method), m in snapshot:
+            lines.extend(_histogram_lines(f"{p}_http_request_duration_seconds", _labels(route, method), m.latency))
+        lines += [f"# HELP {p}_http_requests_total Requests by status code.", f"# TYPE {p}_http_requests_total counter"]
+        for (route, method), m in snapshot:
+            for status, n in sorted(m.status.items()):
+                lines.append(f'{p}_http_requests_total{{{_labels(route, method)},status="{status}"}} {n}')
+        lines += [f"# HELP {p}_http_response_bytes_total Response body bytes (Content-Length).",
+                  f"# TYPE {p}_http_response_bytes_total counter"]
+        for (route, method), m in snapshot:
+            lines.append(f"{p}_http_response_bytes_total{{{_labels(route, method)}}} {m.bytes}")
+        lines += [f"# HELP {p}_db_queries_per_request SQL statements executed per request.",
+                  f"# TYPE {p}_db_queries_per_request histogram"]
+        for (route, method), m in snapshot:
+            lines.extend(_histogram_lines(f"{p}_db_queries_per_request", _labels(route, method), m.queries))
+        lines += [f"# HELP {p}_db_seconds_total Time spent in SQL statements.", f"# TYPE {p}_db_seconds_total counter"]
+        for (route, method), m in snapshot:
+            lines.append(f"{p}_db_seconds_total{{{_labels(route, method)}}} {m.db_seconds:.6f}")
+        lines += [f"# TYPE {p}_process_start_time_seconds gauge", f"{p}_process_start_time_seconds {self.started_at:.3f}"]
+        for name, value in sorted((gauges or {}).items()):
+            lines += [f"# TYPE {p}_{name} gauge", f"{p}_{name} {value}"]
+        return "\n".join(lines) + "\n"
+
+
+def server_timing(stats):
+    """Server-Timing header value for a finished RequestStats."""
+    total = stats.elapsed * 1000
+    db_ms = stats.db_seconds * 1000
+    return f'app;dur={total - db_ms:.1f}, db;dur={db_ms:.1f};desc="{stats.queries} queries", total;dur={total:.1f}'
+
+
+def _copy(m):
+    c = _RouteMetrics()
+    c.latency.counts, c.latency.sum, c.latency.count = list(m.latency.counts), m.latency.sum, m.latency.count
+    c.queries.counts, c.queries.sum, c.queries.count = list(m.queries.counts), m.queries.sum, m.queries.count
+    c.db_seconds, c.bytes, c.status = m.db_seconds, m.bytes, dict(m.status)
+    return c
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(route, method):
+    return f'route="{_escape(route)}",method="{method}"'
+
+
+def _histogram_lines(name, labels, h):
+    lines, cumulative = [], 0
+    for bound, n in zip(h.buckets, h.counts):
+        cumulative += n
+        lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+    lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {h.count}')
+    lines.append(f"{name}_sum{{{labels}}} {h.sum:.6f}")
+    lines.append(f"{name}_count{{{labels}}} {h.count}")
+    return lines
@@ -0,0 +1,152 @@
+"""Bulk existence checks for stored media paths.
+
+Paths are grouped by parent directory and each directory is listed once
+(one ``scandir`` answers for every stored path in it, and for the sibling
+frames that make a path part of a sequence), so thousands of imported paths
+cost one NAS call per folder rather than one per path. Paths that are
+directories (frame folders) are listed as well to find their sequence.
+
+Listings run in a bounded thread pool. A NAS call cannot be interrupted, so
+the timeout is enforced by the caller: a listing still running ``timeout``
+seconds after it started is reported as "timeout" and abandoned, and work not
+started within ``budget`` seconds is reported the same way.
+"""
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from sequences import _FRAME_RE, DEFAULT_EXTS, detect
+
+OK, MISSING, TIMEOUT, ERROR = "ok", "missing", "timeout", "error"
+
+
+def _result(status, is_dir=False, size=None, mtime=None, is_sequence=False, frames=None, error=None):
+    return {"status": status, "is_dir": is_dir, "size": size, "mtime": mtime,
+            "is_sequence": is_sequence, "frames": frames, "error": error}
+
+
+def _list(directory, wanted):
+    """{name: (is_dir, size, mtime)} for one directory; only `wanted` names are stat'ed (others get None)."""
+    out = {}
+    with os.scandir(directory) as it:
+        for e in it:
+            try:
+                if e.name in wanted:
+                    st = e.stat()
+                    out[e.name] = (e.is_dir(), st.st_size, st.st_mtime)
+                else:
+                    out[e.name] = (e.is_dir(), None, None)
+            except OSError:
+                continue
+    return out
+
+
+def _frames(seq_dir, exts):
+    seqs = detect(seq_dir, exts, with_sizes=False)
+    return len(seqs[0].frames) if seqs else None
+
+
+class _Runner:
+    """Runs calls in a pool and collects results, abandoning calls that overrun."""
+
+    def __init__(self, pool, timeout, deadline):
+        self.pool = pool
+        self.timeout = timeout
+        self.deadline = deadline
+
+    def run(self, fn, args, progress=None):
+        """{arg: ("ok", value) | ("error", exc) | ("timeout", None)} for fn(arg) over args."""
+        started = {}
+        results = {}
+
+        def call(arg):
+            started[arg] = time.monotonic()
+            return fn(arg)
+
+        futures = {self.pool.submit(call, a): a for a in args}
+        pending = set(futures)
+        total = len(futures)
+        while pending:
+            done, pending = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+            for f in done:
+                arg = futures[f]
+                try:
+                    results[arg] = ("ok", f.result())
+                except Exception as e:
+                    results[arg] = ("error", e)
+            now = time.monotonic()
+            for f in list(pending):
+                arg = futures[f]
+                t0 = started.get(arg)
+                if (t0 is not None and now - t0 > self.timeout) or (t0 is None and now > self.deadline):
+                    f.cancel()
+                    results[arg] = ("timeout", None)
+                    pending.discard(f)
+            if progress and done:
+                progress(len(results), total)
+        return results
+
+
+def check_paths(paths, workers=16, timeout=10.0, budget=600.0, seq_exts=DEFAULT_EXTS, progress=None):
+    """{path: result dict} for every distinct path in `paths`.
+
+    Result keys: status (ok/missing/timeout/error), is_dir, size, mtime,
+    is_sequence and frames (frame count of the sequence the path is, or is a frame of).
+    `progress(done, total)` is called as directory listings complete.
+    """
+    norm = {p: os.path.normpath(p) for p in paths if p}
+    by_parent = {}
+    for p in set(norm.values()):
+        by_parent.setdefault(os.path.dirname(p), []).append(p)
+    seq_exts = tuple(e.lower() for e in seq_exts)
+    out = {}
+    pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="path-check")
+    try:
+        runner = _Runner(pool, timeout, time.monotonic() + budget)
+        wanted = {parent: {os.path.basename(p) for p in children} for parent, children in by_parent.items()}
+        listed = runner.run(lambda d: _list(d, wanted[d]), list(by_parent), progress)
+        frame_dirs = []
+        for parent, children in by_parent.items():
+            status, value = listed[parent]
+            for p in children:
+                if status == "timeout":
+                    out[p] = _result(TIMEOUT, error=f"listing {parent} timed out")
+                elif status == "error":
+                    missing = isinstance(value, (FileNotFoundError, NotADirectoryError))
+                    out[p] = _result(MISSING if missing else ERROR, error=None if missing else str(value))
+                else:
+                    out[p] = _from_listing(p, value, seq_exts)
+                    if out[p]["is_dir"]:
+                        frame_dirs.append(p)
+        # frame folders: list them too, to report the sequence inside
+        for p, (status, value) in runner.run(lambda d: _frames(d, seq_exts), frame_dirs).items():
+            if status == "ok" and value:
+                out[p].update(is_sequence=True, frames=value)
+            elif status == "timeout":
+                out[p].update(status=TIMEOUT, error="listing timed out")
+    finally:
+        # never join: a call stuck on a dead mount would block the caller forever
+        pool.shutdown(wait=False, cancel_futures=True)
+    return {orig: out[p] for orig, p in norm.items()}
+
+
+def _from_listing(path, listing, seq_exts):
+    name = os.path.basename(path)
+    entry = listing.get(name)
+    if entry is None:
+        return _result(MISSING)
+    is_dir, size, mtime = entry
+    if is_dir:
+        return _result(OK, is_dir=True, mtime=mtime)
+    m = _FRAME_RE.match(name)
+    if m and m.group("ext").lower() in seq_exts:
+        # a frame path: the sequence is its siblings with the same head and extension
+        head, ext = m.group("head"), m.group("ext")
+        frames = 0
+        for other, (odir, _, _) in listing.items():
+            om = _FRAME_RE.match(other)
+            if om and not odir and om.group("head") == head and om.group("ext") == ext:
+                frames += 1
+        if frames > 1:
+            return _result(OK, size=size, mtime=mtime, is_sequence=True, frames=frames)
+    return _result(OK, size=size, mtime=mtime)
@@ -0,0 +1,261 @@
+"""Browser-playable review proxies with a size-bounded on-disk cache.
+
+Movies (often ProRes or DNxHD, which browsers cannot play) are transcoded to a
+low-bitrate H.264 MP4 (or VP9 WebM); EXR sequences become a JPEG sequence
+with a small manifest. Work runs in a bounded background pool using a local
+ffmpeg; callers get "pending" until the proxy is ready. Cache entries are
+keyed by source path, size and mtime (so a re-render produces a new proxy)
+and the least recently served entries are evicted once the cache grows past
+its byte budget.
+"""
+import os
+import glob
+import json
+import shutil
+import hashlib
+import logging
+import threading
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sequences import detect
+from thumbnails import MOVIE_EXTS, EXR_EXTS, find_ffmpeg, _OsFs
+
+log = logging.getLogger(__name__)
+
+READY, PENDING, FAILED, BUSY, UNAVAILABLE = "ready", "pending", "failed", "busy", "unavailable"
+FAILURE_RETRY_SECONDS = 600  # don't retry a failed transcode on every request
+
+
+class ProxyState:
+    def __init__(self, status, path=None, kind=None, error=None, manifest=None):
+        self.status = status
+        self.path = path          # proxy file, or directory of JPEG frames
+        self.kind = kind          # "movie" or "sequence"
+        self.error = error
+        self.manifest = manifest  # sequence: {"frames": [...], "files": [...]}
+
+
+class ProxyCache:
+    def __init__(self, cache_dir, max_bytes=20 * 1024 ** 3, fmt="mp4", height=540, video_bitrate="2M",
+                 jpeg_quality=5, workers=1, max_pending=32, timeout=3600, fs=_OsFs):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.fmt = fmt if fmt in ("mp4", "webm") else "mp4"
+        self.height = height
+        self.video_bitrate = video_bitrate
+        self.jpeg_quality = jpeg_quality
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.fs = fs
+        self.ffmpeg = find_ffmpeg()
+        self._lock = threading.Lock()
+        self._pending = set()
+        self._failed = {}  # key -> (time, error)
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="proxy")
+
+    # -- keys / paths --
+    def _source(self, path):
+        """(kind, source path, stat) for a stored media path, or None if unusable."""
+        path = os.path.normpath(path)
+        st = self.fs.stat(path)
+        if st is None:
+            return None
+        ext = os.path.splitext(path)[1].lower()
+        if self.fs.isdir(path) or ext in EXR_EXTS:
+            return "sequence", path, st
+        if ext in MOVIE_EXTS:
+            return "movie", path, st
+        return None
+
+    def key_for(self, path, st, kind):
+        settings = f"{self.fmt}|{self.height}|{self.video_bitrate}" if kind == "movie" else f"jpg|{self.height}|{self.jpeg_quality}"
+        raw = f"{path}|{st.st_mtime_ns}|{st.st_size}|{settings}"
+        return hashlib.sha1(raw.encode("utf-8", "surrogateescape")).hexdigest()
+
+    def _target(self, key, kind):
+        if kind == "movie":
+            return os.path.join(self.cache_dir, key[:2], f"{key}.{self.fmt}")
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    # -- public API --
+    def get(self, path, start=True):
+        """State of the proxy for `path`; queues generation (when `start`) if it is not cached yet."""
+        src = self._source(path) if path else None
+        if src is None:
+            return ProxyState(FAILED, error="no playable source")
+        kind, source, st = src
+        key = self.key_for(source, st, kind)
+        target = self._target(key, kind)
+        if os.path.exists(target):
+            _touch(target)
+            manifest = _read_manifest(target) if kind == "sequence" else None
+            return ProxyState(READY, target, kind, manifest=manifest)
+        if not self.ffmpeg:
+            return ProxyState(UNAVAILABLE, kind=kind, error="ffmpeg not found")
+        with self._lock:
+            failed = self._failed.get(key)
+            if failed and time.time() - failed[0] < FAILURE_RETRY_SECONDS:
+                return ProxyState(FAILED, kind=kind, error=failed[1])
+            if key in self._pending:
+                return ProxyState(PENDING, kind=kind)
+            if not start:
+                return ProxyState(PENDING, kind=kind)
+            if len(self._pending) >= self.max_pending:
+                return ProxyState(BUSY, kind=kind, error="proxy queue full")
+            self._pending.add(key)
+        self._pool.submit(self._build, key, kind, source, target)
+        return ProxyState(PENDING, kind=kind)
+
+    # -- generation --
+    def _build(self, key, kind, source, target):
+        try:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            tmp = f"{target}.{os.getpid()}.tmp"
+            if kind == "movie":
+                ok, err = self._transcode_movie(source, tmp)
+            else:
+                ok, err = self._transcode_sequence(source, tmp)
+            if ok:
+                os.replace(tmp, target)
+                self._account(keep=target)
+            else:
+                with self._lock:
+                    self._failed[key] = (time.time(), err)
+        except Exception as e:
+            log.exception("proxy build failed for %s", source)
+            with self._lock:
+                self._failed[key] = (time.time(), str(e))
+        finally:
+            _remove(f"{target}.{os.getpid()}.tmp")
+            with self._lock:
+                self._pending.discard(key)
+
+    def _run(self, cmd, source):
+        try:
+            subprocess.run(cmd, check=True, timeout=self.timeout, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        except subprocess.CalledProcessError as e:
+            err = (e.stderr or b"").decode("utf-8", "replace").strip()[-500:]
+            log.warning("ffmpeg proxy failed for %s: %s", source, err)
+            return False, err or str(e)
+        except (subprocess.SubprocessError, OSError) as e:
+            log.warning("ffmpeg proxy failed for %s: %s", source, e)
+            return False, str(e)
+        return True, None
+
+    def _transcode_movie(self, source, out):
+        vf = f"scale=-2:{self.height}:flags=bicubic,format=yuv420p"
+        if self.fmt == "webm":
+            codec = ["-c:v", "libvpx-vp9", "-b:v", self.video_bitrate, "-deadline", "realtime", "-cpu-used", "8",
+                     "-c:a", "libopus", "-b:a", "96k", "-f", "webm"]
+        else:
+            codec = ["-c:v", "libx264", "-preset", "veryfast", "-b:v", self.video_bitrate,
+                     "-maxrate", self.video_bitrate, "-bufsize", self.video_bitrate,
+                     "-c:a", "aac", "-b:a", "128k", "-movflags", "+faststart", "-f", "mp4"]
+        cmd = [self.ffmpeg, "-nostdin", "-loglevel", "error", "-y", "-i", source, "-vf", vf, *codec, out]
+        ok, err = self._run(cmd, source)
+        if ok and not (os.path.exists(out) and os.path.getsize(out) > 0):
+            return False, "empty output"
+        return ok, err
+
+    def _transcode_sequence(self, source, out_dir):
+        directory = source if os.path.isdir(source) else os.path.dirname(source)
+        seqs = detect(directory, exts=tuple(EXR_EXTS))
+        if directory != source:
+            # a single frame path: use the sequence it belongs to
+            name = os.path.basename(source)
+            seqs = [q for q in seqs if name.startswith(q.head) and name.endswith(q.ext)]
+        if not seqs:
+            return False, "no EXR sequence found"
+        seq = seqs[0]
+        os.makedirs(out_dir, exist_ok=True)
+        pattern = os.path.join(glob.escape(directory), glob.escape(seq.head) + "*" + glob.escape(seq.ext))
+        # linear EXR -> sRGB for display
+        cmd = [self.ffmpeg, "-nostdin", "-loglevel", "error", "-y", "-apply_trc", "iec61966_2_1",
+               "-pattern_type", "glob", "-i", pattern,
+               "-vf", f"scale=-2:{self.height}", "-q:v", str(self.jpeg_quality), os.path.join(out_dir, "%06d.jpg")]
+        ok, err = self._run(cmd, source)
+        if not ok:
+            return False, err
+        files = sorted(f for f in os.listdir(out_dir) if f.endswith(".jpg"))
+        if not files:
+            return False, "empty output"
+        # glob input is read in name order, i.e. frame order for a padded sequence
+        manifest = {"pattern": seq.pattern, "frames": seq.frames[:len(files)], "files": files}
+        with open(os.path.join(out_dir, "manifest.json"), "w") as fh:
+            json.dump(manifest, fh)
+        return True, None
+
+    # -- LRU bookkeeping --
+    def _entries(self):
+        entries = []
+        if not os.path.isdir(self.cache_dir):
+            return entries
+        for sub in os.scandir(self.cache_dir):
+            if not sub.is_dir():
+                continue
+            for e in os.scandir(sub.path):
+                if e.name.endswith(".tmp"):
+                    continue
+                try:
+                    size = _tree_size(e.path) if e.is_dir() else e.stat().st_size
+                    entries.append((e.stat().st_mtime, size, e.path))
+                except OSError:
+                    continue
+        return entries
+
+    def _account(self, keep=None):
+        with self._lock:
+            entries = sorted(self._entries())
+            total = sum(e[1] for e in entries)
+            if total <= self.max_bytes:
+                return
+            low_water = int(self.max_bytes * 0.9)
+            for _mtime, size, p in entries:
+                if total <= low_water:
+                    break
+                if p == keep:
+                    continue
+                _remove(p)
+                total -= size
+
+    def stats(self):
+        entries = self._entries()
+        with self._lock:
+            pending, failed = len(self._pending), len(self._failed)
+        return {"entries": len(entries), "bytes": sum(e[1] for e in entries), "max_bytes": self.max_bytes,
+                "pending": pending, "failed": failed, "format": self.fmt, "ffmpeg": bool(self.ffmpeg)}
+
+
+def _touch(path):
+    # mtime doubles as the LRU clock (atime is often disabled)
+    try:
+        os.utime(path, None)
+    except OSError:
+        pass
+
+
+def _tree_size(path):
+    total = 0
+    for e in os.scandir(path):
+        total += e.stat().st_size if e.is_file() else 0
+    return total
+
+
+def _read_manifest(directory):
+    try:
+        with open(os.path.join(directory, "manifest.json")) as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+
+def _remove(path):
+    try:
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        elif os.path.exists(path):
+            os.remove(path)
+    except OSError:
+        pass
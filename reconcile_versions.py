@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Import existing comp and render versions into the version registry
+(shot_version table).
+
+Comp scripts named <code>_comp_vNNN.nk are picked up from both comp folder
+layouts (Comp/<reel>/<code> and Comps/<Reel_xx>/<code>/Comp); renders come
+from the media index, so run scan_media.py first. Already registered
+versions are left alone, so this is safe to re-run.
+
+Usage: python3 reconcile_versions.py [--project ID] [--workers 8]
+"""
+import sys
+import argparse
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, str(Path(__file__).parent))
+from app import app, db, Project, Shot, scan_comp_versions, reconcile_shot_versions
+
+
+def reconcile_project(proj, workers=8):
+    shots = Shot.query.filter_by(project_id=proj.id).order_by(Shot.id).all()
+    # directory listings are the slow part on the NAS: do them in parallel, DB work serially
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        found = list(pool.map(lambda s: scan_comp_versions(proj, s), shots))
+    added = 0
+    for s, comps in zip(shots, found):
+        added += reconcile_shot_versions(proj, s, comp_found=comps)
+    db.session.commit()
+    return len(shots), added
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--project", type=int, help="only reconcile this project id")
+    ap.add_argument("--workers", type=int, default=8, help="parallel directory listings")
+    args = ap.parse_args()
+    print("🔧 Reconciling version registry...")
+    with app.app_context():
+        q = Project.query.filter(Project.folder_path.isnot(None), Project.folder_path != "")
+        if args.project:
+            q = q.filter(Project.id == args.project)
+        total = 0
+        for proj in q.order_by(Project.id).all():
+            n_shots, added = reconcile_project(proj, args.workers)
+            total += added
+            print(f"   ✓ {proj.name}: {n_shots} shots, {added} versions imported")
+    print(f"\n✅ Reconcile complete: {total} versions imported")
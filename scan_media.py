@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Scan project folders (Plates, Render, Comps/Reel_*/<code>) into the shot media
+index. Incremental: only directories whose mtime changed are listed again.
+
+Run from cron, or with --loop to keep scanning every N seconds:
+
+Usage: python3 scan_media.py [--project ID] [--loop SECONDS]
+"""
+import sys
+import time
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from app import app, db, Project, run_media_scan
+
+
+def scan_all(project_id=None):
+    q = db.session.query(Project.id).filter(Project.folder_path.isnot(None), Project.folder_path != "")
+    if project_id:
+        q = q.filter(Project.id == project_id)
+    for (pid,) in q.all():
+        try:
+            summary = run_media_scan(pid)
+        except Exception as e:
+            db.session.rollback()
+            print(f"   ✗ Project {pid}: {e}")
+            continue
+        if summary:
+            print(f"   ✓ Project {pid}: {summary['dirs']} dirs, {summary['rescanned']} re-listed, "
+                  f"{summary['items']} media items in {summary['duration_ms']} ms"
+                  + (" (full rescan)" if summary["full"] else ""))
+            for err in summary["errors"]:
+                print(f"     ⚠ {err['path']}: {err['error']}")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--project", type=int, help="only scan this project id")
+    ap.add_argument("--loop", type=int, default=0, help="repeat every N seconds")
+    args = ap.parse_args()
+    with app.app_context():
+        while True:
+            print("🔍 Scanning media folders...")
+            scan_all(args.project)
+            if not args.loop:
+                break
+            time.sleep(args.loop)
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Size project folders into the disk-usage tables served by
+/api/projects/<id>/usage. Incremental: only directories whose mtime changed
+are listed again, so a weekly cron run only walks what changed; use --full
+to re-list everything (e.g. after files were rewritten in place).
+
+Usage: python3 scan_usage.py [--project ID] [--full]
+"""
+import sys
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from app import app, db, Project, run_usage_scan
+
+
+def _gb(n):
+    return f"{(n or 0) / 1024 ** 3:.1f} GB"
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--project", type=int, help="only scan this project id")
+    ap.add_argument("--full", action="store_true", help="re-list every directory")
+    args = ap.parse_args()
+    print("📦 Sizing project folders...")
+    with app.app_context():
+        q = db.session.query(Project.id, Project.name).filter(Project.folder_path.isnot(None), Project.folder_path != "")
+        if args.project:
+            q = q.filter(Project.id == args.project)
+        for pid, name in q.order_by(Project.id).all():
+            try:
+                summary = run_usage_scan(pid, full=args.full)
+            except Exception as e:
+                db.session.rollback()
+                print(f"   ✗ {name}: {e}")
+                continue
+            print(f"   ✓ {name}: {_gb(summary['bytes'])} in {summary['files']} files, "
+                  f"{summary['rescanned']}/{summary['dirs']} dirs re-listed in {summary['duration_ms']} ms")
+            for err in summary["errors"]:
+                print(f"     ⚠ {err['path']}: {err['error']}")
+    print("\n✅ Disk usage updated")
@@ -0,0 +1,140 @@
+"""Image-sequence detection for frame directories (EXR renders, plates).
+
+Collapses a directory listing into sequences such as ``name.####.exr`` with
+first/last frame, missing frames and total bytes. Results are cached per
+directory and reused until the directory's mtime changes, so delivery checks
+and frame-count reports do not re-list thousands of files each time.
+"""
+import os
+import re
+import stat as stat_mod
+import threading
+from collections import OrderedDict
+
+# head + frame digits + extension, e.g. "AB_01_010_comp_v002." + "1001" + ".exr"
+_FRAME_RE = re.compile(r"^(?P<head>.*?)(?P<frame>\d+)(?P<ext>\.[A-Za-z0-9]+)$")
+
+DEFAULT_EXTS = (".exr",)
+
+
+class Sequence:
+    def __init__(self, directory, head, ext, padding):
+        self.directory = directory
+        self.head = head
+        self.ext = ext
+        self.padding = padding
+        self.frames = []
+        self.total_bytes = 0
+
+    @property
+    def pattern(self):
+        """Display name like AB_01_010.####.exr"""
+        return f"{self.head}{'#' * self.padding}{self.ext}"
+
+    def frame_path(self, frame):
+        return os.path.join(self.directory, f"{self.head}{frame:0{self.padding}d}{self.ext}")
+
+    def missing_ranges(self):
+        """Gaps between first and last frame as [[start, end], ...]."""
+        gaps = []
+        prev = None
+        for f in self.frames:
+            if prev is not None and f > prev + 1:
+                gaps.append([prev + 1, f - 1])
+            prev = f
+        return gaps
+
+    def to_dict(self):
+        missing = self.missing_ranges()
+        return {
+            "pattern": self.pattern,
+            "directory": self.directory,
+            "first": self.frames[0] if self.frames else None,
+            "last": self.frames[-1] if self.frames else None,
+            "count": len(self.frames),
+            "missing": missing,
+            "missing_count": sum(b - a + 1 for a, b in missing),
+            "total_bytes": self.total_bytes,
+        }
+
+
+def detect(directory, exts=DEFAULT_EXTS, with_sizes=True):
+    """List `directory` once and group frame files into sequences (largest first)."""
+    exts = tuple(e.lower() for e in exts)
+    groups = {}
+    with os.scandir(directory) as it:
+        for e in it:
+            m = _FRAME_RE.match(e.name)
+            if not m or m.group("ext").lower() not in exts:
+                continue
+            try:
+                if not e.is_file():
+                    continue
+                size = e.stat().st_size if with_sizes else 0
+            except OSError:
+                continue
+            digits = m.group("frame")
+            key = (m.group("head"), m.group("ext"))
+            seq = groups.get(key)
+            if seq is None:
+                seq = groups[key] = Sequence(directory, m.group("head"), m.group("ext"), len(digits))
+            seq.padding = min(seq.padding, len(digits))
+            seq.frames.append(int(digits))
+            seq.total_bytes += size
+    for seq in groups.values():
+        seq.frames.sort()
+    return sorted(groups.values(), key=lambda s: len(s.frames), reverse=True)
+
+
+class SequenceCache:
+    """detect() results per directory, valid while the directory mtime is unchanged."""
+
+    def __init__(self, max_dirs=1024, stat=None):
+        """`stat(path)` returns a stat result or None (e.g. statcache.StatCache.stat); defaults to os.stat."""
+        self.max_dirs = max_dirs
+        self._stat = stat or _os_stat
+        self._cache = OrderedDict()  # (directory, exts) -> (mtime_ns, sequences)
+        self._lock = threading.Lock()
+
+    def sequences(self, directory, exts=DEFAULT_EXTS):
+        directory = os.path.normpath(directory)
+        st = self._stat(directory)
+        if st is None:
+            return []
+        mtime = st.st_mtime_ns
+        key = (directory, tuple(exts))  # callers asking for other extensions do not evict each other
+        with self._lock:
+            hit = self._cache.get(key)
+            if hit and hit[0] == mtime:
+                self._cache.move_to_end(key)
+                return hit[1]
+        seqs = detect(directory, exts)
+        with self._lock:
+            self._cache[key] = (mtime, seqs)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_dirs:
+                self._cache.popitem(last=False)
+        return seqs
+
+    def for_path(self, path, exts=DEFAULT_EXTS):
+        """Sequences for a stored media path: a frame directory, or the sequence a single frame belongs to."""
+        path = os.path.normpath(path)
+        st = self._stat(path)
+        if st is None:
+            return []
+        if stat_mod.S_ISDIR(st.st_mode):
+            return self.sequences(path, exts)
+        m = _FRAME_RE.match(os.path.basename(path))
+        if not m:
+            return []
+        for seq in self.sequences(os.path.dirname(path), exts):
+            if seq.head == m.group("head") and seq.ext == m.group("ext"):
+                return [seq]
+        return []
+
+
+def _os_stat(path):
+    try:
+        return os.stat(path)
+    except OSError:
+        return None
@@ -0,0 +1,78 @@
+"""Shot-code parsing: derive version, reel and sequence from a shot code.
+
+Parsing runs once when a shot is written (see the Shot mapper events and the
+bulk insert paths in app.py) and the results are stored on the shot, so
+reads never parse again. Existing rows are filled by backfill_shot_codes.py.
+
+The pattern can be overridden with DC_SHOT_CODE_PATTERN, a regex using any of
+the named groups ``sequence``, ``reel`` and ``version`` (digits), e.g.::
+
+    ^(?P<sequence>[A-Za-z]+)_(?P<reel>\\d+)_\\d+(?:_[Vv](?P<version>\\d+))?
+
+Without it the legacy rules apply: sequence and reel are the first and second
+``_``-separated parts of the code, and the version is the first ``V<digits>``.
+"""
+import os
+import re
+
+_VERSION_RE = re.compile(r"[Vv](\d+)")
+_DIGITS_RE = re.compile(r"\d+")
+
+DEFAULT_REEL = "01"
+
+
+class ShotCodeParser:
+    def __init__(self, pattern=None):
+        self.pattern = re.compile(pattern) if pattern else None
+
+    def _split(self, code):
+        """Return (sequence, reel, version digits) parsed from the code alone."""
+        if self.pattern:
+            m = self.pattern.search(code)
+            if not m:
+                return None, None, None
+            groups = m.groupdict()
+            return groups.get("sequence"), groups.get("reel"), groups.get("version")
+        parts = code.split("_")
+        sequence = parts[0] if len(parts) >= 2 and parts[0] else None
+        reel = parts[1] if len(parts) >= 2 and parts[1] else None
+        m = _VERSION_RE.search(code)
+        return sequence, reel, (m.group(1) if m else None)
+
+    def parse(self, code, reel=None, version=None):
+        """Derive the stored fields for a shot.
+
+        `reel` and `version` are the shot's own columns; an explicit reel wins
+        over the code, while a version found in the code wins over the column
+        (matching how the UI has always displayed it).
+        """
+        code = code or ""
+        sequence, code_reel, digits = self._split(code)
+
+        if digits:
+            version_label = f"V{digits}"
+            version_num = int(digits)
+        else:
+            version_label = version or ""
+            m = _DIGITS_RE.search(version_label)
+            version_num = int(m.group(0)) if m else None
+
+        reel_name = str(reel).strip() if reel and str(reel).strip() else code_reel
+        rr = reel_name or DEFAULT_REEL
+        reel_folder = rr if rr.lower().startswith("reel") else f"Reel_{rr}"
+
+        return {
+            "version_label": version_label or None,
+            "version_num": version_num,
+            "sequence": sequence,
+            "reel_name": reel_name,
+            "reel_folder": reel_folder,
+        }
+
+
+parser = ShotCodeParser(os.environ.get("DC_SHOT_CODE_PATTERN") or None)
+
+
+def derive_fields(code, reel=None, version=None):
+    """Shortcut for parser.parse() using the configured pattern."""
+    return parser.parse(code, reel, version)
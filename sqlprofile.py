@@ -0,0 +1,137 @@
+"""Opt-in SQL profiler: slow-statement log, N+1 detection, per-request reports.
+
+Statements are grouped by shape: literals and bound parameters become ``?``
+and ``IN (?, ?, ...)`` lists collapse to ``IN (?)``, so the same query with
+different ids counts as one shape. While a request is being profiled:
+
+- a statement slower than ``slow_ms`` is logged with its bound parameters
+  and the route it ran under;
+- at the end of the request, any shape executed more than ``n_plus_one``
+  times is logged as a likely N+1 (a query inside a loop);
+- ``report()`` summarises every shape by count and time, which the web layer
+  returns for ``?_profile=1`` requests.
+
+The current request is tracked per thread, like metrics.py; statements run by
+background threads are not profiled.
+"""
+import re
+import time
+import logging
+import threading
+
+log = logging.getLogger(__name__)
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PARAM_RE = re.compile(r"%\(\w+\)s|%s|\?|:\w+")
+_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACE_RE = re.compile(r"\s+")
+MAX_PARAM_CHARS = 300
+
+
+def shape(statement):
+    """Normalised statement text used to group executions of the same query."""
+    s = _STRING_RE.sub("?", statement)
+    s = _PARAM_RE.sub("?", s)
+    s = _NUMBER_RE.sub("?", s)
+    s = _IN_LIST_RE.sub("(?)", s)
+    return _SPACE_RE.sub(" ", s).strip()
+
+
+def _short_params(parameters):
+    text = repr(parameters)
+    return text if len(text) <= MAX_PARAM_CHARS else text[:MAX_PARAM_CHARS] + "..."
+
+
+class _Shape:
+    __slots__ = ("count", "seconds", "max_seconds", "example", "params")
+
+    def __init__(self, statement, parameters):
+        self.count = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        self.example = statement
+        self.params = _short_params(parameters)
+
+
+class RequestProfile:
+    def __init__(self, route, detailed=False):
+        self.route = route
+        self.detailed = detailed  # keep every statement in order, for ?_profile=1
+        self.started = time.perf_counter()
+        self.shapes = {}
+        self.statements = []
+        self.slow = []
+
+
+class SqlProfiler:
+    def __init__(self, enabled=False, slow_ms=200.0, n_plus_one=10, max_statements=500):
+        """
+        enabled: profile every request (otherwise only those begun with detailed=True)
+        slow_ms: log statements taking at least this long
+        n_plus_one: flag shapes executed more than this many times in one request
+        max_statements: cap on statements kept for a detailed report
+        """
+        self.enabled = enabled
+        self.slow_ms = slow_ms
+        self.n_plus_one = n_plus_one
+        self.max_statements = max_statements
+        self._local = threading.local()
+
+    def begin(self, route, detailed=False):
+        if not (self.enabled or detailed):
+            self._local.profile = None
+            return None
+        profile = RequestProfile(route, detailed)
+        self._local.profile = profile
+        return profile
+
+    def current(self):
+        return getattr(self._local, "profile", None)
+
+    def record(self, statement, parameters, seconds):
+        profile = getattr(self._local, "profile", None)
+        if profile is None:
+            return
+        key = shape(statement)
+        entry = profile.shapes.get(key)
+        if entry is None:
+            entry = profile.shapes[key] = _Shape(statement, parameters)
+        entry.count += 1
+        entry.seconds += seconds
+        entry.max_seconds = max(entry.max_seconds, seconds)
+        ms = seconds * 1000
+        if profile.detailed and len(profile.statements) < self.max_statements:
+            profile.statements.append({"ms": round(ms, 3), "sql": statement, "params": _short_params(parameters)})
+        if ms >= self.slow_ms:
+            profile.slow.append({"ms": round(ms, 1), "sql": statement, "params": _short_params(parameters)})
+            log.warning("slow query (%.1f ms) in %s: %s -- params %s",
+                        ms, profile.route, _SPACE_RE.sub(" ", statement).strip(), _short_params(parameters))
+
+    def end(self):
+        """Finish the current request's profile: log likely N+1 shapes. Returns the profile (or None)."""
+        profile = getattr(self._local, "profile", None)
+        self._local.profile = None
+        if profile is None:
+            return None
+        for key, entry in profile.shapes.items():
+            if entry.count > self.n_plus_one:
+                log.warning("possible N+1 in %s: %d executions (%.1f ms) of: %s",
+                            profile.route, entry.count, entry.seconds * 1000, key)
+        return profile
+
+    def report(self, profile):
+        """JSON-able summary of a finished profile, slowest shapes first."""
+        shapes = sorted(profile.shapes.items(), key=lambda kv: kv[1].seconds, reverse=True)
+        return {
+            "route": profile.route,
+            "elapsed_ms": round((time.perf_counter() - profile.started) * 1000, 1),
+            "queries": sum(e.count for _, e in shapes),
+            "db_ms": round(sum(e.seconds for _, e in shapes) * 1000, 1),
+            "n_plus_one": [key for key, e in shapes if e.count > self.n_plus_one],
+            "slow": profile.slow,
+            "shapes": [{"shape": key, "count": e.count, "total_ms": round(e.seconds * 1000, 2),
+                        "max_ms": round(e.max_seconds * 1000, 2), "example": e.example, "params": e.params}
+                       for key, e in shapes],
+            "statements": profile.statements,
+        }
@@ -0,0 +1,199 @@
+"""Shared stat() cache for media paths on the NAS.
+
+On SMB every exists/isfile/isdir is a network round trip, so the media
+endpoints go through this cache instead. Results (including "missing") are
+kept for a short TTL. Under roots listed in ``inotify_roots`` (local mounts
+only; inotify does not see changes made over SMB by other machines) entries
+are also dropped as soon as the kernel reports a change in their directory,
+so a longer TTL can be used there.
+
+Stats: hit ratio, and the real stat latency that hits avoided, estimated
+from the average latency of misses.
+"""
+import os
+import stat as stat_mod
+import time
+import logging
+import threading
+
+log = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class StatCache:
+    def __init__(self, ttl=10.0, negative_ttl=3.0, max_entries=50000, inotify_roots=(), inotify_ttl=300.0):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self._entries = {}  # path -> (expires_at, stat_result or _MISSING)
+        self._by_dir = {}  # parent dir -> set of cached paths, for cheap invalidate_dir
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._miss_seconds = 0.0
+        self._watcher = None
+        roots = [os.path.normpath(r) for r in inotify_roots if r]
+        if roots:
+            try:
+                self._watcher = _InotifyWatcher(roots, self.invalidate_dir)
+                self.ttl_watched = inotify_ttl
+            except OSError as e:
+                log.warning("inotify unavailable, using TTL only: %s", e)
+
+    def stat(self, path):
+        """os.stat(path) through the cache; returns None if the path does not exist."""
+        path = os.path.normpath(path)
+        now = time.monotonic()
+        entry = self._entries.get(path)
+        if entry is not None and entry[0] > now:
+            with self._lock:
+                self.hits += 1
+            return None if entry[1] is _MISSING else entry[1]
+
+        t0 = time.perf_counter()
+        try:
+            st = os.stat(path)
+        except (OSError, ValueError):
+            st = None
+        elapsed = time.perf_counter() - t0
+
+        ttl = self.negative_ttl if st is None else self.ttl
+        if self._watcher is not None and self._watcher.watch_parent(path):
+            ttl = max(ttl, self.ttl_watched)
+        with self._lock:
+            self.misses += 1
+            self._miss_seconds += elapsed
+            if len(self._entries) >= self.max_entries:
+                self._prune(now)
+            self._entries[path] = (now + ttl, _MISSING if st is None else st)
+            self._by_dir.setdefault(os.path.dirname(path), set()).add(path)
+        return st
+
+    def exists(self, path):
+        return self.stat(path) is not None
+
+    def isfile(self, path):
+        st = self.stat(path)
+        return st is not None and stat_mod.S_ISREG(st.st_mode)
+
+    def isdir(self, path):
+        st = self.stat(path)
+        return st is not None and stat_mod.S_ISDIR(st.st_mode)
+
+    def _drop(self, path):
+        # caller holds self._lock
+        if self._entries.pop(path, None) is not None:
+            siblings = self._by_dir.get(os.path.dirname(path))
+            if siblings is not None:
+                siblings.discard(path)
+                if not siblings:
+                    del self._by_dir[os.path.dirname(path)]
+
+    def invalidate(self, path):
+        with self._lock:
+            self._drop(os.path.normpath(path))
+
+    def invalidate_dir(self, directory):
+        """Drop the directory and its direct children (used after writes and inotify events)."""
+        directory = os.path.normpath(directory)
+        with self._lock:
+            self._drop(directory)
+            for p in list(self._by_dir.get(directory, ())):
+                self._drop(p)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_dir.clear()
+
+    def _prune(self, now):
+        # drop expired entries first, then the oldest inserted half if still full
+        for p in [p for p, (exp, _) in self._entries.items() if exp <= now]:
+            self._drop(p)
+        if len(self._entries) >= self.max_entries:
+            for p in list(self._entries)[: len(self._entries) // 2]:
+                self._drop(p)
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            avg_miss = self._miss_seconds / self.misses if self.misses else 0.0
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+                "avg_stat_ms": round(avg_miss * 1000, 3),
+                "saved_seconds": round(self.hits * avg_miss, 3),
+                "inotify": self._watcher is not None,
+            }
+
+
+class _InotifyWatcher:
+    """Minimal inotify (Linux) binding via ctypes: watches parent dirs of cached paths under `roots`."""
+
+    MASK = 0x00000002 | 0x00000004 | 0x00000040 | 0x00000080 | 0x00000100 | 0x00000200 | 0x00000400 | 0x00000800
+    # IN_MODIFY | IN_ATTRIB | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+    MAX_WATCHES = 8192
+
+    def __init__(self, roots, on_change):
+        import ctypes
+        import ctypes.util
+        import struct
+        libc_name = ctypes.util.find_library("c")
+        if not libc_name:
+            raise OSError("libc not found")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self._libc, "inotify_init1"):
+            raise OSError("inotify not supported on this platform")
+        self._fd = self._libc.inotify_init1(0o2000000)  # IN_CLOEXEC
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._struct = struct
+        self._roots = roots
+        self._on_change = on_change
+        self._wd_to_dir = {}
+        self._dir_to_wd = {}
+        self._lock = threading.Lock()
+        threading.Thread(target=self._loop, name="statcache-inotify", daemon=True).start()
+
+    def _under_roots(self, path):
+        return any(path == r or path.startswith(r + os.sep) for r in self._roots)
+
+    def watch_parent(self, path):
+        """Ensure the parent dir of `path` is watched; True if it is (so longer TTL is safe)."""
+        directory = os.path.dirname(path)
+        if not self._under_roots(directory):
+            return False
+        with self._lock:
+            if directory in self._dir_to_wd:
+                return True
+            if len(self._dir_to_wd) >= self.MAX_WATCHES:
+                return False
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), self.MASK)
+            if wd < 0:
+                return False
+            self._wd_to_dir[wd] = directory
+            self._dir_to_wd[directory] = wd
+            return True
+
+    def _loop(self):
+        header = self._struct.Struct("iIII")
+        while True:
+            try:
+                buf = os.read(self._fd, 64 * 1024)
+            except OSError:
+                return
+            offset = 0
+            while offset + header.size <= len(buf):
+                wd, mask, _cookie, length = header.unpack_from(buf, offset)
+                offset += header.size + length
+                with self._lock:
+                    directory = self._wd_to_dir.get(wd)
+                    if mask & 0x00008000:  # IN_IGNORED: watch removed (dir deleted)
+                        self._wd_to_dir.pop(wd, None)
+                        if directory:
+                            self._dir_to_wd.pop(directory, None)
+                if directory:
+                    self._on_change(directory)
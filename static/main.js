@@ -110,6 +110,14 @@ async function apiCreateShot(project_id, shotData) {
     body: JSON.stringify(shotData)
   });
 }
+async function apiBulkCreateShots(project_id, shots) {
+  // shots: [{code, reel, description, ...}, ...] -> {created, errors, results: [{index, code, id|error}]}
+  return apiFetch(`/api/projects/${project_id}/shots/bulk`, {
+    method: "POST",
+    headers: {"Content-Type":"application/json"},
+    body: JSON.stringify({shots})
+  });
+}
 async function apiGetShot(shot_id) { return apiFetch(`/api/shots/${shot_id}`); }
 async function apiUpdateShot(shot_id, data) {
   // e.g. {assigned_to: "artist1", status: "In Progress"}
@@ -152,8 +160,20 @@ async function apiGetShotThumbUrl(shot_id) {
 
 /* ---------- Nuke / generate comp / send to client ---------- */
 async function apiGetNukePath(shot_id) { return apiFetch(`/api/shots/${shot_id}/nuke_path`); }
-async function apiGenerateComp(shot_id) { return apiFetch(`/api/shots/${shot_id}/generate_comp`, {method: "POST"}); }
-async function apiSendToClient(shot_id) { return apiFetch(`/api/shots/${shot_id}/send_to_client`, {method: "POST"}); }
+async function apiGenerateComp(shot_id) { return apiJobResult(await apiFetch(`/api/shots/${shot_id}/generate_comp`, {method: "POST"})); }
+async function apiSendToClient(shot_id) { return apiJobResult(await apiFetch(`/api/shots/${shot_id}/send_to_client`, {method: "POST"})); }
+
+/* ---------- Background jobs ---------- */
+async function apiGetJob(job_id) { return apiFetch(`/api/jobs/${job_id}`); }
+// wait for a queued job ({job_id} from a 202 response); resolves with its result, throws on failure
+async function apiJobResult(accepted, intervalMs = 1000) {
+  while (true) {
+    const job = await apiGetJob(accepted.job_id);
+    if (job.status === "done") return job.result;
+    if (job.status === "failed") throw new Error(job.error || "job failed");
+    await new Promise(r => setTimeout(r, intervalMs));
+  }
+}
 
 /* ---------- Export / raw ---------- */
 async function apiExportCSV(project_id, params={}) {
@@ -312,7 +332,7 @@ function renderShots(shots) {
     const nukeTd=document.createElement("td"); const nukeBtn=document.createElement("button"); nukeBtn.textContent="Nuke"; nukeBtn.onclick=async()=>{ try{ const d=await fetchJSON(`/api/shots/${s.id}/nuke_path`); if (d.path) window.open(d.path); else alert("Nuke path not configured"); }catch(e){alert("Error");} }; nukeTd.appendChild(nukeBtn); tr.appendChild(nukeTd);
 
     const actionsTd=document.createElement("td");
-    const genBtn=document.createElement("button"); genBtn.textContent="GenComp"; genBtn.onclick=async(e)=>{ e.stopPropagation(); try{ const res=await fetch(`/api/shots/${s.id}/generate_comp`, {method:"POST"}); const r=await res.json(); if (!res.ok) alert(r.error||"Generate failed"); else alert("Created: "+r.path); loadShots(); }catch(err){alert("Error");} };
+    const genBtn=document.createElement("button"); genBtn.textContent="GenComp"; genBtn.onclick=async(e)=>{ e.stopPropagation(); try{ const r=await apiGenerateComp(s.id); alert("Created: "+r.path); loadShots(); }catch(err){alert(err.message||"Generate failed");} };
     actionsTd.appendChild(genBtn);
     const delBtn=document.createElement("button"); delBtn.textContent="Del"; delBtn.onclick=async(e)=>{ e.stopPropagation(); if (!confirm("Delete?")) return; try{ await fetch(`/api/shots/${s.id}`, {method:"DELETE"}); loadShots(); }catch(err){alert("Error deleting");} };
     actionsTd.appendChild(delBtn);
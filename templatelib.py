@@ -0,0 +1,137 @@
+"""In-memory library of per-project Nuke templates for start_shot.
+
+Each project's ``template`` folder is listed once and indexed by normalised
+version (``template_V001.nk``, ``template_v1.nk`` and ``TEMPLATE_v001.NK`` all
+map to version 1). When several files map to the same version, the one named
+exactly ``template_<version>.nk`` wins, else the first by name. Templates up to ``max_inline`` bytes are kept in memory,
+so starting a shot writes the destination straight from memory instead of
+copying from the NAS. A folder is re-listed only when its mtime changes, and
+a cached template is re-read when its own size or mtime changes (in-place
+saves do not touch the folder mtime).
+"""
+import os
+import re
+import threading
+
+_TEMPLATE_RE = re.compile(r"^template_(?P<ver>.+)\.nk$", re.IGNORECASE)
+# the v<digits> token, not any digits: "2024_v003" is version 3, "rev2" is not a version
+_VERSION_RE = re.compile(r"(?<![a-z])v(\d+)(?!\d)", re.IGNORECASE)
+
+
+def version_key(version):
+    """Normalise a version label for matching: "V001", "v1", "comp_v001", "1" -> 1; other labels lower-cased."""
+    if version is None:
+        return None
+    label = str(version).strip()
+    m = _VERSION_RE.search(label)
+    if m:
+        return int(m.group(1))
+    if label.isdigit():
+        return int(label)
+    return label.lower()
+
+
+class Template:
+    def __init__(self, path, st):
+        self.path = path
+        self.name = os.path.basename(path)
+        self.size = st.st_size
+        self.mtime_ns = st.st_mtime_ns
+        self.data = None  # bytes, for templates up to max_inline
+
+
+class _Folder:
+    def __init__(self, mtime_ns, by_key, default):
+        self.mtime_ns = mtime_ns
+        self.by_key = by_key  # version key -> templates sorted by name
+        self.default = default
+
+
+class TemplateLibrary:
+    def __init__(self, max_inline=4 * 1024 * 1024, stat=None):
+        """`stat(path)` returns a stat result or None (e.g. statcache.StatCache.stat); defaults to os.stat."""
+        self.max_inline = max_inline
+        self._stat = stat or _os_stat
+        self._folders = {}
+        self._lock = threading.Lock()
+        self.reloads = 0
+
+    def _folder(self, folder):
+        # a cached "missing" is re-checked: the folder is often created right after a failed start
+        st = self._stat(folder) or _os_stat(folder)
+        if st is None:
+            with self._lock:
+                self._folders.pop(folder, None)
+            return None
+        cached = self._folders.get(folder)
+        if cached is not None and cached.mtime_ns == st.st_mtime_ns:
+            return cached
+        with os.scandir(folder) as it:
+            templates = sorted((Template(e.path, e.stat()) for e in it if _TEMPLATE_RE.match(e.name) and e.is_file()),
+                               key=lambda t: t.name)
+        by_key = {}
+        for tpl in templates:
+            by_key.setdefault(version_key(_TEMPLATE_RE.match(tpl.name).group("ver")), []).append(tpl)
+        # fallback template: first template_*.nk by name
+        default = templates[0] if templates else None
+        entry = _Folder(st.st_mtime_ns, by_key, default)
+        with self._lock:
+            self._folders[folder] = entry
+            self.reloads += 1
+        return entry
+
+    def exists(self, folder):
+        return self._folder(folder) is not None
+
+    def find(self, folder, version):
+        """Template for `version` in `folder`, else the folder's default template, else None.
+
+        Of several templates with the same version, template_<version>.nk
+        (exact case first) is preferred, else the first by name.
+        """
+        entry = self._folder(folder)
+        if entry is None:
+            return None
+        candidates = entry.by_key.get(version_key(version))
+        if not candidates:
+            return entry.default
+        exact = f"template_{version}.nk"
+        return (next((t for t in candidates if t.name == exact), None)
+                or next((t for t in candidates if t.name.lower() == exact.lower()), None)
+                or candidates[0])
+
+    def read(self, tpl):
+        """Template contents, from memory when the file is unchanged since it was cached."""
+        st = self._stat(tpl.path)
+        if st is None:
+            raise FileNotFoundError(tpl.path)
+        if tpl.data is not None and (st.st_size, st.st_mtime_ns) == (tpl.size, tpl.mtime_ns):
+            return tpl.data
+        with open(tpl.path, "rb") as fh:
+            data = fh.read()
+        tpl.size, tpl.mtime_ns = st.st_size, st.st_mtime_ns
+        tpl.data = data if len(data) <= self.max_inline else None
+        return data
+
+    def write(self, tpl, dest):
+        """Write the template to `dest` (via a temp file, so a partial script is never left behind)."""
+        data = self.read(tpl)
+        tmp = f"{dest}.tmp"
+        with open(tmp, "wb") as fh:
+            fh.write(data)
+        os.replace(tmp, dest)
+        return len(data)
+
+    def invalidate(self, folder=None):
+        with self._lock:
+            if folder is None:
+                self._folders.clear()
+            else:
+                self._folders.pop(folder, None)
+
+
+def _os_stat(path):
+    try:
+        return os.stat(path)
+    except OSError:
+        return None
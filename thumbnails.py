@@ -0,0 +1,243 @@
+"""Thumbnail generation with a size-bounded on-disk LRU cache.
+
+Poster frames are generated from image plates, EXR sequences (middle frame)
+and movies, using a local ffmpeg when present and Pillow (optional) for plain
+image formats otherwise. Results are cached on local disk keyed by source
+path, mtime and size; the least recently served files are evicted once the
+cache grows past its byte budget.
+"""
+import os
+import shutil
+import hashlib
+import logging
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from PIL import Image
+except ImportError:  # optional dependency
+    Image = None
+
+log = logging.getLogger(__name__)
+
+IMAGE_EXTS = {".jpg", ".jpeg", ".png", ".tif", ".tiff", ".bmp", ".webp", ".gif", ".dpx"}
+PIL_EXTS = {".jpg", ".jpeg", ".png", ".tif", ".tiff", ".bmp", ".webp", ".gif"}
+MOVIE_EXTS = {".mov", ".mp4", ".m4v", ".mkv", ".avi", ".webm", ".mxf", ".qt"}
+EXR_EXTS = {".exr"}
+SEQUENCE_EXTS = tuple(sorted(EXR_EXTS | IMAGE_EXTS))
+
+
+def find_ffmpeg():
+    return os.environ.get("DC_FFMPEG") or shutil.which("ffmpeg")
+
+
+class _OsFs:
+    """Uncached filesystem checks; app.py passes a statcache.StatCache instead."""
+    stat = staticmethod(os.stat)
+    isdir = staticmethod(os.path.isdir)
+    isfile = staticmethod(os.path.isfile)
+
+
+def resolve_source(path, fs=_OsFs, sequences=None):
+    """Map a stored media path to the single file to thumbnail.
+
+    A directory is treated as an image sequence and its middle frame is used.
+    With `sequences` (a sequences.SequenceCache) the directory is only listed
+    again when its mtime changes; without it every call lists it.
+    Returns None when nothing usable exists.
+    """
+    if not path:
+        return None
+    path = os.path.normpath(path)
+    if fs.isdir(path):
+        if sequences is not None:
+            seqs = sequences.sequences(path, SEQUENCE_EXTS)
+            if not seqs:
+                return None
+            seq = seqs[0]  # the longest sequence
+            return seq.frame_path(seq.frames[len(seq.frames) // 2])
+        frames = sorted(e.name for e in os.scandir(path)
+                        if e.is_file() and os.path.splitext(e.name)[1].lower() in EXR_EXTS | IMAGE_EXTS)
+        if not frames:
+            return None
+        return os.path.join(path, frames[len(frames) // 2])
+    if fs.isfile(path):
+        return path
+    return None
+
+
+class ThumbnailCache:
+    def __init__(self, cache_dir, max_bytes=512 * 1024 * 1024, width=320, fmt="jpg", workers=2, fs=_OsFs,
+                 sequences=None):
+        """`sequences`: a sequences.SequenceCache for frame directories (else they are listed on every get)."""
+        self.cache_dir = cache_dir
+        self.fs = fs
+        self.sequences = sequences
+        self.max_bytes = max_bytes
+        self.width = width
+        self.fmt = fmt if fmt in ("jpg", "webp") else "jpg"
+        self.ffmpeg = find_ffmpeg()
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self._bytes = None  # lazily measured cache size
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="thumbs")
+
+    # -- keys / paths --
+    def key_for(self, source):
+        st = self.fs.stat(source)
+        if st is None:
+            raise FileNotFoundError(source)
+        raw = f"{source}|{st.st_mtime_ns}|{st.st_size}|{self.width}|{self.fmt}"
+        return hashlib.sha1(raw.encode("utf-8", "surrogateescape")).hexdigest()
+
+    def _cache_path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.{self.fmt}")
+
+    def can_generate(self, source):
+        ext = os.path.splitext(source)[1].lower()
+        if self.ffmpeg:
+            return ext in IMAGE_EXTS | MOVIE_EXTS | EXR_EXTS
+        return Image is not None and ext in PIL_EXTS
+
+    # -- public API --
+    def get(self, path):
+        """Return (cached thumbnail path, etag) for a stored media path, generating it if needed.
+
+        Returns (None, None) if the source is missing or cannot be thumbnailed.
+        """
+        source = resolve_source(path, self.fs, self.sequences)
+        if not source or not self.can_generate(source):
+            return None, None
+        key = self.key_for(source)
+        target = self._cache_path(key)
+        if os.path.exists(target):
+            self._touch(target)
+            return target, key
+        with self._key_lock(key):
+            try:
+                if not os.path.exists(target):
+                    if not self._generate(source, target):
+                        return None, None
+                    self._account(os.path.getsize(target), keep=target)
+            finally:
+                with self._lock:
+                    self._key_locks.pop(key, None)
+        return target, key
+
+    def prefetch(self, paths):
+        """Generate thumbnails for `paths` in the background pool."""
+        for p in paths:
+            if p:
+                self._pool.submit(self._prefetch_one, p)
+
+    def _prefetch_one(self, path):
+        try:
+            self.get(path)
+        except Exception as e:
+            log.warning("thumbnail prefetch failed for %s: %s", path, e)
+
+    # -- generation --
+    def _generate(self, source, target):
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        tmp = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+        ext = os.path.splitext(source)[1].lower()
+        try:
+            if self.ffmpeg:
+                ok = self._generate_ffmpeg(source, tmp, ext in MOVIE_EXTS)
+            else:
+                ok = self._generate_pil(source, tmp)
+            if ok:
+                os.replace(tmp, target)
+            return ok
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    def _generate_ffmpeg(self, source, out, is_movie):
+        # the thumbnail filter picks a representative frame from the first few seconds of a movie
+        vf = f"scale={self.width}:-2"
+        if is_movie:
+            vf = f"thumbnail,{vf}"
+        codec = ["-c:v", "libwebp"] if self.fmt == "webp" else ["-q:v", "4"]
+        cmd = [self.ffmpeg, "-nostdin", "-loglevel", "error", "-y", "-i", source,
+               "-vf", vf, "-frames:v", "1", *codec, "-f", "image2", out]
+        try:
+            subprocess.run(cmd, check=True, timeout=60, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        except (subprocess.SubprocessError, OSError) as e:
+            log.warning("ffmpeg thumbnail failed for %s: %s", source, e)
+            return False
+        return os.path.exists(out) and os.path.getsize(out) > 0
+
+    def _generate_pil(self, source, out):
+        try:
+            with Image.open(source) as im:
+                im.draft("RGB", (self.width, self.width))  # fast JPEG downscale on decode
+                im = im.convert("RGB")
+                im.thumbnail((self.width, self.width * 4))
+                im.save(out, "WEBP" if self.fmt == "webp" else "JPEG", quality=80)
+        except Exception as e:
+            log.warning("Pillow thumbnail failed for %s: %s", source, e)
+            return False
+        return True
+
+    # -- LRU bookkeeping --
+    def _key_lock(self, key):
+        with self._lock:
+            lk = self._key_locks.get(key)
+            if lk is None:
+                lk = self._key_locks[key] = threading.Lock()
+            return lk
+
+    def _touch(self, path):
+        # mtime doubles as the LRU clock (atime is often disabled)
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+    def _scan(self):
+        entries = []
+        for root, _dirs, files in os.walk(self.cache_dir):
+            for f in files:
+                if f.endswith(".tmp"):
+                    continue
+                p = os.path.join(root, f)
+                try:
+                    st = os.stat(p)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, p))
+        return entries
+
+    def _account(self, added, keep=None):
+        with self._lock:
+            if self._bytes is None:
+                self._bytes = sum(e[1] for e in self._scan())
+            else:
+                self._bytes += added
+            if self._bytes <= self.max_bytes:
+                return
+            self._bytes = self._evict(keep)
+
+    def _evict(self, keep=None):
+        """Drop least recently used files until the cache is at 90% of budget. Returns new size."""
+        entries = sorted(self._scan())
+        total = sum(e[1] for e in entries)
+        low_water = int(self.max_bytes * 0.9)
+        for _mtime, size, p in entries:
+            if total <= low_water:
+                break
+            if p == keep:
+                continue
+            try:
+                os.remove(p)
+                total -= size
+            except OSError:
+                pass
+        return total
+
+    def stats(self):
+        entries = self._scan()
+        return {"files": len(entries), "bytes": sum(e[1] for e in entries), "max_bytes": self.max_bytes,
+                "ffmpeg": bool(self.ffmpeg), "pillow": Image is not None}